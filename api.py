@@ -3,9 +3,19 @@ Flask REST API for Timetable Scheduler
 Provides endpoints for levels, instructors, courses, and timetable data
 """
 
-from flask import Flask, jsonify, request
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from functools import wraps
+from flask import Flask, Response, g, jsonify, make_response, request, stream_with_context
 from flask_cors import CORS
 from api_service import TimetableAPIService
+from api_cache import ResponseCache
+from api_metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics
+from solve_jobs import SolveJobManager
+from timetable_store import temp_path_for
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -22,8 +32,112 @@ FILE_PATHS = {
 
 JSON_FILE = "Data/timetable_data.json"
 
+# Timetable that a published solve job replaced, kept for GET /api/diff
+PREVIOUS_JSON_FILE = "Data/timetable_data.previous.json"
+
+# Compiled, memory-mapped copy of JSON_FILE shared by all API worker processes (None serves the JSON directly)
+STORE_FILE = "Data/timetable_data.ttstore"
+
+# Poll JSON_FILE for changes every N seconds and hot-reload it (0 disables the watcher)
+RELOAD_WATCH_INTERVAL = 5.0
+
+# Background solve jobs: output directory and number of concurrent solver processes
+SOLVE_OUTPUT_DIR = "Data/jobs"
+SOLVE_MAX_WORKERS = 1
+
 # Initialize service
-service = TimetableAPIService(JSON_FILE, FILE_PATHS)
+service = TimetableAPIService(JSON_FILE, FILE_PATHS, store_file_path=STORE_FILE)
+if RELOAD_WATCH_INTERVAL > 0:
+    service.start_watcher(RELOAD_WATCH_INTERVAL)
+
+
+def publish_solved_timetable(job):
+    """Replace the served timetable with a finished job's result and hot-reload it"""
+    if os.path.exists(JSON_FILE):
+        _copy_atomically(JSON_FILE, PREVIOUS_JSON_FILE)
+    _copy_atomically(job["result"]["json_file"], JSON_FILE)
+    service.reload()
+
+
+def _copy_atomically(source, target):
+    temp_file = temp_path_for(target)
+    try:
+        shutil.copyfile(source, temp_file)
+        os.replace(temp_file, target)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+solve_jobs = SolveJobManager(FILE_PATHS, SOLVE_OUTPUT_DIR, max_workers=SOLVE_MAX_WORKERS,
+                             on_success=publish_solved_timetable)
+
+# Serialized responses per timetable version, dropped on every reload
+response_cache = ResponseCache()
+service.add_reload_listener(lambda old_snapshot, new_snapshot: response_cache.clear())
+
+# Per-route request counts, latency histograms, response bytes and errors for GET /api/metrics
+request_metrics = RequestMetrics()
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        size = 0 if response.is_streamed else response.calculate_content_length() or 0
+        request_metrics.record(route, request.method, response.status_code, time.perf_counter() - started, size)
+    return response
+
+
+def cached_response(view):
+    """Serve a GET endpoint from the response cache, with strong ETags and If-None-Match"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = ResponseCache.make_key(request.path, request.args, service.snapshot.version)
+        entry = response_cache.get(key)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            # Only successful, fully buffered responses are cached
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            entry = response_cache.put(key, response.get_data(), response.mimetype)
+        return _cached_to_response(entry)
+    return wrapper
+
+
+def ndjson_response(records):
+    """Stream records as newline-delimited JSON, one serialized record at a time"""
+    lines = (json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+
+def bad_request(error):
+    return jsonify({
+        "success": False,
+        "error": str(error)
+    }), 400
+
+
+def _cached_to_response(entry):
+    use_gzip = entry.gzip_body is not None and 'gzip' in request.accept_encodings
+    etag = entry.gzip_etag if use_gzip else entry.etag
+    if request.if_none_match.contains(etag):
+        response_cache.record_not_modified()
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(entry.gzip_body if use_gzip else entry.body, mimetype=entry.mimetype)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    return response
 
 
 # ============= Health Check =============
@@ -31,7 +145,6 @@ service = TimetableAPIService(JSON_FILE, FILE_PATHS)
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify API is running"""
-    from datetime import datetime
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
@@ -42,6 +155,7 @@ def health_check():
 # ============= Levels Endpoints =============
 
 @app.route('/api/levels', methods=['GET'])
+@cached_response
 def get_levels():
     """Get all unique levels with their departments and specializations"""
     try:
@@ -61,15 +175,27 @@ def get_levels():
 # ============= Instructors Endpoints =============
 
 @app.route('/api/instructors', methods=['GET'])
+@cached_response
 def get_instructors():
-    """Get all instructors with their details and schedules"""
+    """Get all instructors with their details and schedules (?cursor=&limit=&fields=&format=ndjson)"""
     try:
-        instructors = service.get_all_instructors()
-        return jsonify({
+        fields = request.args.get('fields')
+        if request.args.get('format') == 'ndjson':
+            return ndjson_response(service.iter_instructors(fields=fields))
+
+        page = service.get_instructors_page(
+            cursor=request.args.get('cursor'), limit=request.args.get('limit'), fields=fields)
+        response = {
             "success": True,
-            "data": instructors,
-            "count": len(instructors)
-        })
+            "data": page["instructors"],
+            "count": len(page["instructors"])
+        }
+        if request.args.get('cursor') or request.args.get('limit'):
+            response["total"] = page["total"]
+            response["next_cursor"] = page["next_cursor"]
+        return jsonify(response)
+    except ValueError as e:
+        return bad_request(e)
     except Exception as e:
         return jsonify({
             "success": False,
@@ -78,6 +204,7 @@ def get_instructors():
 
 
 @app.route('/api/instructors/<instructor_id>', methods=['GET'])
+@cached_response
 def get_instructor(instructor_id):
     """Get specific instructor details by ID"""
     try:
@@ -102,6 +229,7 @@ def get_instructor(instructor_id):
 # ============= Courses Endpoints =============
 
 @app.route('/api/courses', methods=['GET'])
+@cached_response
 def get_courses():
     """Get all courses"""
     try:
@@ -119,6 +247,7 @@ def get_courses():
 
 
 @app.route('/api/courses/<course_id>/schedule', methods=['GET'])
+@cached_response
 def get_course_schedule(course_id):
     """Get course schedule with all time slots"""
     try:
@@ -141,6 +270,7 @@ def get_course_schedule(course_id):
 
 
 @app.route('/api/courses/<course_id>/details', methods=['GET'])
+@cached_response
 def get_course_details(course_id):
     """Get comprehensive course information including instructors and students"""
     try:
@@ -165,14 +295,21 @@ def get_course_details(course_id):
 # ============= Timetable Endpoints =============
 
 @app.route('/api/timetable', methods=['GET'])
+@cached_response
 def get_timetable():
-    """Get complete timetable with optional filters (day, level, section)"""
+    """Get complete timetable with optional filters (day, level, section), pagination and projection"""
     try:
         day = request.args.get('day')
         level = request.args.get('level')
         section = request.args.get('section')
+        fields = request.args.get('fields')
+
+        if request.args.get('format') == 'ndjson':
+            return ndjson_response(service.iter_timetable(day=day, level=level, section=section, fields=fields))
 
-        timetable = service.get_timetable(day=day, level=level, section=section)
+        timetable = service.get_timetable(day=day, level=level, section=section,
+                                          cursor=request.args.get('cursor'),
+                                          limit=request.args.get('limit'), fields=fields)
         return jsonify({
             "success": True,
             "data": timetable,
@@ -182,6 +319,8 @@ def get_timetable():
                 "section": section
             }
         })
+    except ValueError as e:
+        return bad_request(e)
     except Exception as e:
         return jsonify({
             "success": False,
@@ -192,6 +331,7 @@ def get_timetable():
 # ============= Sections Endpoints =============
 
 @app.route('/api/sections', methods=['GET'])
+@cached_response
 def get_sections():
     """Get all sections with their details"""
     try:
@@ -211,6 +351,7 @@ def get_sections():
 # ============= Rooms Endpoints =============
 
 @app.route('/api/rooms', methods=['GET'])
+@cached_response
 def get_rooms():
     """Get all rooms with their details"""
     try:
@@ -230,6 +371,7 @@ def get_rooms():
 # ============= Metadata Endpoint =============
 
 @app.route('/api/metadata', methods=['GET'])
+@cached_response
 def get_metadata():
     """Get timetable generation metadata"""
     try:
@@ -245,6 +387,251 @@ def get_metadata():
         }), 500
 
 
+# ============= Availability Endpoints =============
+
+@app.route('/api/availability/rooms', methods=['GET'])
+@cached_response
+def get_free_rooms():
+    """Rooms free in the given slots (?slots=3,4 or ?day=Tuesday&period=3, &min_capacity=&type_of_space=)"""
+    try:
+        rooms = service.get_free_rooms(
+            slots=request.args.get('slots'),
+            day=request.args.get('day'),
+            period=request.args.get('period'),
+            min_capacity=request.args.get('min_capacity'),
+            type_of_space=request.args.get('type_of_space'))
+        return jsonify({
+            "success": True,
+            "data": rooms,
+            "count": len(rooms)
+        })
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/availability/slots', methods=['GET'])
+@cached_response
+def get_free_slots():
+    """Timeslots in which everyone given is free (?instructors=P12&sections=CSIT-2-s4&rooms=&day=)"""
+    try:
+        slots = service.get_free_slots(
+            instructors=request.args.get('instructors'),
+            sections=request.args.get('sections'),
+            rooms=request.args.get('rooms'),
+            day=request.args.get('day'))
+        return jsonify({
+            "success": True,
+            "data": slots,
+            "count": len(slots)
+        })
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+# ============= Diff Endpoint =============
+
+def resolve_timetable(name):
+    """Timetable for /api/diff: "current", "previous" (before the last published job) or a solve job ID"""
+    if name == "current":
+        return name
+    if name == "previous":
+        if not os.path.exists(PREVIOUS_JSON_FILE):
+            raise ValueError("No previous timetable: none has been replaced by a solve job yet")
+        return PREVIOUS_JSON_FILE
+    job = solve_jobs.get(name)
+    if job is None:
+        raise ValueError(f"Unknown timetable '{name}': use current, previous or a solve job ID")
+    if job["status"] != "succeeded":
+        raise ValueError(f"Solve job '{name}' has no timetable (status: {job['status']})")
+    return job["result"]["json_file"]
+
+
+@app.route('/api/diff', methods=['GET'])
+@cached_response
+def diff_timetables():
+    """Sessions added, removed and moved between two timetables, with per-entity counts"""
+    try:
+        before = resolve_timetable(request.args.get('before', 'previous'))
+        after = resolve_timetable(request.args.get('after', 'current'))
+        result = service.diff(before, after)
+        return jsonify({
+            "success": True,
+            "data": result,
+            "count": len(result["added"]) + len(result["removed"]) + len(result["moved"])
+        })
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+# ============= What-if Endpoint =============
+
+@app.route('/api/whatif', methods=['POST'])
+def evaluate_moves():
+    """Check moves for hard-constraint conflicts and soft-cost delta; {"moves": [...], "commit": false}"""
+    try:
+        body = request.get_json(silent=True) or {}
+        result = service.evaluate_moves(body.get("moves"), commit=bool(body.get("commit", False)))
+        return jsonify({
+            "success": True,
+            "data": result
+        })
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+# ============= Batch Endpoint =============
+
+@app.route('/api/batch', methods=['POST'])
+def batch_lookup():
+    """Resolve many instructor/section/course lookups and timetable queries in one request"""
+    try:
+        result = service.batch(request.get_json(silent=True))
+        return jsonify({
+            "success": True,
+            "data": result,
+            "count": sum(len(result[key]) for key in ("instructors", "sections", "courses", "timetable"))
+        })
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+# ============= Solve Job Endpoints =============
+
+@app.route('/api/solve', methods=['POST'])
+def submit_solve_job():
+    """Start a background solve job: {"inputs": {...}, "options": {"iterations", "budget_seconds", "seed", ...}}"""
+    try:
+        body = request.get_json(silent=True) or {}
+        if not isinstance(body, dict):
+            raise ValueError("The request body must be a JSON object")
+        job = solve_jobs.submit(inputs=body.get("inputs"), options=body.get("options"))
+        return jsonify({
+            "success": True,
+            "data": job
+        }), 202
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/solve/jobs', methods=['GET'])
+def list_solve_jobs():
+    """List all solve jobs with their status"""
+    jobs = solve_jobs.list()
+    return jsonify({
+        "success": True,
+        "data": jobs,
+        "count": len(jobs)
+    })
+
+
+@app.route('/api/solve/jobs/<job_id>', methods=['GET'])
+def get_solve_job(job_id):
+    """Get status, current phase, best cost and elapsed time of a solve job"""
+    job = solve_jobs.get(job_id)
+    if job:
+        return jsonify({
+            "success": True,
+            "data": job
+        })
+    return jsonify({
+        "success": False,
+        "error": f"Job '{job_id}' not found"
+    }), 404
+
+
+@app.route('/api/solve/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_solve_job(job_id):
+    """Cancel a queued or running solve job"""
+    job = solve_jobs.cancel(job_id)
+    if job:
+        return jsonify({
+            "success": True,
+            "data": job
+        })
+    return jsonify({
+        "success": False,
+        "error": f"Job '{job_id}' not found"
+    }), 404
+
+
+# ============= Admin Endpoints =============
+
+@app.route('/api/admin/reload', methods=['POST'])
+def reload_timetable():
+    """Reload the timetable JSON in the background and swap it in atomically"""
+    try:
+        started = service.reload()
+        return jsonify({
+            "success": True,
+            "data": {
+                "reload_started": started,
+                "current_version": service.snapshot.version
+            }
+        }), 202
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+
+@app.route('/api/admin/cache', methods=['GET'])
+def get_cache_stats():
+    """Response cache hit/miss counters"""
+    return jsonify({
+        "success": True,
+        "data": response_cache.stats()
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request metrics plus data version and response cache gauges, in the Prometheus text format"""
+    snapshot = service.snapshot
+    cache = response_cache.stats()
+    gauges = [
+        ("data_info", "Version of the timetable being served (always 1).", {"version": snapshot.version}, 1),
+        ("data_loaded_timestamp_seconds", "When the served timetable was loaded.", {},
+         datetime.fromisoformat(snapshot.loaded_at).timestamp()),
+        ("data_sessions", "Sessions in the served timetable.", {}, len(snapshot.index.schedule)),
+    ]
+    gauges += [(f"response_cache_{name}", f"Response cache {name.replace('_', ' ')}.", {}, cache[name])
+               for name in ("entries", "bytes", "hit_ratio")]
+    counters = [(f"response_cache_{name}_total", f"Response cache {name.replace('_', ' ')} since startup.", {},
+                 cache[name]) for name in ("hits", "misses", "not_modified")]
+    return Response(request_metrics.render(gauges, counters), content_type=METRICS_CONTENT_TYPE)
+
+
 # ============= Error Handlers =============
 
 @app.errorhandler(404)
@@ -274,15 +661,27 @@ if __name__ == '__main__':
     print("\nAvailable Endpoints:")
     print("  - GET  /api/health")
     print("  - GET  /api/levels")
-    print("  - GET  /api/instructors")
+    print("  - GET  /api/instructors?cursor=<cursor>&limit=<n>&fields=<a,b>&format=ndjson")
     print("  - GET  /api/instructors/<instructor_id>")
     print("  - GET  /api/courses")
     print("  - GET  /api/courses/<course_id>/schedule")
     print("  - GET  /api/courses/<course_id>/details")
-    print("  - GET  /api/timetable?day=<day>&level=<level>&section=<section>")
+    print("  - GET  /api/timetable?day=<day>&level=<level>&section=<section>&cursor=<cursor>&limit=<n>&fields=<a,b>&format=ndjson")
     print("  - GET  /api/sections")
     print("  - GET  /api/rooms")
     print("  - GET  /api/metadata")
+    print("  - GET  /api/availability/rooms?slots=<ids>&day=<day>&period=<n>&min_capacity=<n>&type_of_space=<type>")
+    print("  - GET  /api/availability/slots?instructors=<ids>&sections=<ids>&rooms=<ids>&day=<day>")
+    print("  - GET  /api/diff?before=<current|previous|job_id>&after=<current|previous|job_id>")
+    print("  - POST /api/whatif")
+    print("  - POST /api/batch")
+    print("  - POST /api/solve")
+    print("  - GET  /api/solve/jobs")
+    print("  - GET  /api/solve/jobs/<job_id>")
+    print("  - POST /api/solve/jobs/<job_id>/cancel")
+    print("  - POST /api/admin/reload")
+    print("  - GET  /api/admin/cache")
+    print("  - GET  /api/metrics")
     print("\n" + "=" * 60)
     print("Starting server on http://localhost:5000")
     print("=" * 60 + "\n")
@@ -0,0 +1,86 @@
+"""
+API Response Cache
+Stores serialized endpoint responses per timetable version and answers conditional GETs
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class CachedResponse:
+    """Serialized response body plus its gzip variant, each with its own strong ETag"""
+
+    def __init__(self, body, version, mimetype, gzip_min_size):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = f"{version}-{hashlib.sha1(body).hexdigest()[:16]}"
+        self.gzip_body = gzip.compress(body, compresslevel=6) if len(body) >= gzip_min_size else None
+        # The gzip body is a different byte sequence, so it needs a different strong validator
+        self.gzip_etag = f"{self.etag}-gz" if self.gzip_body is not None else None
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses keyed by (endpoint, normalized query, version).
+
+    Because the timetable version is part of the key, a reload can never serve stale
+    bytes; clear() is only called on reload to free the old entries early.
+    """
+
+    def __init__(self, max_entries=512, gzip_min_size=1024):
+        self.max_entries = max_entries
+        self.gzip_min_size = gzip_min_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def make_key(path, args, version):
+        """
+        Query parameters are sorted by name only; the stable sort keeps the values of a
+        repeated parameter in request order, since views read the first one.
+        """
+        return (path, tuple(sorted(args.items(multi=True), key=lambda item: item[0])), version)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, mimetype):
+        entry = CachedResponse(body, key[-1], mimetype, self.gzip_min_size)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(e.body) + len(e.gzip_body or b"") for e in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
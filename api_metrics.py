@@ -0,0 +1,148 @@
+"""
+API Request Metrics
+Per-route request counts, latency histograms, response sizes and error counts,
+rendered in the Prometheus text exposition format
+"""
+
+import bisect
+import threading
+from collections import defaultdict
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "timetable_api"
+
+
+class _RouteMetrics:
+    """Counters of one (route, method) pair; only mutated under RequestMetrics._lock"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.duration_sum = 0.0
+        self.bytes_sum = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # Per bucket, not cumulative; the last is +Inf
+        self.statuses = defaultdict(int)
+
+    def copy(self):
+        other = _RouteMetrics()
+        other.count, other.errors = self.count, self.errors
+        other.duration_sum, other.bytes_sum = self.duration_sum, self.bytes_sum
+        other.buckets, other.statuses = list(self.buckets), defaultdict(int, self.statuses)
+        return other
+
+    def quantile(self, q):
+        """
+        Latency quantile estimated from the histogram, interpolating linearly inside the
+        bucket that holds it (as Prometheus' histogram_quantile does). Falls back to the
+        largest finite bound when the quantile lies in the +Inf bucket.
+        """
+        rank = q * self.count
+        seen = 0
+        for i, in_bucket in enumerate(self.buckets):
+            if seen + in_bucket >= rank and in_bucket:
+                if i == len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+                return lower + (LATENCY_BUCKETS[i] - lower) * (rank - seen) / in_bucket
+            seen += in_bucket
+        return 0.0
+
+
+class RequestMetrics:
+    """
+    Thread-safe request metrics keyed by route template (e.g. /api/instructors/<instructor_id>)
+    and method, so the label set stays bounded whatever IDs clients ask for. Requests that
+    match no route are recorded under "<unmatched>". Errors are responses with status >= 500.
+
+    Counters live in the process: with several API worker processes, each exposes its own.
+    """
+
+    def __init__(self):
+        self._routes = defaultdict(_RouteMetrics)
+        self._lock = threading.Lock()
+
+    def record(self, route, method, status, seconds, response_bytes):
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            metrics = self._routes[(route, method)]
+            metrics.count += 1
+            metrics.duration_sum += seconds
+            metrics.bytes_sum += response_bytes
+            metrics.buckets[bucket] += 1
+            metrics.statuses[status] += 1
+            if status >= 500:
+                metrics.errors += 1
+
+    def render(self, gauges=(), counters=()):
+        """
+        All metrics in the Prometheus text format. `gauges` and `counters` are extra
+        (name, help, labels, value) samples from elsewhere, e.g. the data version and the
+        response cache; counter names must end in _total. Samples sharing a name form one
+        family and must be adjacent.
+        """
+        with self._lock:
+            routes = [(route, method, metrics.copy()) for (route, method), metrics in sorted(self._routes.items())]
+
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        def sample(name, labels, value):
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            lines.append(f"{PREFIX}_{name}{{{label_text}}} {_format_value(value)}" if label_text
+                         else f"{PREFIX}_{name} {_format_value(value)}")
+
+        family("requests_total", "counter", "Requests handled, by route, method and status code.")
+        for route, method, metrics in routes:
+            for status in sorted(metrics.statuses):
+                sample("requests_total", {"route": route, "method": method, "status": status},
+                       metrics.statuses[status])
+
+        family("request_errors_total", "counter", "Requests answered with a 5xx status.")
+        for route, method, metrics in routes:
+            sample("request_errors_total", {"route": route, "method": method}, metrics.errors)
+
+        family("request_duration_seconds", "histogram", "Time to produce the response (until headers, for streams).")
+        for route, method, metrics in routes:
+            cumulative = 0
+            for bound, in_bucket in zip(LATENCY_BUCKETS + ("+Inf",), metrics.buckets):
+                cumulative += in_bucket
+                sample("request_duration_seconds_bucket", {"route": route, "method": method, "le": bound}, cumulative)
+            sample("request_duration_seconds_sum", {"route": route, "method": method}, metrics.duration_sum)
+            sample("request_duration_seconds_count", {"route": route, "method": method}, metrics.count)
+
+        family("request_duration_quantile_seconds", "gauge",
+               "Latency quantiles estimated from the request_duration_seconds histogram.")
+        for route, method, metrics in routes:
+            for q in QUANTILES:
+                sample("request_duration_quantile_seconds", {"route": route, "method": method, "quantile": q},
+                       metrics.quantile(q))
+
+        family("response_bytes_total", "counter", "Response body bytes sent (streamed bodies are not counted).")
+        for route, method, metrics in routes:
+            sample("response_bytes_total", {"route": route, "method": method}, metrics.bytes_sum)
+
+        for kind, samples in (("gauge", gauges), ("counter", counters)):
+            previous = None
+            for name, help_text, labels, value in samples:
+                if name != previous:
+                    family(name, kind, help_text)
+                    previous = name
+                sample(name, labels, value)
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 9))
+    return str(value)
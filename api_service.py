@@ -3,47 +3,350 @@ API Service Layer
 Handles data loading and business logic for the REST API
 """
 
+import base64
+import bisect
+import hashlib
 import json
+import os
+import threading
+import time
 from collections import defaultdict
-from data_loader.loader import DataLoader
+from datetime import datetime
+from timetable_index import TimetableIndex
+from timetable_store import TimetableStore, compile_document
+
+
+SCHEDULE_FIELDS = ("day", "start_time", "end_time", "course_id", "course_name", "session_type",
+                   "instructor_id", "instructor_name", "room_id", "room_capacity", "room_type",
+                   "sections", "student_count", "timeslot_ids")
+INSTRUCTOR_FIELDS = ("instructor_id", "name", "qualified_courses", "not_preferred_slots",
+                     "schedule", "total_teaching_hours")
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_LOOKUPS = 500
+BATCH_KEYS = ("instructors", "sections", "courses", "timetable")
+
+_model_data_cache = {}
+_model_data_lock = threading.Lock()
+
+
+def load_model_data(csv_file_paths):
+    """
+    Loads the CSV/Excel model data on first use and shares it between all services in
+    the process (one load per set of input files). Returns None if loading failed.
+    """
+    key = tuple(sorted(csv_file_paths.items()))
+    with _model_data_lock:
+        if key not in _model_data_cache:
+            # Imported here: pandas/openpyxl are only needed once model data is requested
+            from data_loader.loader import DataLoader
+            model_data = DataLoader(csv_file_paths).load_all()
+            if model_data is None:
+                return None
+            _model_data_cache[key] = model_data
+        return _model_data_cache[key]
+
+
+def parse_fields(fields, allowed):
+    """Parses a `fields=a,b,c` projection. None/empty means all fields."""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return names
+
+
+def project(record, fields):
+    return record if fields is None else {f: record[f] for f in fields if f in record}
+
+
+def encode_cursor(version, offset):
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, version):
+    """Returns the offset stored in `cursor`; cursors are only valid for the version they were issued for."""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_version, offset = decoded.rsplit(":", 1)
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    if cursor_version != version:
+        raise ValueError("Cursor expired: the timetable was reloaded, restart from the first page")
+    return offset
+
+
+def parse_id_list(value):
+    """Parses a comma separated `a,b,c` query parameter into a list (None/empty means [])."""
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def parse_limit(limit):
+    if limit is None or limit == "":
+        return None
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit '{limit}'")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+class OccupancyIndex:
+    """
+    Busy-slot bitmaps per room, instructor and section (bit i = i-th timeslot), plus
+    rooms sorted by capacity per type_of_space, so availability questions are a few
+    integer operations instead of a scan over the schedule.
+    """
+
+    def __init__(self, index):
+        self.timeslots = list(index.data.get("timeslots", []))
+        self.slot_bit = {slot["slot_id"]: 1 << i for i, slot in enumerate(self.timeslots)}
+        self.all_slots = (1 << len(self.timeslots)) - 1
+
+        self.room_busy = defaultdict(int)
+        self.instructor_busy = defaultdict(int)
+        self.section_busy = defaultdict(int)
+        for slot_ids, room_id, instructor_id, section_ids in index.iter_columns(
+                ("timeslot_ids", "room_id", "instructor_id", "sections")):
+            mask = 0
+            for slot_id in slot_ids:
+                mask |= self.slot_bit.get(slot_id, 0)
+            self.room_busy[room_id] |= mask
+            self.instructor_busy[instructor_id] |= mask
+            for section_id in section_ids:
+                self.section_busy[section_id] |= mask
+
+        self.rooms = {room["room_id"]: room for room in index.data.get("rooms", [])}
+        self.instructor_ids = set(index.instructor_by_id)
+        self.section_ids = set(index.section_by_id)
+        # type_of_space (lowercased, None = any) -> (ascending capacities, rooms in the same order)
+        self.rooms_by_space = {}
+        by_space = defaultdict(list)
+        for room in sorted(self.rooms.values(), key=lambda r: (r["capacity"], r["room_id"])):
+            by_space[None].append(room)
+            by_space[room["type_of_space"].lower()].append(room)
+        for space, rooms in by_space.items():
+            self.rooms_by_space[space] = ([room["capacity"] for room in rooms], rooms)
+
+    def slot_mask(self, slot_ids=(), day=None, period=None):
+        """
+        Bitmap of the requested slots: explicit slot IDs, the `period`-th slot (1-based) of `day`,
+        or every slot of `day`. Raises ValueError for unknown slots.
+        """
+        mask = 0
+        for slot_id in slot_ids:
+            if slot_id not in self.slot_bit:
+                raise ValueError(f"Unknown timeslot {slot_id}")
+            mask |= self.slot_bit[slot_id]
+        if day:
+            day_slots = [slot["slot_id"] for slot in self.timeslots if slot["day"].lower() == day.lower()]
+            if not day_slots:
+                raise ValueError(f"Unknown day '{day}'")
+            if period is not None:
+                if not 1 <= period <= len(day_slots):
+                    raise ValueError(f"{day} has periods 1 to {len(day_slots)}")
+                day_slots = [day_slots[period - 1]]
+            for slot_id in day_slots:
+                mask |= self.slot_bit[slot_id]
+        elif period is not None:
+            raise ValueError("'period' requires 'day'")
+        return mask
+
+    def free_rooms(self, mask, min_capacity=0, type_of_space=None):
+        """Rooms free in every slot of `mask` with at least `min_capacity` seats, smallest first."""
+        capacities, rooms = self.rooms_by_space.get(type_of_space.lower() if type_of_space else None, ([], []))
+        start = bisect.bisect_left(capacities, min_capacity)
+        return [room for room in rooms[start:] if not self.room_busy.get(room["room_id"], 0) & mask]
+
+    def common_free_mask(self, instructors=(), sections=(), rooms=()):
+        """Bitmap of the slots in which all given instructors, sections and rooms are free."""
+        busy = 0
+        for ids, known, busy_map, label in ((instructors, self.instructor_ids, self.instructor_busy, "instructor"),
+                                            (sections, self.section_ids, self.section_busy, "section"),
+                                            (rooms, self.rooms, self.room_busy, "room")):
+            for entity_id in ids:
+                if entity_id not in known:
+                    raise ValueError(f"Unknown {label} '{entity_id}'")
+                busy |= busy_map.get(entity_id, 0)
+        return self.all_slots & ~busy
+
+    def slots_in(self, mask):
+        return [slot for i, slot in enumerate(self.timeslots) if mask >> i & 1]
+
+
+class TimetableSnapshot:
+    """
+    An immutable, fully indexed version of the timetable.
+
+    The service swaps whole snapshots, so a request that grabbed one keeps a
+    consistent view even if a reload finishes while it is running.
+    """
+
+    EMPTY_TIMETABLE = {
+        "metadata": {},
+        "courses": [],
+        "instructors": [],
+        "sections": [],
+        "rooms": [],
+        "timeslots": [],
+        "schedule": []
+    }
+
+    def __init__(self, timetable_data, version, source_stat=None, index=None):
+        self.timetable_data = timetable_data
+        self.index = index if index is not None else TimetableIndex(timetable_data)
+        self.occupancy = OccupancyIndex(self.index)
+        self.version = version
+        self.source_stat = source_stat  # (mtime_ns, size) of the file it was read from
+        self.loaded_at = datetime.now().isoformat()
+
+    @classmethod
+    def from_file(cls, json_file_path):
+        """Reads and indexes a timetable JSON file. Raises on a missing or malformed file."""
+        stat = os.stat(json_file_path)
+        with open(json_file_path, 'rb') as f:
+            raw = f.read()
+        return cls(json.loads(raw), hashlib.sha1(raw).hexdigest()[:16], (stat.st_mtime_ns, stat.st_size))
+
+    @classmethod
+    def from_store(cls, json_file_path, store_path):
+        """
+        Maps the compiled store of a timetable JSON file (see timetable_store.py). A store
+        written for the JSON's current (mtime, size), e.g. by the export, is used without
+        reading the JSON at all. Otherwise the JSON's content hash decides, and a missing
+        or stale store is (re)compiled first. Concurrent workers may compile at the same
+        time; each writes its own temporary file and replaces the store atomically, so that
+        is harmless.
+        """
+        stat = os.stat(json_file_path)
+        source_stat = (stat.st_mtime_ns, stat.st_size)
+        try:
+            store = TimetableStore(store_path)
+        except (FileNotFoundError, ValueError):
+            store = None
+        if store is not None and store.source_stat == source_stat:
+            return cls(store.data, store.version, source_stat, index=store.index)
+
+        with open(json_file_path, 'rb') as f:
+            raw = f.read()
+        version = hashlib.sha1(raw).hexdigest()[:16]
+        if store is None or store.version != version:
+            compile_document(json.loads(raw), store_path, version, source_stat)
+            print(f"Compiled timetable store {store_path}")
+            store = TimetableStore(store_path)
+        return cls(store.data, version, source_stat, index=store.index)
 
 
 class TimetableAPIService:
     """Service class to load and provide timetable data for API endpoints"""
 
-    def __init__(self, json_file_path, csv_file_paths):
+    def __init__(self, json_file_path, csv_file_paths, store_file_path=None):
         self.json_file_path = json_file_path
         self.csv_file_paths = csv_file_paths
-        self.timetable_data = None
-        self.model_data = None
+        # When set, the timetable is served from this memory-mapped store (see timetable_store.py)
+        self.store_file_path = store_file_path
+        self._snapshot = None
+        self._reload_lock = threading.Lock()
+        self._reload_listeners = []
+        self._watcher = None
+        self._move_evaluator = None
+        self._move_lock = threading.Lock()
         self._load_data()
 
     def _load_data(self):
-        """Load timetable data from JSON and CSV files"""
-        # Load JSON timetable data
+        """Load timetable data from JSON; model data is loaded on first use (see model_data)"""
         try:
-            with open(self.json_file_path, 'r', encoding='utf-8') as f:
-                self.timetable_data = json.load(f)
+            self._snapshot = self._read_snapshot()
             print(f"Loaded timetable data from {self.json_file_path}")
         except FileNotFoundError:
             print(f"Warning: {self.json_file_path} not found. Some endpoints may not work.")
-            self.timetable_data = {
-                "metadata": {},
-                "courses": [],
-                "instructors": [],
-                "sections": [],
-                "rooms": [],
-                "timeslots": [],
-                "schedule": []
-            }
-
-        # Load model data from CSV files
-        loader = DataLoader(self.csv_file_paths)
-        self.model_data = loader.load_all()
+            self._snapshot = TimetableSnapshot(TimetableSnapshot.EMPTY_TIMETABLE, "empty")
+
+    @property
+    def model_data(self):
+        """Model objects built from the CSV/Excel inputs, loaded lazily and shared per process"""
+        return load_model_data(self.csv_file_paths)
+
+    def _read_snapshot(self):
+        if self.store_file_path:
+            return TimetableSnapshot.from_store(self.json_file_path, self.store_file_path)
+        return TimetableSnapshot.from_file(self.json_file_path)
+
+    # ---------- Snapshot access and reloading ----------
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def timetable_data(self):
+        return self._snapshot.timetable_data
+
+    @property
+    def index(self):
+        return self._snapshot.index
+
+    def add_reload_listener(self, callback):
+        """callback(old_snapshot, new_snapshot) is called after every successful swap."""
+        self._reload_listeners.append(callback)
+
+    def reload(self, wait=False):
+        """
+        Re-reads the JSON file and indexes it in a background thread, then swaps the
+        snapshot in atomically. Requests are never blocked. Returns False if a reload is
+        already running. With wait=True the reload runs in the calling thread.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        if wait:
+            self._reload_locked()
+        else:
+            threading.Thread(target=self._reload_locked, name="timetable-reload", daemon=True).start()
+        return True
+
+    def _reload_locked(self):
+        try:
+            try:
+                new_snapshot = self._read_snapshot()
+            except Exception as e:
+                # Keep serving the current snapshot, e.g. while the file is still being written
+                print(f"Reload of {self.json_file_path} failed, keeping version {self._snapshot.version}: {e}")
+                return
+            old_snapshot, self._snapshot = self._snapshot, new_snapshot
+        finally:
+            self._reload_lock.release()
+        print(f"Reloaded timetable data: version {old_snapshot.version} -> {new_snapshot.version}")
+        for callback in self._reload_listeners:
+            callback(old_snapshot, new_snapshot)
+
+    def start_watcher(self, interval=5.0):
+        """Polls the JSON file every `interval` seconds and reloads it when it changes."""
+        if self._watcher is not None:
+            return
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    stat = os.stat(self.json_file_path)
+                except FileNotFoundError:
+                    continue
+                if (stat.st_mtime_ns, stat.st_size) != self._snapshot.source_stat:
+                    self.reload(wait=True)
+        self._watcher = threading.Thread(target=watch, name="timetable-watcher", daemon=True)
+        self._watcher.start()
+
+    # ---------- Endpoints ----------
 
     def get_all_levels(self):
         """Get all unique levels with their departments and specializations"""
-        if not self.timetable_data:
+        index = self.index
+        if not index.data:
             return []
 
         levels_dict = defaultdict(lambda: {
@@ -53,7 +356,7 @@ class TimetableAPIService:
             "sections": []
         })
 
-        for section in self.timetable_data.get("sections", []):
+        for section in index.sections:
             level = section["level"]
             dept = section["department"]
             spec = section["specialization"]
@@ -77,72 +380,78 @@ class TimetableAPIService:
 
         return result
 
+    @staticmethod
+    def _page(snapshot, total, cursor, limit):
+        """(start, end, next_cursor) of the requested page; the whole range when unpaginated."""
+        start = decode_cursor(cursor, snapshot.version) if cursor else 0
+        limit = parse_limit(limit)
+        end = total if limit is None else min(total, start + limit)
+        next_cursor = encode_cursor(snapshot.version, end) if end < total else None
+        return start, end, next_cursor
+
+    @staticmethod
+    def _instructor_with_schedule(index, instructor, fields=None):
+        if fields is not None and "schedule" not in fields and "total_teaching_hours" not in fields:
+            return project(instructor, fields)
+        schedule = index.entries(index.by_instructor.get(instructor["instructor_id"], []))
+        return project({**instructor, "schedule": schedule, "total_teaching_hours": len(schedule)}, fields)
+
     def get_all_instructors(self):
         """Get all instructors with their details"""
-        if not self.timetable_data:
-            return []
-
-        instructors = self.timetable_data.get("instructors", [])
-
-        # Add schedule information for each instructor
-        for instructor in instructors:
-            instructor_id = instructor["instructor_id"]
-            schedule = [
-                entry for entry in self.timetable_data.get("schedule", [])
-                if entry["instructor_id"] == instructor_id
-            ]
-            instructor["schedule"] = schedule
-            instructor["total_teaching_hours"] = len(schedule)
+        return self.get_instructors_page()["instructors"]
+
+    def get_instructors_page(self, cursor=None, limit=None, fields=None):
+        """Get a page of instructors (optionally projected to `fields`)"""
+        snapshot = self.snapshot
+        index = snapshot.index
+        fields = parse_fields(fields, INSTRUCTOR_FIELDS)
+        start, end, next_cursor = self._page(snapshot, len(index.instructors), cursor, limit)
+        return {
+            "instructors": [self._instructor_with_schedule(index, instructor, fields)
+                            for instructor in index.instructors[start:end]],
+            "total": len(index.instructors),
+            "next_cursor": next_cursor
+        }
 
-        return instructors
+    def iter_instructors(self, fields=None):
+        """
+        Lazily produce instructors one at a time from a single snapshot (for streaming responses).
+        Arguments are validated immediately, before anything is streamed.
+        """
+        index = self.index
+        fields = parse_fields(fields, INSTRUCTOR_FIELDS)
+        return (self._instructor_with_schedule(index, instructor, fields) for instructor in index.instructors)
 
     def get_instructor_by_id(self, instructor_id):
         """Get specific instructor details by ID"""
-        instructors = self.get_all_instructors()
-        for instructor in instructors:
-            if instructor["instructor_id"] == instructor_id:
-                return instructor
-        return None
+        index = self.index
+        instructor = index.instructor_by_id.get(instructor_id)
+        return self._instructor_with_schedule(index, instructor) if instructor else None
 
     def get_all_courses(self):
         """Get all courses"""
-        return self.timetable_data.get("courses", [])
+        return list(self.index.courses)
 
     def get_course_schedule(self, course_id):
         """Get schedule for a specific course with all time slots"""
-        schedule = [
-            entry for entry in self.timetable_data.get("schedule", [])
-            if entry["course_id"] == course_id
-        ]
-
-        # Get course info
-        course_info = next(
-            (c for c in self.timetable_data.get("courses", []) if c["course_id"] == course_id),
-            None
-        )
+        index = self.index
+        schedule = index.entries(index.by_course.get(course_id, []))
 
         return {
-            "course": course_info,
+            "course": index.course_by_id.get(course_id),
             "schedule": schedule,
             "total_sessions": len(schedule)
         }
 
     def get_course_details(self, course_id):
         """Get comprehensive course details including instructors and students"""
-        schedule = [
-            entry for entry in self.timetable_data.get("schedule", [])
-            if entry["course_id"] == course_id
-        ]
-
-        # Get course info
-        course_info = next(
-            (c for c in self.timetable_data.get("courses", []) if c["course_id"] == course_id),
-            None
-        )
-
+        index = self.index
+        course_info = index.course_by_id.get(course_id)
         if not course_info:
             return None
 
+        schedule = index.entries(index.by_course.get(course_id, []))
+
         # Get unique instructors teaching this course
         instructors = {}
         for entry in schedule:
@@ -162,23 +471,10 @@ class TimetableAPIService:
                 "sections": entry["sections"]
             })
 
-        # Get unique sections taking this course
-        sections_set = set()
-        total_students = 0
-        for entry in schedule:
-            for section_id in entry["sections"]:
-                sections_set.add(section_id)
-
-        # Get section details
-        sections_details = []
-        for section_id in sections_set:
-            section_info = next(
-                (s for s in self.timetable_data.get("sections", []) if s["section_id"] == section_id),
-                None
-            )
-            if section_info:
-                sections_details.append(section_info)
-                total_students += section_info["student_count"]
+        # Get unique sections taking this course, with their details
+        sections_set = {section_id for entry in schedule for section_id in entry["sections"]}
+        sections_details = [index.section_by_id[s] for s in sections_set if s in index.section_by_id]
+        total_students = sum(section["student_count"] for section in sections_details)
 
         return {
             "course": course_info,
@@ -189,41 +485,182 @@ class TimetableAPIService:
             "total_sessions": len(schedule)
         }
 
-    def get_timetable(self, day=None, level=None, section=None):
-        """Get complete timetable with optional filters"""
-        schedule = self.timetable_data.get("schedule", [])
+    def get_timetable(self, day=None, level=None, section=None, cursor=None, limit=None, fields=None):
+        """Get complete timetable with optional filters, pagination and field projection"""
+        snapshot = self.snapshot
+        index = snapshot.index
+        fields = parse_fields(fields, SCHEDULE_FIELDS)
+        positions = index.filter_positions(day=day, level=level, section=section)
+        total = len(index.schedule) if positions is None else len(positions)
+        start, end, next_cursor = self._page(snapshot, total, cursor, limit)
+        if positions is None:
+            schedule = index.schedule[start:end]
+        else:
+            schedule = index.entries(positions[start:end])
+        if fields is not None:
+            schedule = [project(entry, fields) for entry in schedule]
+
+        result = {
+            "schedule": schedule,
+            "total_entries": total
+        }
+        if cursor or limit:
+            result["next_cursor"] = next_cursor
+        return result
 
-        # Apply filters
-        if day:
-            schedule = [entry for entry in schedule if entry["day"].lower() == day.lower()]
-
-        if level:
-            schedule = [
-                entry for entry in schedule
-                if any(
-                    s.startswith(f"CSIT-{level}-")
-                    for s in entry["sections"]
-                )
-            ]
-
-        if section:
-            schedule = [
-                entry for entry in schedule
-                if section in entry["sections"]
-            ]
+    def iter_timetable(self, day=None, level=None, section=None, fields=None):
+        """
+        Lazily produce matching schedule entries from a single snapshot (for streaming responses).
+        Arguments are validated immediately, before anything is streamed.
+        """
+        index = self.index
+        fields = parse_fields(fields, SCHEDULE_FIELDS)
+        positions = index.filter_positions(day=day, level=level, section=section)
+        positions = range(len(index.schedule)) if positions is None else positions
+        return (project(index.schedule[position], fields) for position in positions)
+
+    def batch(self, lookups):
+        """
+        Resolve many lookups against one snapshot in a single call:
+        {"instructors": [ids], "sections": [ids], "courses": [ids],
+         "timetable": [{"day", "level", "section"}, ...], "fields": "a,b,c"}.
+        `fields` projects every returned schedule entry. Entities are keyed by ID
+        (None when unknown); timetable queries are answered in request order.
+        """
+        if not isinstance(lookups, dict):
+            raise ValueError("Batch body must be a JSON object")
+        unknown = set(lookups) - set(BATCH_KEYS) - {"fields"}
+        if unknown:
+            raise ValueError(f"Unknown batch key(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(BATCH_KEYS)}, fields")
+        for key in BATCH_KEYS:
+            if not isinstance(lookups.get(key, []), list):
+                raise ValueError(f"'{key}' must be a list")
+        for key in ("instructors", "sections", "courses"):
+            if not all(isinstance(entity_id, str) for entity_id in lookups.get(key, [])):
+                raise ValueError(f"'{key}' must be a list of ID strings")
+        if sum(len(lookups.get(key, [])) for key in BATCH_KEYS) > MAX_BATCH_LOOKUPS:
+            raise ValueError(f"A batch may contain at most {MAX_BATCH_LOOKUPS} lookups")
+        queries = lookups.get("timetable", [])
+        query_types = {"day": (str,), "level": (str, int), "section": (str,)}
+        if not all(isinstance(q, dict) and set(q) <= set(query_types)
+                   and all(isinstance(v, query_types[k]) for k, v in q.items()) for q in queries):
+            raise ValueError("Timetable queries must be objects with optional day, level and section values")
+        fields = parse_fields(lookups.get("fields"), SCHEDULE_FIELDS)
+
+        snapshot = self.snapshot
+        index = snapshot.index
+
+        def entries(positions):
+            return [project(entry, fields) for entry in index.entries(positions)]
+
+        instructors = {}
+        for instructor_id in lookups.get("instructors", []):
+            instructor = index.instructor_by_id.get(instructor_id)
+            if instructor is not None:
+                schedule = entries(index.by_instructor.get(instructor_id, []))
+                instructor = {**instructor, "schedule": schedule, "total_teaching_hours": len(schedule)}
+            instructors[instructor_id] = instructor
+
+        sections = {}
+        for section_id in lookups.get("sections", []):
+            section = index.section_by_id.get(section_id)
+            if section is not None:
+                schedule = entries(index.by_section.get(section_id, []))
+                section = {"section": section, "schedule": schedule, "total_sessions": len(schedule)}
+            sections[section_id] = section
+
+        courses = {}
+        for course_id in lookups.get("courses", []):
+            course = index.course_by_id.get(course_id)
+            if course is not None:
+                schedule = entries(index.by_course.get(course_id, []))
+                course = {"course": course, "schedule": schedule, "total_sessions": len(schedule)}
+            courses[course_id] = course
+
+        timetable = []
+        for query in queries:
+            positions = index.filter_positions(**query)
+            schedule = entries(range(len(index.schedule)) if positions is None else positions)
+            timetable.append({"query": query, "schedule": schedule, "total_entries": len(schedule)})
 
         return {
-            "schedule": schedule,
-            "total_entries": len(schedule)
+            "version": snapshot.version,
+            "instructors": instructors,
+            "sections": sections,
+            "courses": courses,
+            "timetable": timetable
         }
 
+    def get_free_rooms(self, slots=None, day=None, period=None, min_capacity=None, type_of_space=None):
+        """Rooms free in all requested slots (slot IDs and/or day/period), smallest fitting room first"""
+        occupancy = self.snapshot.occupancy
+        try:
+            slot_ids = [int(slot_id) for slot_id in parse_id_list(slots)]
+            period = int(period) if period else None
+            min_capacity = int(min_capacity) if min_capacity else 0
+        except ValueError:
+            raise ValueError("'slots', 'period' and 'min_capacity' must be integers")
+        mask = occupancy.slot_mask(slot_ids, day=day, period=period)
+        if not mask:
+            raise ValueError("Give 'slots' and/or 'day' (optionally with 'period')")
+        return occupancy.free_rooms(mask, min_capacity=min_capacity, type_of_space=type_of_space)
+
+    def get_free_slots(self, instructors=None, sections=None, rooms=None, day=None):
+        """Timeslots in which all given instructors, sections and rooms are free (optionally on one day)"""
+        occupancy = self.snapshot.occupancy
+        instructors, sections, rooms = parse_id_list(instructors), parse_id_list(sections), parse_id_list(rooms)
+        if not (instructors or sections or rooms):
+            raise ValueError("Give at least one of 'instructors', 'sections' or 'rooms'")
+        mask = occupancy.common_free_mask(instructors, sections, rooms)
+        if day:
+            mask &= occupancy.slot_mask(day=day)
+        return occupancy.slots_in(mask)
+
+    def evaluate_moves(self, moves, commit=False):
+        """
+        What-if evaluation of moving sessions to other slots/rooms/instructors (see csp/moves.py).
+        With commit=True a feasible batch is applied, written to the timetable JSON and reloaded.
+        """
+        with self._move_lock:
+            evaluator = self._get_move_evaluator()
+            result = evaluator.evaluate(moves, commit=commit)
+            if result["committed"]:
+                from output.export import save_solution
+                save_solution(evaluator.solution(), evaluator.model_data, self.json_file_path,
+                              store_filename=self.store_file_path)
+                with open(self.json_file_path, 'rb') as f:
+                    # The evaluator already holds the committed state; keep it for the new version
+                    evaluator.version = hashlib.sha1(f.read()).hexdigest()[:16]
+                self.reload(wait=True)
+            return result
+
+    def _get_move_evaluator(self):
+        """The live what-if state for the current snapshot, rebuilt after every reload."""
+        snapshot = self.snapshot
+        if self._move_evaluator is None or self._move_evaluator.version != snapshot.version:
+            from csp.moves import MoveEvaluator
+            model_data = self.model_data
+            if model_data is None:
+                raise RuntimeError("Model data could not be loaded from the CSV files")
+            self._move_evaluator = MoveEvaluator(model_data, list(snapshot.index.schedule), snapshot.version)
+        return self._move_evaluator
+
+    def diff(self, before, after):
+        """
+        What moved between two timetables (see timetable_diff.py). Either side is "current"
+        for the served snapshot or a timetable_data.json/.ttstore path.
+        """
+        from timetable_diff import diff_timetables
+        index = self.snapshot.index
+        return diff_timetables(index if before == "current" else before, index if after == "current" else after)
+
     def get_all_sections(self):
         """Get all sections"""
-        return self.timetable_data.get("sections", [])
+        return list(self.index.sections)
 
     def get_all_rooms(self):
         """Get all rooms"""
-        return self.timetable_data.get("rooms", [])
+        return list(self.timetable_data.get("rooms", []))
 
     def get_metadata(self):
         """Get timetable metadata"""
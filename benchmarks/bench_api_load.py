@@ -0,0 +1,260 @@
+# =====================================
+# benchmarks/bench_api_load.py
+# In-process load test of the Flask API: throughput and latency percentiles per endpoint
+# =====================================
+#
+# Usage: python -m benchmarks.bench_api_load [--instances bundled,s20000] [--concurrency 1,8]
+#            [--requests 2000] [--transport client|wsgi] [--no-cache] [--seed 0] [--out results.json]
+#
+# Instances are "bundled" (Data/timetable_data.json, written by main.py) or "s<sessions>",
+# a synthetic timetable exported to a temporary directory (JSON + store). The app is driven
+# by `concurrency` threads, each sending its share of `requests` drawn from a weighted,
+# seeded mix of timetable filters, instructor/course lookups and list endpoints, so every
+# run sends the same requests. "client" goes through Flask's test client (no sockets);
+# "wsgi" serves the app from a threaded werkzeug server on 127.0.0.1, one connection per
+# request. Both run in this process, so threads share the GIL as in a threaded API worker.
+# --no-cache disables the response cache to measure the lookups themselves.
+
+import argparse
+import contextlib
+import http.client
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+from benchmarks.bench_api_lookups import percentile
+
+BUNDLED_JSON_FILE = "Data/timetable_data.json"
+WARMUP_ROUNDS = 3  # Unmeasured requests per endpoint before each run
+PERCENTILES = (0.50, 0.90, 0.99)
+
+# (endpoint name, weight): roughly what the timetable front end asks for
+REQUEST_MIX = [
+    ("timetable?section", 20),
+    ("timetable?day", 8),
+    ("timetable?level", 8),
+    ("timetable?day&level", 6),
+    ("timetable page", 4),
+    ("instructors/<id>", 16),
+    ("instructors", 3),
+    ("courses/<id>/schedule", 12),
+    ("courses/<id>/details", 8),
+    ("sections", 5),
+    ("rooms", 3),
+    ("levels", 4),
+    ("metadata", 3),
+]
+
+
+def request_factories(data):
+    """endpoint name -> rng -> path, drawing IDs and filters from the served timetable"""
+    days = sorted({entry["day"] for entry in data["schedule"]}) or ["Sunday"]
+    levels = sorted({str(section["level"]) for section in data["sections"]}) or ["1"]
+    section_ids = [section["section_id"] for section in data["sections"]] or ["-"]
+    instructor_ids = [instructor["instructor_id"] for instructor in data["instructors"]] or ["-"]
+    course_ids = [course["course_id"] for course in data["courses"]] or ["-"]
+
+    def query(path, **params):
+        return f"{path}?{urlencode(params)}"
+
+    return {
+        "timetable?section": lambda rng: query("/api/timetable", section=rng.choice(section_ids)),
+        "timetable?day": lambda rng: query("/api/timetable", day=rng.choice(days)),
+        "timetable?level": lambda rng: query("/api/timetable", level=rng.choice(levels)),
+        "timetable?day&level": lambda rng: query("/api/timetable", day=rng.choice(days), level=rng.choice(levels)),
+        "timetable page": lambda rng: query("/api/timetable", limit=100),
+        "instructors/<id>": lambda rng: f"/api/instructors/{rng.choice(instructor_ids)}",
+        "instructors": lambda rng: "/api/instructors",
+        "courses/<id>/schedule": lambda rng: f"/api/courses/{rng.choice(course_ids)}/schedule",
+        "courses/<id>/details": lambda rng: f"/api/courses/{rng.choice(course_ids)}/details",
+        "sections": lambda rng: "/api/sections",
+        "rooms": lambda rng: "/api/rooms",
+        "levels": lambda rng: "/api/levels",
+        "metadata": lambda rng: "/api/metadata",
+    }
+
+
+def plan_requests(factories, total, seed):
+    """The (endpoint, path) sequence of a run; the same seed always gives the same requests."""
+    rng = random.Random(seed)
+    names = [name for name, _ in REQUEST_MIX]
+    weights = [weight for _, weight in REQUEST_MIX]
+    return [(name, factories[name](rng)) for name in rng.choices(names, weights, k=total)]
+
+
+@contextlib.contextmanager
+def transport(app, kind):
+    """Yields get(path) -> status for the calling thread; `wsgi` serves the app for the duration."""
+    if kind == "client":
+        local = threading.local()
+
+        def get(path):
+            if not hasattr(local, "client"):
+                local.client = app.test_client()
+            response = local.client.get(path)
+            response.get_data()  # Streamed bodies are only produced when read
+            return response.status_code
+        yield get
+        return
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass  # One access log line per request would dominate the output
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietRequestHandler)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    def get(path):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=60)
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+    try:
+        yield get
+    finally:
+        server.shutdown()
+        server_thread.join()
+
+
+def run_load(get, planned, concurrency):
+    """Sends the planned requests from `concurrency` threads. Returns (wall seconds, samples per endpoint)."""
+    samples = defaultdict(list)  # endpoint -> [(seconds, status)]
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+
+    def worker(share):
+        local = []
+        start_barrier.wait()
+        for name, path in share:
+            started = time.perf_counter()
+            status = get(path)
+            local.append((name, time.perf_counter() - started, status))
+        with lock:
+            for name, seconds, status in local:
+                samples[name].append((seconds, status))
+
+    threads = [threading.Thread(target=worker, args=(planned[i::concurrency],)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, samples
+
+
+def summarize(wall, samples):
+    endpoints = {}
+    for name, _ in REQUEST_MIX:
+        if not samples.get(name):
+            continue
+        latencies = [seconds for seconds, _ in samples[name]]
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": sum(1 for _, status in samples[name] if status >= 400),
+            "rps": len(latencies) / wall,
+            **{f"p{round(p * 100)}_ms": percentile(latencies, p) * 1000 for p in PERCENTILES},
+            "max_ms": max(latencies) * 1000
+        }
+    everything = [seconds for values in samples.values() for seconds, _ in values]
+    total = {
+        "requests": len(everything),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "rps": len(everything) / wall,
+        **{f"p{round(p * 100)}_ms": percentile(everything, p) * 1000 for p in PERCENTILES},
+        "max_ms": max(everything) * 1000
+    }
+    return {"wall_s": wall, "total": total, "endpoints": endpoints}
+
+
+def print_summary(title, summary):
+    print(f"\n{title}: {summary['total']['requests']} requests in {summary['wall_s']:.2f} s")
+    print(f"{'endpoint':24s} {'requests':>8s} {'errors':>6s} {'req/s':>9s} {'p50 ms':>8s} {'p90 ms':>8s} "
+          f"{'p99 ms':>8s} {'max ms':>8s}")
+    rows = list(summary["endpoints"].items()) + [("all", summary["total"])]
+    for name, row in rows:
+        print(f"{name:24s} {row['requests']:8d} {row['errors']:6d} {row['rps']:9.1f} {row['p50_ms']:8.2f} "
+              f"{row['p90_ms']:8.2f} {row['p99_ms']:8.2f} {row['max_ms']:8.2f}")
+
+
+def serve_instance(api, name, work_dir):
+    """Points the app at the instance's timetable; returns the timetable document."""
+    from api_service import TimetableAPIService
+    if name == "bundled":
+        if not os.path.exists(BUNDLED_JSON_FILE):
+            raise FileNotFoundError(f"{BUNDLED_JSON_FILE} not found: run main.py first")
+        json_file, store_file = BUNDLED_JSON_FILE, None
+    elif name.startswith("s"):
+        from benchmarks.bench_export import synthetic_solution
+        from output.export import save_solution
+        json_file = os.path.join(work_dir, f"{name}.json")
+        store_file = os.path.join(work_dir, f"{name}.ttstore")
+        solution, model_data = synthetic_solution(int(name[1:]))
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_solution(solution, model_data, json_file, store_filename=store_file)
+    else:
+        raise ValueError(f"Unknown instance '{name}': use 'bundled' or 's<sessions>'")
+    with contextlib.redirect_stdout(io.StringIO()):
+        api.service = TimetableAPIService(json_file, api.FILE_PATHS, store_file_path=store_file)
+    api.response_cache.clear()
+    with open(json_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run(instances, concurrency_levels, total_requests, transport_kind, use_cache, seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        import api  # Builds (and reports loading) the default service; replaced per instance below
+    if not use_cache:
+        api.response_cache.max_entries = 0  # Every entry is evicted as soon as it is stored
+    results = {"settings": {"requests": total_requests, "transport": transport_kind, "cache": use_cache,
+                            "seed": seed}, "runs": []}
+    with tempfile.TemporaryDirectory(prefix="bench_api_load_") as work_dir:
+        for name in instances:
+            data = serve_instance(api, name, work_dir)
+            factories = request_factories(data)
+            planned = plan_requests(factories, total_requests, seed)
+            warmup_rng = random.Random(seed - 1)
+            warmup = [(endpoint, factories[endpoint](warmup_rng))
+                      for endpoint, _ in REQUEST_MIX for _ in range(WARMUP_ROUNDS)]
+            with transport(api.app, transport_kind) as get:
+                for concurrency in concurrency_levels:
+                    api.response_cache.clear()
+                    run_load(get, warmup, 1)
+                    wall, samples = run_load(get, planned, concurrency)
+                    summary = summarize(wall, samples)
+                    print_summary(f"{name} ({len(data['schedule'])} sessions), {transport_kind}, "
+                                  f"concurrency {concurrency}, cache {'on' if use_cache else 'off'}", summary)
+                    results["runs"].append({"instance": name, "sessions": len(data["schedule"]),
+                                            "concurrency": concurrency, **summary})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-process API load test with per-endpoint latency percentiles")
+    parser.add_argument("--instances", default="bundled,s20000", help="Comma-separated: bundled and/or s<sessions>")
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated numbers of client threads")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per run, split across the threads")
+    parser.add_argument("--transport", choices=["client", "wsgi"], default="client")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run([name.strip() for name in args.instances.split(",") if name.strip()],
+                  [int(level) for level in args.concurrency.split(",")],
+                  args.requests, args.transport, not args.no_cache, args.seed)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,62 @@
+# =====================================
+# benchmarks/bench_api_lookups.py
+# Per-endpoint latency of TimetableAPIService lookups
+# =====================================
+#
+# Usage: python -m benchmarks.bench_api_lookups [--json Data/timetable_data.json] [--repeat 200]
+
+import argparse
+import time
+from api_service import TimetableAPIService
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def time_calls(func, args_list, repeat):
+    samples = []
+    for i in range(repeat):
+        args = args_list[i % len(args_list)]
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(json_file, file_paths, repeat):
+    service = TimetableAPIService(json_file, file_paths)
+    data = service.timetable_data
+    instructor_ids = [(i["instructor_id"],) for i in data.get("instructors", [])] or [("-",)]
+    course_ids = [(c["course_id"],) for c in data.get("courses", [])] or [("-",)]
+    section_ids = [(None, None, s["section_id"]) for s in data.get("sections", [])] or [(None, None, "-")]
+    days = sorted({(e["day"], None, None) for e in data.get("schedule", [])}) or [("Sunday", None, None)]
+    levels = sorted({(None, str(s["level"]), None) for s in data.get("sections", [])}) or [(None, "1", None)]
+
+    cases = [
+        ("get_all_instructors", service.get_all_instructors, [()]),
+        ("get_instructor_by_id", service.get_instructor_by_id, instructor_ids),
+        ("get_course_schedule", service.get_course_schedule, course_ids),
+        ("get_course_details", service.get_course_details, course_ids),
+        ("get_timetable(section)", service.get_timetable, section_ids),
+        ("get_timetable(day)", service.get_timetable, days),
+        ("get_timetable(level)", service.get_timetable, levels),
+        ("get_timetable()", service.get_timetable, [()]),
+    ]
+    print(f"\n{'lookup':28s} {'p50 (us)':>10s} {'p99 (us)':>10s}")
+    results = {}
+    for name, func, args_list in cases:
+        samples = time_calls(func, args_list, repeat)
+        results[name] = {"p50_us": percentile(samples, 0.50) * 1e6, "p99_us": percentile(samples, 0.99) * 1e6}
+        print(f"{name:28s} {results[name]['p50_us']:10.1f} {results[name]['p99_us']:10.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    from main import FILE_PATHS, OUTPUT_JSON_FILE
+    parser = argparse.ArgumentParser(description="API lookup latency benchmark")
+    parser.add_argument("--json", default=OUTPUT_JSON_FILE)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.json, FILE_PATHS, args.repeat)
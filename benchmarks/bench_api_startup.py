@@ -0,0 +1,56 @@
+# =====================================
+# benchmarks/bench_api_startup.py
+# Cold start time and memory of an API worker process
+# =====================================
+#
+# Usage: python -m benchmarks.bench_api_startup [--runs 5]
+#
+# Every run starts a fresh interpreter that imports `api` (which builds the service)
+# and reports the time until the app is ready to serve, then the extra time the first
+# model_data access costs. Peak RSS is read from the child's rusage.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD_SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+import api
+ready = time.perf_counter()
+rss_ready = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+api.service.model_data
+model_loaded = time.perf_counter()
+print(json.dumps({
+    "ready_s": ready - start,
+    "model_data_s": model_loaded - ready,
+    "rss_ready_mb": rss_ready / 1024,
+    "rss_model_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def run_once(cwd):
+    env = {**os.environ, "PYTHONPATH": cwd}
+    output = subprocess.run([sys.executable, "-c", CHILD_SCRIPT], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(runs, cwd="."):
+    samples = [run_once(cwd) for _ in range(runs)]
+    results = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+    print(f"\nAPI startup over {runs} run(s) (median)")
+    print(f"  ready to serve:           {results['ready_s'] * 1000:8.1f} ms   peak RSS {results['rss_ready_mb']:6.1f} MB")
+    print(f"  first model_data access: +{results['model_data_s'] * 1000:8.1f} ms   peak RSS {results['rss_model_mb']:6.1f} MB")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API worker startup benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    run(args.runs)
@@ -0,0 +1,90 @@
+# =====================================
+# benchmarks/bench_export.py
+# Time and peak memory of the CSV + JSON export on a large synthetic timetable
+# =====================================
+#
+# Usage: python -m benchmarks.bench_export [--sessions 50000] [--seed 0] [--out /tmp/bench_export]
+
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from csp.solver_phase1 import Assignment
+from models.entities import Course, Instructor, Room, Section, TimeSlot
+from models.session import ClassSession
+from output.export import save_solution, save_solution_to_csv, save_solution_to_json
+
+DAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday"]
+PERIODS = [("9:00 AM", "10:30 AM"), ("10:45 AM", "12:15 PM"), ("12:30 PM", "2:00 PM"), ("2:15 PM", "3:45 PM")]
+
+
+def synthetic_solution(num_sessions, seed=0):
+    """
+    A random (not conflict-free) solution and matching model_data of the given size.
+    Export does not look at hard constraints, so this is enough to exercise it.
+    """
+    rng = random.Random(seed)
+    timeslots, slot_id = {}, 0
+    for day in DAYS:
+        for start, end in PERIODS:
+            slot_id += 1
+            timeslots[slot_id] = TimeSlot(slot_id, day, start, end)
+    courses = {f"C{i:05d}": Course(f"C{i:05d}", f"Course {i}", 1, 1, "Classroom")
+               for i in range(max(1, num_sessions // 25))}
+    instructors = {f"P{i:05d}": Instructor(f"P{i:05d}", f"Dr. Instructor {i}", set(rng.sample(list(courses), 1)), {1, 5})
+                   for i in range(max(1, num_sessions // 50))}
+    rooms = {f"R{i:04d}": Room(f"R{i:04d}", rng.choice([25, 50, 75, 120]), rng.choice(["Lab", "Lecture"]), "Classroom")
+             for i in range(max(1, num_sessions // 100))}
+    sections = {f"SEC-{i:05d}": Section(f"SEC-{i:05d}", "CSIT", 1 + i % 4, "Core", 25)
+                for i in range(max(3, num_sessions // 10))}
+
+    course_ids, instructor_list = list(courses), list(instructors.values())
+    room_list, section_list = list(rooms.values()), list(sections.values())
+    solution = []
+    for i in range(num_sessions):
+        session_type = rng.choice(["Lecture", "Lab"])
+        session = ClassSession(f"S{i + 1}", courses[rng.choice(course_ids)], session_type, 1)
+        for section in rng.sample(section_list, 3 if session_type == "Lecture" else 1):
+            session.add_section(section)
+        solution.append(Assignment(session, [rng.randint(1, slot_id)], rng.choice(room_list), rng.choice(instructor_list)))
+
+    model_data = {"courses": courses, "instructors": instructors, "rooms": rooms,
+                  "sections": sections, "timeslots": timeslots}
+    return solution, model_data
+
+
+def measure(label, func):
+    """Wall time of an untraced run, then peak traced allocation of a second run."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:12s} {elapsed * 1000:10.1f} ms   peak {peak / 2 ** 20:8.1f} MB")
+    return {"seconds": elapsed, "peak_bytes": peak}
+
+
+def run(num_sessions, seed, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    solution, model_data = synthetic_solution(num_sessions, seed)
+    csv_file, json_file = os.path.join(out_dir, "timetable.csv"), os.path.join(out_dir, "timetable.json")
+    print(f"\nExporting {num_sessions} synthetic sessions to {out_dir}")
+    results = {
+        "csv": measure("csv", lambda: save_solution_to_csv(solution, model_data, csv_file)),
+        "json": measure("json", lambda: save_solution_to_json(solution, model_data, json_file)),
+        "csv+json": measure("csv+json", lambda: save_solution(solution, model_data, json_file, csv_file)),
+    }
+    print(f"sizes: csv {os.path.getsize(csv_file) / 2 ** 20:.1f} MB, json {os.path.getsize(json_file) / 2 ** 20:.1f} MB")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export benchmark on a synthetic timetable")
+    parser.add_argument("--sessions", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="/tmp/bench_export")
+    args = parser.parse_args()
+    run(args.sessions, args.seed, args.out)
@@ -0,0 +1,192 @@
+# =====================================
+# benchmarks/bench_pipeline.py
+# End-to-end timing of every pipeline stage, compared against a stored baseline
+# =====================================
+#
+# Usage: python -m benchmarks.bench_pipeline [--instances bundled,x1,x2] [--repeat 5] [--iterations 500]
+#            [--baseline benchmarks/baseline.json] [--threshold 0.25] [--out results.json] [--save-baseline]
+#
+# Instances are "bundled" (Data/) or "x<scale>", a synthetic instance from data_loader.generator
+# (seeded, so every run times the same data). Each repeat runs the whole pipeline on fresh
+# objects, once per instance in turn; the fastest and the median time per stage are kept. Phase 2 is reported per
+# iteration. A stage is a regression when its fastest time is more than --threshold slower
+# than the baseline's and at least --min-delta-ms slower in absolute terms, and its median
+# is also more than --threshold slower. A slowdown of the fastest time alone is reported as
+# "noisy": short stages move by 25% from run to run on a busy machine, and a real
+# regression shifts the whole distribution. The exit status is 1 if any stage regressed.
+# Baselines are machine-specific: re-record with --save-baseline after changing hardware.
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from data_loader.generator import generate_instance
+from data_loader.loader import DataLoader
+from models.session import VariableGenerator
+from csp.domain import DomainBuilder
+from csp.solver_phase1 import BacktrackingSolver
+from csp.solver_phase2 import CostEvaluator, IterativeSolver
+from output.export import save_solution_to_csv, save_solution_to_json
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BUNDLED_FILE_PATHS = {
+    "courses": "Data/Courses.csv",
+    "rooms": "Data/Rooms.csv",
+    "instructors": "Data/Instructors.csv",
+    "timeslots": "Data/TimeSlots.csv",
+    "sections": "Data/sections_data.xlsx",
+    "available_courses": "Data/Avilable_Course.csv"
+}
+STAGES = ["load", "variables", "domains", "phase1", "phase2_per_iteration", "export_csv", "export_json"]
+
+
+def run_pipeline(file_paths, iterations, seed, out_dir):
+    """One pass over every stage. Returns ({stage: seconds}, session count); solver output is silenced."""
+    times = {}
+
+    def timed(stage, func):
+        gc.collect()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        times[stage] = time.perf_counter() - start
+        return result
+
+    model_data = timed("load", lambda: DataLoader(file_paths).load_all())
+    if not model_data:
+        raise RuntimeError(f"Could not load the instance {file_paths}")
+    variables = timed("variables", lambda: VariableGenerator(model_data).generate_all_variables())
+    timed("domains", lambda: DomainBuilder(model_data).build_all_domains(variables))
+    solution, state = timed("phase1", lambda: BacktrackingSolver(variables, model_data).solve())
+    if not solution:
+        raise RuntimeError("Phase 1 found no timetable; the instance is too tight to benchmark")
+    optimizer = IterativeSolver(solution, state, CostEvaluator(model_data), model_data, iterations=iterations,
+                                rng=random.Random(seed))
+    solution = timed("phase2_per_iteration", optimizer.optimize)
+    times["phase2_per_iteration"] /= iterations
+    timed("export_csv", lambda: save_solution_to_csv(solution, model_data, os.path.join(out_dir, "timetable.csv")))
+    timed("export_json", lambda: save_solution_to_json(solution, model_data, os.path.join(out_dir, "timetable.json")))
+    return times, len(variables)
+
+
+def instance_file_paths(name, seed, work_dir):
+    if name == "bundled":
+        return BUNDLED_FILE_PATHS
+    if name.startswith("x"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return generate_instance(os.path.join(work_dir, name), scale=float(name[1:]), seed=seed)
+    raise ValueError(f"Unknown instance '{name}': use 'bundled' or 'x<scale>'")
+
+
+def run(instances, repeat, iterations, seed):
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": f"{platform.machine()} {platform.processor() or ''}".strip(),
+        "python": platform.python_version(),
+        "settings": {"repeat": repeat, "iterations": iterations, "seed": seed},
+        "instances": {}
+    }
+    runs = {name: [] for name in instances}
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work_dir:
+        file_paths = {name: instance_file_paths(name, seed, work_dir) for name in instances}
+        # Repeats are interleaved across instances, so a slow spell of the machine costs
+        # every instance a repeat or two instead of all the runs of one instance
+        for i in range(repeat):
+            print(f"Run {i + 1}/{repeat}: {', '.join(instances)}...", flush=True)
+            for name in instances:
+                runs[name].append(run_pipeline(file_paths[name], iterations, seed, work_dir))
+    for name in instances:
+        times = [stage_times for stage_times, _ in runs[name]]
+        results["instances"][name] = {
+            "sessions": runs[name][0][1],
+            "stages": {stage: min(t[stage] for t in times) for stage in STAGES},
+            "medians": {stage: statistics.median(t[stage] for t in times) for stage in STAGES}
+        }
+    return results
+
+
+def compare(results, baseline, threshold, min_delta):
+    """
+    Prints current vs baseline per stage (fastest times, and the change of the medians);
+    returns the regressions as (instance, stage, ratio of the fastest times).
+    """
+    regressions = []
+    print(f"\n{'instance':10s} {'stage':22s} {'baseline':>12s} {'current':>12s} {'change':>8s} {'median':>8s}")
+    for name, current in results["instances"].items():
+        recorded = baseline.get("instances", {}).get(name, {}) if baseline else {}
+        before, medians_before = recorded.get("stages", {}), recorded.get("medians", {})
+        for stage in STAGES:
+            now, then = current["stages"][stage], before.get(stage)
+            if then is None:
+                print(f"{name:10s} {stage:22s} {'-':>12s} {format_seconds(now):>12s}")
+                continue
+            ratio = now / then if then else float("inf")
+            # Baselines recorded before medians were kept are compared on the fastest time alone
+            median_then = medians_before.get(stage)
+            median_ratio = current["medians"][stage] / median_then if median_then else ratio
+            flag = ""
+            if ratio > 1 + threshold and now - then >= min_delta:
+                if median_ratio > 1 + threshold:
+                    regressions.append((name, stage, ratio))
+                    flag = "  REGRESSION"
+                else:
+                    flag = "  noisy"
+            elif ratio < 1 - threshold and then - now >= min_delta and median_ratio < 1 - threshold:
+                flag = "  faster"
+            median_change = f"{(median_ratio - 1) * 100:+7.1f}%" if median_then else f"{'-':>8s}"
+            print(f"{name:10s} {stage:22s} {format_seconds(then):>12s} {format_seconds(now):>12s} "
+                  f"{(ratio - 1) * 100:+7.1f}% {median_change}{flag}")
+    return regressions
+
+
+def format_seconds(seconds):
+    return f"{seconds * 1000:.1f} ms" if seconds >= 0.001 else f"{seconds * 1e6:.1f} us"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark with baseline comparison")
+    parser.add_argument("--instances", default="bundled,x1,x2", help="Comma-separated: bundled and/or x<scale>")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=500, help="Phase 2 iterations per run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown (of both the fastest and the median time) flagged as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore smaller absolute slowdowns")
+    parser.add_argument("--out", help="Also write the results to this JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    args = parser.parse_args()
+
+    results = run([name.strip() for name in args.instances.split(",") if name.strip()],
+                  args.repeat, args.iterations, args.seed)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != results["settings"]:
+            print(f"Warning: baseline settings {baseline.get('settings')} differ from this run's; "
+                  "per-stage times may not be comparable.")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms / 1000)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nSaved baseline to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    elif baseline:
+        print("\nNo regressions")
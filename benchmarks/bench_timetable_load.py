@@ -0,0 +1,78 @@
+# =====================================
+# benchmarks/bench_timetable_load.py
+# Load time and resident memory of the API snapshot: JSON vs binary store
+# =====================================
+#
+# Usage: python -m benchmarks.bench_timetable_load [--sessions 50000] [--runs 3]
+#        python -m benchmarks.bench_timetable_load --json Data/timetable_data.json
+#
+# With --sessions, a synthetic timetable is exported (JSON + store) to a temporary
+# directory first. Every measurement runs in a fresh interpreter; resident memory is read
+# from /proc (Linux), and for the store includes the pages of the shared mapping it touched.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CHILD_SCRIPT = """
+import json, os, sys, time
+from api_service import TimetableSnapshot
+mode, json_file, store_file = sys.argv[1:4]
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+rss_before = rss_mb()
+start = time.perf_counter()
+if mode == "json":
+    snapshot = TimetableSnapshot.from_file(json_file)
+else:
+    snapshot = TimetableSnapshot.from_store(json_file, store_file)
+elapsed = time.perf_counter() - start
+print(json.dumps({"load_s": elapsed, "rss_delta_mb": rss_mb() - rss_before,
+                  "entries": len(snapshot.index.schedule)}))
+"""
+
+
+def run_once(mode, json_file, store_file):
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", CHILD_SCRIPT, mode, json_file, store_file],
+                            cwd=cwd, env={**os.environ, "PYTHONPATH": cwd},
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(json_file, store_file, runs):
+    results = {}
+    print(f"\n{'format':8s} {'load (ms)':>10s} {'RSS +MB':>9s}   ({os.path.getsize(json_file) / 2 ** 20:.1f} MB JSON, "
+          f"{os.path.getsize(store_file) / 2 ** 20:.1f} MB store)")
+    for mode in ("json", "store"):
+        samples = [run_once(mode, json_file, store_file) for _ in range(runs)]
+        results[mode] = {key: statistics.median(s[key] for s in samples) for key in ("load_s", "rss_delta_mb")}
+        print(f"{mode:8s} {results[mode]['load_s'] * 1000:10.1f} {results[mode]['rss_delta_mb']:9.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Timetable load benchmark: JSON vs binary store")
+    parser.add_argument("--json", help="Existing timetable JSON (its store is compiled next to it if missing)")
+    parser.add_argument("--sessions", type=int, default=50000, help="Size of the synthetic timetable")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.json:
+        json_file = args.json
+        store_file = os.path.splitext(json_file)[0] + ".ttstore"
+        run_once("store", json_file, store_file)  # Compile the store if missing or stale
+        run(json_file, store_file, args.runs)
+    else:
+        from benchmarks.bench_export import synthetic_solution
+        from output.export import save_solution
+        with tempfile.TemporaryDirectory(prefix="bench_load_") as out_dir:
+            json_file, store_file = os.path.join(out_dir, "timetable.json"), os.path.join(out_dir, "timetable.ttstore")
+            solution, model_data = synthetic_solution(args.sessions)
+            save_solution(solution, model_data, json_file, store_filename=store_file)
+            run(json_file, store_file, args.runs)
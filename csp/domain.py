@@ -3,6 +3,9 @@
 # Domain generation for CSP variables
 # =====================================
 
+from csp.stats import SolverStats
+from models.entities import EXCLUDED_LECTURE_SPACES
+
 
 class Domain:
     def __init__(self, session_variable, model_data):
@@ -28,9 +31,12 @@ class Domain:
                     sequences.append(sequence)
         return sequences
 
+    # Rooms and instructors are kept in ID order: equally good values are then tried in the
+    # same order whatever the row order of the input files
+
     def _filter_rooms(self, session, all_rooms):
-        valid_rooms, EXCLUDED_LECTURE_SPACES = [], {'Drawing Studio', 'Computer'}
-        for room in all_rooms.values():
+        valid_rooms = []
+        for room in sorted(all_rooms.values(), key=lambda r: r.room_id):
             if room.capacity < session.total_student_count: continue
             if session.session_type == 'Lab':
                 if room.type_of_space != session.course.lab_type: continue
@@ -42,7 +48,8 @@ class Domain:
 
     def _filter_instructors(self, session, all_instructors):
         course_id = session.course.course_id
-        return [inst for inst in all_instructors.values() if course_id in inst.qualified_courses]
+        return sorted((inst for inst in all_instructors.values() if course_id in inst.qualified_courses),
+                      key=lambda inst: inst.instructor_id)
 
     def __repr__(self):
         return (f"Domain for {self.variable.session_id}: "
@@ -50,17 +57,20 @@ class Domain:
 
 
 class DomainBuilder:
-    def __init__(self, model_data):
+    def __init__(self, model_data, stats=None):
         self.model_data = model_data
+        self.stats = stats if stats is not None else SolverStats()
 
     def build_all_domains(self, variables):
         print(f"\n--- Starting Domain Generation for {len(variables)} variables ---")
         unsolvable_count = 0
-        for var in variables:
-            var.domain = Domain(var, self.model_data)
-            if not var.domain.timeslot_sequences or not var.domain.rooms or not var.domain.instructors:
-                unsolvable_count += 1
-                if unsolvable_count < 10: print(f"--- FATAL WARNING: {var!r} has an empty domain.")
+        with self.stats.phase("domains"):
+            for var in variables:
+                var.domain = Domain(var, self.model_data)
+                if not var.domain.timeslot_sequences or not var.domain.rooms or not var.domain.instructors:
+                    unsolvable_count += 1
+                    if unsolvable_count < 10: print(f"--- FATAL WARNING: {var!r} has an empty domain.")
+        self.stats.add(domains_built=len(variables), domains_empty=unsolvable_count)
         if unsolvable_count > 0:
             print(f"--- Domain Generation Complete with {unsolvable_count} UNSOLVABLE variables. ---")
         else:
@@ -0,0 +1,109 @@
+# =====================================
+# csp/feasibility.py
+# Pre-solve feasibility analysis
+# =====================================
+
+import time
+from collections import defaultdict
+from csp.utils import CapacitatedMatching
+
+
+class FeasibilityReport:
+    def __init__(self):
+        self.issues = []    # (check, message)
+        self.timings = {}   # check -> seconds
+
+    @property
+    def is_feasible(self):
+        return not self.issues
+
+    def add(self, check, message):
+        self.issues.append((check, message))
+
+    def __str__(self):
+        total = sum(self.timings.values())
+        if self.is_feasible:
+            return f"Feasibility checks passed ({len(self.timings)} checks in {total * 1000:.1f} ms)."
+        lines = [f"Feasibility checks FAILED with {len(self.issues)} issue(s) ({total * 1000:.1f} ms):"]
+        lines += [f"  - [{check}] {message}" for check, message in self.issues]
+        return "\n".join(lines)
+
+
+class FeasibilityAnalyzer:
+    """
+    Aggregate counting checks that prove an instance infeasible before any search.
+
+    Every check is a necessary condition only: passing them does not guarantee that the
+    BacktrackingSolver finds a solution, but failing one means it never will.
+    The resource checks are Hall-condition bounds computed with a capacitated bipartite
+    matching of sessions (demand = duration in slots) against instructors or rooms
+    (capacity = number of timeslots in the week).
+    """
+
+    MAX_LISTED = 8
+
+    def __init__(self, variables, model_data):
+        self.variables = variables
+        self.model_data = model_data
+        self.slot_count = len(model_data['timeslots'])
+
+    def analyze(self):
+        report = FeasibilityReport()
+        for check in (self._check_empty_domains, self._check_section_load,
+                      self._check_instructor_matching, self._check_room_matching):
+            start_time = time.perf_counter()
+            check(report)
+            report.timings[check.__name__[len('_check_'):]] = time.perf_counter() - start_time
+        return report
+
+    def _describe(self, items):
+        items = sorted(items)
+        shown = ", ".join(items[:self.MAX_LISTED])
+        return shown + (f" (+{len(items) - self.MAX_LISTED} more)" if len(items) > self.MAX_LISTED else "")
+
+    def _check_empty_domains(self, report):
+        for var in self.variables:
+            d = var.domain
+            empty = [name for name, values in (("timeslots", d.timeslot_sequences), ("rooms", d.rooms),
+                                               ("instructors", d.instructors)) if not values]
+            if empty:
+                report.add("empty_domain", f"{var!r} has no valid {', '.join(empty)}")
+
+    def _check_section_load(self, report):
+        load = defaultdict(int)
+        for var in self.variables:
+            for section in var.sections:
+                load[section.section_id] += var.duration_slots
+        for section_id, slots in sorted(load.items()):
+            if slots > self.slot_count:
+                report.add("section_load", f"section {section_id} needs {slots} slots but the week has {self.slot_count}")
+
+    def _check_instructor_matching(self, report):
+        self._check_matching(report, "instructor_capacity", "instructors",
+                             lambda var: [inst.instructor_id for inst in var.domain.instructors],
+                             [inst.instructor_id for inst in self.model_data['instructors'].values()])
+
+    def _check_room_matching(self, report):
+        self._check_matching(report, "room_capacity", "rooms",
+                             lambda var: [room.room_id for room in var.domain.rooms],
+                             [room.room_id for room in self.model_data['rooms'].values()])
+
+    def _check_matching(self, report, check, resource_name, resources_of, all_resources):
+        sessions = {var.session_id: var for var in self.variables if var.domain and resources_of(var)}
+        # Most constrained sessions first so that violators are reported on the tightest resources
+        ordered = sorted(sessions.values(), key=lambda v: (len(resources_of(v)), v.session_id))
+        matching = CapacitatedMatching(
+            {var.session_id: var.duration_slots for var in ordered},
+            {var.session_id: resources_of(var) for var in ordered},
+            dict.fromkeys(all_resources, self.slot_count)).solve()
+
+        seen = set()
+        for left_set, right_set in matching.hall_violators:
+            key = frozenset(right_set)
+            if key in seen: continue
+            seen.add(key)
+            demand = sum(sessions[s].duration_slots for s in left_set)
+            courses = {f"{sessions[s].session_type[:3].upper()}-{sessions[s].course.course_id}" for s in left_set}
+            report.add(check, f"{len(left_set)} session(s) ({self._describe(courses)}) need {demand} slot-hours "
+                              f"but can only use {len(right_set)} {resource_name} ({self._describe(right_set)}) "
+                              f"offering {len(right_set) * self.slot_count} slot-hours")
@@ -0,0 +1,216 @@
+# =====================================
+# csp/moves.py
+# What-if evaluation of manual moves on an existing timetable
+# =====================================
+
+import threading
+from collections import defaultdict
+from csp.domain import DomainBuilder
+from csp.repair import match_previous_assignments, resolve_entry
+from csp.solver_phase1 import Assignment, TimetableState
+from csp.solver_phase2 import IncrementalCostEvaluator
+from models.session import VariableGenerator, session_key
+
+
+def describe_session(session):
+    return {
+        "course_id": session.course.course_id,
+        "session_type": session.session_type,
+        "sections": [section.section_id for section in session.sections]
+    }
+
+
+def describe_assignment(assignment):
+    return {
+        "timeslot_ids": list(assignment.timeslot_sequence),
+        "room_id": assignment.room.room_id,
+        "instructor_id": assignment.instructor.instructor_id
+    }
+
+
+class MoveEvaluator:
+    """
+    Loads a timetable's schedule entries into a live TimetableState and evaluates
+    proposed moves against it: hard-constraint conflicts plus the soft cost delta,
+    computed from the moved sessions only (IncrementalCostEvaluator).
+
+    A move names a session by {"course_id", "session_type", "sections"} and gives any of
+    "timeslot_ids", "room_id" and "instructor_id" to change. The moves of a batch are
+    applied together, so two sessions can swap slots or rooms in one call.
+
+    Lectures keep the section groups of the entries, whatever grouping produced them.
+    Entries that match no session of the model, or whose room or instructor no longer
+    exists, are kept in `unmatched_entries`; moves can still be evaluated, but not
+    committed, since the saved timetable would silently lose those entries.
+    """
+
+    def __init__(self, model_data, schedule_entries, version=None):
+        self.model_data = model_data
+        self.version = version  # Version of the timetable the entries came from
+
+        lecture_groups = defaultdict(list)
+        for entry in schedule_entries:
+            if entry["session_type"] == "Lecture":
+                lecture_groups[entry["course_id"]].append(entry["sections"])
+        variables = VariableGenerator(model_data, fixed_lecture_groups=lecture_groups).generate_all_variables()
+        DomainBuilder(model_data).build_all_domains(variables)
+        matches, self.unmatched_entries = match_previous_assignments(variables, schedule_entries)
+
+        self.state = TimetableState(model_data)
+        self.assignments = {}  # session key -> current Assignment
+        for var, entry in matches.values():
+            time_seq, room, inst = resolve_entry(entry, model_data)
+            if room is None or inst is None:
+                self.unmatched_entries.append(entry)
+                continue
+            assignment = Assignment(var, time_seq, room, inst)
+            self.state.add_assignment(assignment)
+            self.assignments[var.get_key()] = assignment
+        if self.unmatched_entries:
+            print(f"Warning: {len(self.unmatched_entries)} schedule entries do not match a session, room or "
+                  "instructor; moves cannot be committed until the timetable is regenerated.")
+
+        self.evaluator = IncrementalCostEvaluator(model_data)
+        self.cost = self.evaluator.calculate_total_cost(self.solution(), self.state)
+        self.lock = threading.Lock()
+
+    def solution(self):
+        return list(self.assignments.values())
+
+    def evaluate(self, moves, commit=False):
+        """
+        Evaluates a batch of moves. Returns a dict with "feasible", "conflicts", "cost_before",
+        "cost_after", "delta" and "committed". With commit=True a feasible batch is applied,
+        unless there are unmatched entries: these are returned as an "unmatched_entries" conflict.
+        Raises ValueError for malformed moves or unknown sessions, rooms or instructors.
+        """
+        with self.lock:
+            old, new = self._parse_moves(moves)
+            delta = self.evaluator.delta(self.state, old, new)
+
+            for assignment in old:
+                self.state.remove_assignment(assignment)
+            conflicts, added = [], []
+            for i, assignment in enumerate(new):
+                move_conflicts = self._conflicts(i, assignment, added, old)
+                conflicts += move_conflicts
+                # Only conflict-free assignments enter the state, so rolling back stays exact
+                if not move_conflicts:
+                    self.state.add_assignment(assignment)
+                    added.append(assignment)
+            if commit and self.unmatched_entries:
+                conflicts.append({"move": None, "type": "unmatched_entries",
+                                  "message": f"{len(self.unmatched_entries)} entries of the timetable match no "
+                                             "session, room or instructor and would be lost by committing",
+                                  "entries": self.unmatched_entries})
+
+            feasible = not conflicts
+            committed = feasible and commit
+            if committed:
+                for assignment in new:
+                    self.assignments[assignment.session.get_key()] = assignment
+                self.cost += delta
+            else:
+                for assignment in added:
+                    self.state.remove_assignment(assignment)
+                for assignment in old:
+                    self.state.add_assignment(assignment)
+
+            return {
+                "moves": [{"session": describe_session(o.session),
+                           "from": describe_assignment(o), "to": describe_assignment(n)}
+                          for o, n in zip(old, new)],
+                "feasible": feasible,
+                "conflicts": conflicts,
+                "cost_before": self.cost - delta if committed else self.cost,
+                "cost_after": self.cost if committed else self.cost + delta,
+                "delta": delta,
+                "committed": committed
+            }
+
+    # ---------- Helpers ----------
+
+    def _parse_moves(self, moves):
+        if isinstance(moves, dict):
+            moves = [moves]
+        if not isinstance(moves, list) or not moves:
+            raise ValueError("'moves' must be a move object or a non-empty list of them")
+
+        old, new, seen = [], [], set()
+        for i, move in enumerate(moves):
+            if not isinstance(move, dict) or not isinstance(move.get("sections"), list):
+                raise ValueError(f"Move {i}: give course_id, session_type and a list of sections")
+            if not (isinstance(move.get("course_id"), str) and isinstance(move.get("session_type"), str)
+                    and all(isinstance(section_id, str) for section_id in move["sections"])):
+                raise ValueError(f"Move {i}: course_id, session_type and the sections must be strings")
+            for field in ("room_id", "instructor_id"):
+                if field in move and not isinstance(move[field], str):
+                    raise ValueError(f"Move {i}: '{field}' must be a string")
+            key = session_key(move.get("course_id"), move.get("session_type"), move["sections"])
+            current = self.assignments.get(key)
+            if current is None:
+                raise ValueError(f"Move {i}: no scheduled {move.get('session_type')} of "
+                                 f"{move.get('course_id')} for sections {', '.join(move['sections'])}")
+            if key in seen:
+                raise ValueError(f"Move {i}: the session is moved twice in one batch")
+            seen.add(key)
+
+            time_seq = move.get("timeslot_ids", current.timeslot_sequence)
+            if (not isinstance(time_seq, list) or not time_seq
+                    or not all(type(slot_id) is int for slot_id in time_seq)):
+                raise ValueError(f"Move {i}: 'timeslot_ids' must be a non-empty list of slot IDs")
+            if len(set(time_seq)) != len(time_seq):
+                raise ValueError(f"Move {i}: 'timeslot_ids' lists a slot more than once")
+            unknown = [slot_id for slot_id in time_seq if slot_id not in self.model_data['timeslots']]
+            if unknown:
+                raise ValueError(f"Move {i}: unknown timeslot(s) {', '.join(map(str, unknown))}")
+            room = self.model_data['rooms'].get(move.get("room_id", current.room.room_id))
+            if room is None:
+                raise ValueError(f"Move {i}: unknown room '{move.get('room_id')}'")
+            inst = self.model_data['instructors'].get(move.get("instructor_id", current.instructor.instructor_id))
+            if inst is None:
+                raise ValueError(f"Move {i}: unknown instructor '{move.get('instructor_id')}'")
+
+            old.append(current)
+            new.append(Assignment(current.session, list(time_seq), room, inst))
+        return old, new
+
+    def _conflicts(self, i, assignment, added, moved):
+        """Hard-constraint violations of `assignment` against the state (which excludes `moved`)."""
+        session, domain = assignment.session, assignment.session.domain
+        conflicts = []
+        if assignment.timeslot_sequence not in domain.timeslot_sequences:
+            conflicts.append({"move": i, "type": "timeslots_not_allowed",
+                              "message": f"Needs {session.duration_slots} consecutive slot(s) on one day"})
+        if assignment.room not in domain.rooms:
+            conflicts.append({"move": i, "type": "room_not_suitable",
+                              "message": f"Room {assignment.room.room_id} does not fit this session's size or type"})
+        if assignment.instructor not in domain.instructors:
+            conflicts.append({"move": i, "type": "instructor_not_qualified",
+                              "message": f"{assignment.instructor.instructor_id} is not qualified for {session.course.course_id}"})
+
+        state = self.state
+        for slot_id in assignment.timeslot_sequence:
+            clashes = []
+            if slot_id in state.instructor_schedule[assignment.instructor.instructor_id]:
+                clashes.append(("instructor_clash", lambda a: a.instructor is assignment.instructor))
+            if slot_id in state.room_schedule[assignment.room.room_id]:
+                clashes.append(("room_clash", lambda a: a.room is assignment.room))
+            section_ids = {section.section_id for section in session.sections}
+            if any(slot_id in state.section_schedule[section_id] for section_id in section_ids):
+                clashes.append(("section_clash",
+                                lambda a: any(section.section_id in section_ids for section in a.session.sections)))
+            for clash_type, involves in clashes:
+                other = self._occupant(slot_id, involves, added, moved)
+                conflicts.append({"move": i, "type": clash_type, "slot_id": slot_id,
+                                  "with": describe_session(other.session) if other else None})
+        return conflicts
+
+    def _occupant(self, slot_id, involves, added, moved):
+        """The assignment occupying `slot_id` that `involves` matches (only called for clashes)."""
+        moved_ids = {id(a) for a in moved}
+        candidates = [a for a in self.assignments.values() if id(a) not in moved_ids] + added
+        for assignment in candidates:
+            if slot_id in assignment.timeslot_sequence and involves(assignment):
+                return assignment
+        return None
@@ -0,0 +1,182 @@
+# =====================================
+# csp/repair.py
+# Incremental repair of a previous timetable
+# =====================================
+
+import json
+import time
+from collections import defaultdict
+from csp.solver_phase1 import Assignment, BacktrackingSolver, TimetableState
+from models.session import session_key
+
+
+def load_previous_schedule(filename):
+    """Reads the schedule entries of a previously exported timetable_data.json."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f).get("schedule", [])
+
+
+def match_previous_assignments(variables, schedule_entries):
+    """
+    Pairs every variable with the previous schedule entry that has the same session key.
+    Returns (matches, unmatched_entries) where matches maps session_id -> (variable, entry).
+    """
+    entries_by_key = defaultdict(list)
+    for entry in schedule_entries:
+        entries_by_key[session_key(entry["course_id"], entry["session_type"], entry["sections"])].append(entry)
+
+    matches = {}
+    for var in variables:
+        candidates = entries_by_key.get(var.get_key())
+        if candidates:
+            matches[var.session_id] = (var, candidates.pop(0))
+
+    unmatched_entries = [e for entries in entries_by_key.values() for e in entries]
+    return matches, unmatched_entries
+
+
+def resolve_entry(entry, model_data):
+    """
+    Turns a schedule entry into (timeslot_sequence, room, instructor) objects of the new model.
+    A dropped instructor or room simply resolves to None.
+    """
+    room = model_data['rooms'].get(entry["room_id"])
+    instructor = model_data['instructors'].get(entry["instructor_id"])
+    return list(entry["timeslot_ids"]), room, instructor
+
+
+class _SeededBacktrackingSolver(BacktrackingSolver):
+    """BacktrackingSolver that starts from a partially filled state and tries previous values first."""
+
+    def __init__(self, variables, model_data, state, previous_values, stats=None):
+        super().__init__(variables, model_data, stats)
+        self.state = state
+        self.previous_values = previous_values
+
+    def get_ordered_domain_values(self, var):
+        values = super().get_ordered_domain_values(var)
+        previous = self.previous_values.get(var.session_id)
+        if previous is None:
+            return values
+        # Stable sort: the previous assignment (if still in the domain) is tried first
+        return sorted(values, key=lambda v: (v[0], v[1], v[2]) != previous)
+
+
+class RepairSolver:
+    """
+    Repairs a previous timetable after the input data changed.
+
+    Every previous assignment that is still valid against the new model is kept.
+    Only the invalidated sessions plus a neighborhood around them (sessions that share
+    a section or a candidate instructor, `neighborhood_depth` hops away) are handed to
+    the BacktrackingSolver. If that fails the neighborhood is widened one hop at a time,
+    up to a full re-solve. Previous values are always tried first.
+    """
+
+    def __init__(self, variables, model_data, previous_schedule, neighborhood_depth=0, max_depth=3, stats=None):
+        self.variables = list(variables)
+        self.stats = stats  # Shared by every re-solve attempt
+        self.model_data = model_data
+        self.previous_schedule = previous_schedule
+        self.neighborhood_depth = neighborhood_depth
+        self.max_depth = max_depth
+        self.report = {}
+
+    def solve(self):
+        print("\n--- Repair Solver Starting ---")
+        start_time = time.time()
+
+        matches, removed_entries = match_previous_assignments(
+            self.variables, self.previous_schedule)
+        previous_values = {}
+        kept, invalid = [], []
+        state = TimetableState(self.model_data)
+
+        for var in self.variables:
+            if var.session_id not in matches:
+                invalid.append(var)
+                continue
+            time_seq, room, inst = resolve_entry(matches[var.session_id][1], self.model_data)
+            if room is not None and inst is not None:
+                previous_values[var.session_id] = (time_seq, room, inst)
+            if (room in var.domain.rooms and inst in var.domain.instructors and
+                    time_seq in var.domain.timeslot_sequences and
+                    state.is_consistent(var, time_seq, room, inst)):
+                assignment = Assignment(var, time_seq, room, inst)
+                state.add_assignment(assignment)
+                kept.append(assignment)
+            else:
+                invalid.append(var)
+
+        print(f"Kept {len(kept)} assignments, {len(invalid)} sessions invalidated.")
+
+        solution = kept
+        depth = self.neighborhood_depth
+        while invalid:
+            freed = self._neighborhood(invalid, kept, depth) if depth <= self.max_depth else list(kept)
+            label = f"depth {depth}" if depth <= self.max_depth else "full re-solve"
+            print(f"Re-solving {len(invalid)} invalidated + {len(freed)} neighboring sessions ({label})...")
+
+            attempt_state = TimetableState(self.model_data)
+            freed_ids = {id(a) for a in freed}
+            locked = [a for a in kept if id(a) not in freed_ids]
+            for assignment in locked:
+                attempt_state.add_assignment(assignment)
+
+            solver = _SeededBacktrackingSolver(
+                invalid + [a.session for a in freed], self.model_data, attempt_state, previous_values, self.stats)
+            partial_solution, partial_state = solver.solve()
+            if partial_solution is not None:
+                solution, state = locked + partial_solution, partial_state
+                break
+            if depth > self.max_depth:
+                print("FAILURE: Repair could not find a valid timetable.")
+                return None, None
+            depth += 1
+
+        self.report = self._build_report(solution, matches, removed_entries, len(kept), time.time() - start_time)
+        print(f"--- Repair Finished in {self.report['elapsed_seconds']:.2f} seconds: "
+              f"{self.report['changed']} changed, {self.report['added']} added, "
+              f"{self.report['removed']} removed, {self.report['unchanged']} unchanged ---")
+        return solution, state
+
+    def _neighborhood(self, invalid, kept, depth):
+        """Kept assignments within `depth` hops of an invalidated session."""
+        frontier, freed, freed_ids = list(invalid), [], set()
+        for _ in range(depth):
+            sections = {sec.section_id for var in frontier for sec in var.sections}
+            instructors = {inst.instructor_id for var in frontier for inst in var.domain.instructors}
+            next_frontier = []
+            for assignment in kept:
+                if id(assignment) in freed_ids:
+                    continue
+                if (assignment.instructor.instructor_id in instructors or
+                        any(sec.section_id in sections for sec in assignment.session.sections)):
+                    freed_ids.add(id(assignment))
+                    freed.append(assignment)
+                    next_frontier.append(assignment.session)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return freed
+
+    def _build_report(self, solution, matches, removed_entries, kept_count, elapsed):
+        changed = added = 0
+        for assignment in solution:
+            match = matches.get(assignment.session.session_id)
+            if match is None:
+                added += 1
+                continue
+            entry = match[1]
+            if (list(entry["timeslot_ids"]) != list(assignment.timeslot_sequence) or
+                    entry["room_id"] != assignment.room.room_id or
+                    entry["instructor_id"] != assignment.instructor.instructor_id):
+                changed += 1
+        return {
+            "kept": kept_count,
+            "changed": changed,
+            "added": added,
+            "removed": len(removed_entries),
+            "unchanged": len(solution) - changed - added,
+            "elapsed_seconds": elapsed,
+        }
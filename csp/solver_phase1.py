@@ -5,6 +5,7 @@
 
 from dataclasses import dataclass
 import time
+from csp.stats import SolverStats
 
 
 @dataclass
@@ -57,19 +58,25 @@ class TimetableState:
 
 
 class BacktrackingSolver:
-    def __init__(self, variables, model_data):
+    def __init__(self, variables, model_data, stats=None):
         self.unassigned_variables = list(variables)
         self.state = TimetableState(model_data)
         self.solution = []
         self.model_data = model_data  # Save for LCV
+        self.stats = stats if stats is not None else SolverStats()
+        # Search counters, added to self.stats when the search ends
+        self.nodes = self.consistency_checks = self.backtracks = 0
+        # MRV ties are broken by the session key, so the search order never depends on input order
+        self.tie_breaks = {var.session_id: var.get_key() for var in self.unassigned_variables}
 
     def solve(self):
         print("\n--- Phase 1: Backtracking Solver Starting ---")
         start_time = time.time()
 
-        self.unassigned_variables.sort(key=self.get_domain_size)
-
-        solution_found = self.recursive_solve()
+        with self.stats.phase("phase1"):
+            self.unassigned_variables.sort(key=self.variable_order)
+            solution_found = self.recursive_solve()
+        self.record_search()
 
         end_time = time.time()
         print(f"--- Solver Finished in {end_time - start_time:.2f} seconds ---")
@@ -82,14 +89,23 @@ class BacktrackingSolver:
             print("FAILURE: Could not find a valid solution.")
             return None, None
 
+    def record_search(self):
+        self.stats.add(phase1_nodes=self.nodes, phase1_consistency_checks=self.consistency_checks,
+                       phase1_backtracks=self.backtracks)
+        self.nodes = self.consistency_checks = self.backtracks = 0
+
     def get_domain_size(self, var):
         d = var.domain
         return len(d.timeslot_sequences) * len(d.rooms) * len(d.instructors)
 
+    def variable_order(self, var):
+        """MRV sort key: smallest domain first, ties by session key."""
+        return self.get_domain_size(var), self.tie_breaks[var.session_id]
+
     def select_variable_mrv(self):
         # A more dynamic MRV: re-sort the list and pick the best one
         # This is slower but more accurate
-        self.unassigned_variables.sort(key=self.get_domain_size)
+        self.unassigned_variables.sort(key=self.variable_order)
         return self.unassigned_variables.pop(0)
 
     def get_ordered_domain_values(self, var):
@@ -104,30 +120,34 @@ class BacktrackingSolver:
                     all_combinations.append((time_seq, room, inst))
 
         # --- LCV / Soft Constraint Heuristic ---
-        # We calculate a "penalty" for each choice.
         # Choices with LOWER penalty are tried FIRST.
         def calculate_penalty(value_tuple):
             time_seq, room, inst = value_tuple
-            penalty = 0
+            return self.value_penalty(var, time_seq, inst)
+
+        # Sort combinations: lowest penalty score first. The sort is stable, so ties keep
+        # the domain order (timeslot, then room ID, then instructor ID)
+        all_combinations.sort(key=calculate_penalty)
+        return all_combinations
 
-            # 1. Penalty for Not Preferred Slot
-            for slot_id in time_seq:
-                if slot_id in inst.not_preferred_slots:
-                    penalty += 10  # High penalty
+    def value_penalty(self, var, time_seq, inst):
+        """Soft-constraint "penalty" of assigning (time_seq, inst) to var, used for LCV ordering."""
+        penalty = 0
 
-            # 2. Penalty for Not Preferred Instructor
-            if inst.instructor_id not in var.preferred_instructors and var.preferred_instructors:
-                penalty += 5  # Medium penalty
+        # 1. Penalty for Not Preferred Slot
+        for slot_id in time_seq:
+            if slot_id in inst.not_preferred_slots:
+                penalty += 10  # High penalty
 
-            # 3. Reward for Preferred Instructor (negative penalty)
-            if inst.instructor_id in var.preferred_instructors:
-                penalty -= 20  # Strong reward
+        # 2. Penalty for Not Preferred Instructor
+        if inst.instructor_id not in var.preferred_instructors and var.preferred_instructors:
+            penalty += 5  # Medium penalty
 
-            return penalty
+        # 3. Reward for Preferred Instructor (negative penalty)
+        if inst.instructor_id in var.preferred_instructors:
+            penalty -= 20  # Strong reward
 
-        # Sort combinations: lowest penalty score first
-        all_combinations.sort(key=calculate_penalty)
-        return all_combinations
+        return penalty
 
     def recursive_solve(self):
         if not self.unassigned_variables:
@@ -135,8 +155,10 @@ class BacktrackingSolver:
 
         # Use simple pop(0) after initial sort for speed
         var = self.unassigned_variables.pop(0)
+        self.nodes += 1
 
         for time_seq, room, inst in self.get_ordered_domain_values(var):
+            self.consistency_checks += 1
             if self.state.is_consistent(var, time_seq, room, inst):
                 assignment = Assignment(var, time_seq, room, inst)
                 self.state.add_assignment(assignment)
@@ -147,6 +169,7 @@ class BacktrackingSolver:
 
                 self.solution.pop()
                 self.state.remove_assignment(assignment)
+                self.backtracks += 1
 
         self.unassigned_variables.insert(0, var)
         return False
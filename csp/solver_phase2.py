@@ -7,13 +7,15 @@ import random
 import time
 import copy
 from csp.solver_phase1 import Assignment
+from csp.stats import SolverStats
 
 
 class CostEvaluator:
     """Calculates the total penalty ('cost') of a complete solution."""
 
-    def __init__(self, model_data):
+    def __init__(self, model_data, stats=None):
         self.model_data = model_data
+        self.stats = stats if stats is not None else SolverStats()
         # Pre-build day-to-slots map for gap calculation
         self.slots_by_day = {}
         for slot in model_data['timeslots'].values():
@@ -24,32 +26,45 @@ class CostEvaluator:
             self.slots_by_day[day].sort()
 
     def calculate_total_cost(self, solution, state):
+        start = time.perf_counter()
         total_penalty = 0
 
         # 1. Instructor Preference Penalties
         for assignment in solution:
-            inst = assignment.instructor
-            # A. Not Preferred Slot
-            for slot_id in assignment.timeslot_sequence:
-                if slot_id in inst.not_preferred_slots:
-                    total_penalty += 10
-
-            # B. Not Preferred Instructor
-            session = assignment.session
-            if session.preferred_instructors and inst.instructor_id not in session.preferred_instructors:
-                total_penalty += 5
+            total_penalty += self.assignment_penalty(assignment)
 
         # 2. Student Gap Penalties
         # This is the most complex one
         for section in self.model_data['sections'].values():
             total_penalty += self._calculate_gaps_for_section(section.section_id, state)
 
+        counters = self.stats.counters
+        counters["cost_evaluations"] += 1
+        counters["cost_evaluation_seconds"] += time.perf_counter() - start
         return total_penalty
 
+    def assignment_penalty(self, assignment):
+        """Instructor preference penalty of a single assignment."""
+        penalty = 0
+        inst = assignment.instructor
+        # A. Not Preferred Slot
+        for slot_id in assignment.timeslot_sequence:
+            if slot_id in inst.not_preferred_slots:
+                penalty += 10
+
+        # B. Not Preferred Instructor
+        session = assignment.session
+        if session.preferred_instructors and inst.instructor_id not in session.preferred_instructors:
+            penalty += 5
+        return penalty
+
     def _calculate_gaps_for_section(self, section_id, state):
         """Calculates gap penalties for a single section."""
+        return self.gap_penalty(state.section_schedule[section_id])
+
+    def gap_penalty(self, busy_slots):
+        """Gap penalty of one section that is busy in `busy_slots`."""
         gap_penalty = 0
-        busy_slots = state.section_schedule[section_id]
         if not busy_slots:
             return 0
 
@@ -79,47 +94,103 @@ class CostEvaluator:
         return gap_penalty
 
 
+class IncrementalCostEvaluator(CostEvaluator):
+    """
+    Scores changes instead of whole solutions. The cost is a sum of per-assignment
+    preference penalties and per-section gap penalties, so replacing some assignments
+    only changes their own penalties and the gaps of the sections they teach.
+    """
+
+    def delta(self, state, removed, added):
+        """
+        Cost change of replacing the assignments `removed` (currently in `state`) by `added`.
+        `state` is not modified.
+        """
+        delta = sum(self.assignment_penalty(a) for a in added) - sum(self.assignment_penalty(a) for a in removed)
+
+        section_ids = {section.section_id for a in list(removed) + list(added) for section in a.session.sections}
+        busy_after = {section_id: set(state.section_schedule[section_id]) for section_id in section_ids}
+        for assignment in removed:
+            for section in assignment.session.sections:
+                busy_after[section.section_id].difference_update(assignment.timeslot_sequence)
+        for assignment in added:
+            for section in assignment.session.sections:
+                busy_after[section.section_id].update(assignment.timeslot_sequence)
+
+        for section_id, busy in busy_after.items():
+            delta += self.gap_penalty(busy) - self.gap_penalty(state.section_schedule[section_id])
+        return delta
+
+
 class IterativeSolver:
     """
     Phase 2: Takes a valid solution and tries to improve it
     using a simple hill-climbing metaheuristic.
     """
-    def __init__(self, solution, state, evaluator, model_data, iterations=10000):
+    def __init__(self, solution, state, evaluator, model_data, iterations=10000,
+                 time_limit=None, stats=None, progress_interval=200, rng=None):
         self.current_solution = solution  # List of Assignments
         self.current_state = state  # TimetableState object
         self.evaluator = evaluator
         self.model_data = model_data
         self.iterations = iterations
+        self.time_limit = time_limit  # Optional budget in seconds
+        # Hooks of `stats` get a "progress" event every progress_interval iterations
+        # (returning True stops the search, e.g. on cancellation) and "improvement" events
+        self.stats = stats if stats is not None else evaluator.stats
+        self.progress_interval = progress_interval
+        # All randomness of the search comes from this random.Random: pass a seeded one to
+        # repeat a run exactly (a time_limit can still cut it short at a different iteration)
+        self.rng = rng if rng is not None else random.Random()
         self.current_cost = evaluator.calculate_total_cost(solution, state)
 
     def optimize(self):
         print(f"\n--- Phase 2: Iterative Optimizer Starting ---")
         print(f"Initial Cost: {self.current_cost}")
         start_time = time.time()
-
-        for i in range(self.iterations):
-            if i % 2000 == 0:
-                print(f"Iteration {i}...")
-
-            # 1. Generate a "neighbor" solution
-            # A neighbor is a solution with one small, valid change.
-            neighbor_solution, neighbor_state = self.generate_neighbor()
-            if neighbor_solution is None:
-                continue  # Could not find a valid swap
-
-            # 2. Evaluate the neighbor
-            new_cost = self.evaluator.calculate_total_cost(neighbor_solution, neighbor_state)
-
-            # 3. Decide to accept
-            # This is simple Hill Climbing: only accept better solutions
-            if new_cost < self.current_cost:
-                self.current_solution = neighbor_solution
-                self.current_state = neighbor_state
-                self.current_cost = new_cost
-                print(f"  > Improvement found! New Cost: {new_cost} (Iteration {i})")
-
+        stats, hooks = self.stats, self.stats.hooks
+        iterations = invalid = rejected = improvements = 0
+
+        with stats.phase("phase2"):
+            for i in range(self.iterations):
+                if self.time_limit is not None and time.time() - start_time > self.time_limit:
+                    print(f"  Time budget of {self.time_limit}s reached at iteration {i}.")
+                    break
+                if hooks and i % self.progress_interval == 0 and stats.emit(
+                        "progress", iteration=i, cost=self.current_cost, improvements=improvements):
+                    print(f"  Stopped by a progress hook at iteration {i}.")
+                    break
+                iterations += 1
+
+                # 1. Generate a "neighbor" solution
+                # A neighbor is a solution with one small, valid change.
+                neighbor_solution, neighbor_state = self.generate_neighbor()
+                if neighbor_solution is None:
+                    invalid += 1
+                    continue  # Could not find a valid swap
+
+                # 2. Evaluate the neighbor
+                new_cost = self.evaluator.calculate_total_cost(neighbor_solution, neighbor_state)
+
+                # 3. Decide to accept
+                # This is simple Hill Climbing: only accept better solutions
+                if new_cost < self.current_cost:
+                    self.current_solution = neighbor_solution
+                    self.current_state = neighbor_state
+                    self.current_cost = new_cost
+                    improvements += 1
+                    if hooks:
+                        stats.emit("improvement", iteration=i, cost=new_cost)
+                else:
+                    rejected += 1
+
+        stats.add(phase2_iterations=iterations, phase2_neighbors_evaluated=iterations - invalid,
+                  phase2_neighbors_invalid=invalid, phase2_neighbors_rejected=rejected,
+                  phase2_improvements=improvements)
         end_time = time.time()
         print(f"--- Optimizer Finished in {end_time - start_time:.2f} seconds ---")
+        print(f"{improvements} improvements in {iterations} iterations "
+              f"({invalid} invalid swaps, {rejected} rejected neighbors)")
         print(f"Final Optimized Cost: {self.current_cost}")
         return self.current_solution
 
@@ -130,7 +201,7 @@ class IterativeSolver:
         if len(self.current_solution) < 2:
             return None, None
 
-        a1, a2 = random.sample(self.current_solution, 2)
+        a1, a2 = self.rng.sample(self.current_solution, 2)
 
         # We can only swap if they have the same duration
         if a1.session.duration_slots != a2.session.duration_slots:
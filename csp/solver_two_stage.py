@@ -0,0 +1,175 @@
+# ===============================
+# solver_two_stage.py
+# Phase 1 variant: time/instructor search, then per-slot room matching
+# ===============================
+
+from collections import defaultdict
+import time
+from csp.solver_phase1 import Assignment, BacktrackingSolver, TimetableState
+from csp.utils import CapacitatedMatching, hopcroft_karp
+
+
+class TwoStageSolver(BacktrackingSolver):
+    """
+    Decomposed Phase 1 solver.
+
+    Stage 1 backtracks over (timeslot sequence, instructor) only. Instead of branching on
+    rooms it keeps, per timeslot, an incremental matching of the sessions in that slot
+    to their candidate rooms, so a value is rejected as soon as the slot can no longer
+    host all of its sessions.
+    Stage 2 assigns concrete rooms slot by slot with Hopcroft-Karp. Multi-slot sessions
+    are pinned to one room for their whole sequence first.
+
+    Returns the same (solution, state) pair as BacktrackingSolver, so Phase 2 is unchanged.
+    """
+
+    def __init__(self, variables, model_data, stats=None):
+        super().__init__(variables, model_data, stats)
+        self.rooms_by_id = {room.room_id: room for room in model_data['rooms'].values()}
+        room_capacities = dict.fromkeys(self.rooms_by_id, 1)
+        self.slot_matchings = defaultdict(lambda: CapacitatedMatching({}, {}, dict(room_capacities)))
+        self.times = []  # (session, timeslot_sequence, instructor) chosen by stage 1
+
+    def solve(self):
+        print("\n--- Phase 1 (two-stage): Time/Instructor Search Starting ---")
+        start_time = time.time()
+
+        with self.stats.phase("phase1"):
+            self.unassigned_variables.sort(key=self.variable_order)
+            found = self.recursive_solve()
+        self.record_search()
+        print(f"--- Stage 1 Finished in {time.time() - start_time:.2f} seconds ---")
+
+        if not found:
+            print("FAILURE: Could not find a valid solution.")
+            return None, None
+
+        stage2_start = time.time()
+        with self.stats.phase("phase1_rooms"):
+            rooms = self.assign_rooms()
+        print(f"--- Stage 2 (room matching) Finished in {time.time() - stage2_start:.2f} seconds ---")
+        if rooms is None:
+            # Pinning a multi-slot session broke a slot matching; fall back to the full search
+            print("Stage 2 could not match rooms; falling back to the full backtracking search.")
+            fallback = BacktrackingSolver([session for session, _, _ in self.times], self.model_data, self.stats)
+            return fallback.solve()
+
+        self.state = TimetableState(self.model_data)
+        self.solution = []
+        for session, time_seq, inst in self.times:
+            assignment = Assignment(session, time_seq, self.rooms_by_id[rooms[session.session_id]], inst)
+            self.state.add_assignment(assignment)
+            self.solution.append(assignment)
+
+        print(f"--- Solver Finished in {time.time() - start_time:.2f} seconds ---")
+        print(f"SUCCESS: Found a valid timetable with {len(self.solution)} assignments.")
+        return self.solution, self.state
+
+    # ---------- Stage 1 ----------
+
+    def get_domain_size(self, var):
+        d = var.domain
+        return len(d.timeslot_sequences) * len(d.instructors)
+
+    def get_ordered_domain_values(self, var):
+        combinations = [(time_seq, inst) for time_seq in var.domain.timeslot_sequences
+                        for inst in var.domain.instructors]
+        combinations.sort(key=lambda value: self.value_penalty(var, value[0], value[1]))
+        return combinations
+
+    def is_time_consistent(self, session, timeslot_sequence, instructor):
+        busy = self.state.instructor_schedule[instructor.instructor_id]
+        for slot_id in timeslot_sequence:
+            if slot_id in busy:
+                return False
+            for section in session.sections:
+                if slot_id in self.state.section_schedule[section.section_id]:
+                    return False
+        return True
+
+    def _reserve_rooms(self, session, timeslot_sequence):
+        room_ids = [room.room_id for room in session.domain.rooms]
+        reserved = []
+        for slot_id in timeslot_sequence:
+            if not self.slot_matchings[slot_id].add(session.session_id, 1, room_ids):
+                self._release_rooms(session, reserved)
+                return False
+            reserved.append(slot_id)
+        return True
+
+    def _release_rooms(self, session, timeslot_sequence):
+        for slot_id in timeslot_sequence:
+            self.slot_matchings[slot_id].remove(session.session_id)
+
+    def _mark(self, session, timeslot_sequence, instructor, busy):
+        update = set.add if busy else set.remove
+        for slot_id in timeslot_sequence:
+            update(self.state.instructor_schedule[instructor.instructor_id], slot_id)
+            for section in session.sections:
+                update(self.state.section_schedule[section.section_id], slot_id)
+
+    def recursive_solve(self):
+        if not self.unassigned_variables:
+            return True
+
+        var = self.unassigned_variables.pop(0)
+        self.nodes += 1
+
+        for time_seq, inst in self.get_ordered_domain_values(var):
+            self.consistency_checks += 1
+            if self.is_time_consistent(var, time_seq, inst) and self._reserve_rooms(var, time_seq):
+                self._mark(var, time_seq, inst, busy=True)
+                self.times.append((var, time_seq, inst))
+
+                if self.recursive_solve():
+                    return True
+
+                self.times.pop()
+                self._mark(var, time_seq, inst, busy=False)
+                self._release_rooms(var, time_seq)
+                self.backtracks += 1
+
+        self.unassigned_variables.insert(0, var)
+        return False
+
+    # ---------- Stage 2 ----------
+
+    def assign_rooms(self):
+        """Returns {session_id: room_id}, or None if a pinned multi-slot session breaks a slot."""
+        sessions_by_slot = defaultdict(list)
+        for session, time_seq, _ in self.times:
+            for slot_id in time_seq:
+                sessions_by_slot[slot_id].append(session)
+
+        pinned = defaultdict(dict)  # slot_id -> {session_id: room_id}
+        rooms = {}
+        multi_slot = sorted(((s, seq) for s, seq, _ in self.times if len(seq) > 1),
+                            key=lambda item: (len(item[0].domain.rooms), item[0].session_id))
+        for session, time_seq in multi_slot:
+            for room in session.domain.rooms:
+                if any(room.room_id in pinned[slot_id].values() for slot_id in time_seq):
+                    continue
+                for slot_id in time_seq:
+                    pinned[slot_id][session.session_id] = room.room_id
+                if all(self._match_slot(sessions_by_slot[slot_id], pinned[slot_id]) is not None for slot_id in time_seq):
+                    rooms[session.session_id] = room.room_id
+                    break
+                for slot_id in time_seq:
+                    del pinned[slot_id][session.session_id]
+            else:
+                return None
+
+        for slot_id, sessions in sessions_by_slot.items():
+            matching = self._match_slot(sessions, pinned[slot_id])
+            if matching is None:
+                return None
+            rooms.update(matching)
+        return rooms
+
+    def _match_slot(self, sessions, pinned_rooms):
+        """Perfect matching of the unpinned sessions of one slot to the rooms left over, or None."""
+        taken = set(pinned_rooms.values())
+        adjacency = {s.session_id: [r.room_id for r in s.domain.rooms if r.room_id not in taken]
+                     for s in sessions if s.session_id not in pinned_rooms}
+        matching = hopcroft_karp(adjacency)
+        return matching if len(matching) == len(adjacency) else None
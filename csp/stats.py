@@ -0,0 +1,134 @@
+# =====================================
+# csp/stats.py
+# Solver statistics, event hooks and optional per-phase profiling
+# =====================================
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+PROFILE_KINDS = ("cpu", "memory")
+REPORT_LINES = 30
+
+
+class SolverStats:
+    """
+    Counters, per-phase wall times and event hooks shared by the pipeline stages
+    (DomainBuilder, BacktrackingSolver and its variants, IterativeSolver, CostEvaluator).
+
+    Stages count in plain ints inside their loops and add the totals once per phase, and
+    only build events when a hook is installed, so an instance without hooks or profiling
+    costs next to nothing. Each stage creates its own when none is passed.
+
+    hooks        callables hook(event, data). Every phase sends "phase_start" and
+                 "phase_end" (with "seconds"); IterativeSolver also sends "improvement"
+                 and, every progress_interval iterations, "progress". A hook returning
+                 True from "progress" stops the search early.
+    profile_dir  if set, every top-level phase runs under cProfile ("cpu") and/or
+                 tracemalloc ("memory", see `profile`) and writes its reports there:
+                 <phase>.prof (pstats dump), <phase>.cpu.txt and <phase>.memory.txt.
+    """
+
+    def __init__(self, hooks=(), profile_dir=None, profile=("cpu",)):
+        unknown = set(profile) - set(PROFILE_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown profile kind(s) {', '.join(sorted(unknown))}: use cpu and/or memory")
+        self.counters = defaultdict(int)
+        self.timings = defaultdict(float)
+        self.hooks = list(hooks)
+        self.profile_dir = profile_dir
+        self.profile = tuple(profile)
+        self.reports = []  # Paths of the profile reports written so far
+        self._profiling = False
+
+    def add(self, **counts):
+        for name, count in counts.items():
+            self.counters[name] += count
+
+    def emit(self, event, **data):
+        """Sends an event to every hook. Returns True if any hook asked to stop."""
+        stop = False
+        for hook in self.hooks:
+            if hook(event, data):
+                stop = True
+        return stop
+
+    @contextmanager
+    def phase(self, name):
+        """Times the block as `name` (accumulating over repeated phases) and profiles it if enabled."""
+        self.emit("phase_start", phase=name)
+        profiler, tracing = None, False
+        if self.profile_dir and not self._profiling:  # Nested phases are part of their parent's profile
+            self._profiling = True
+            if "memory" in self.profile and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                tracing = True
+            if "cpu" in self.profile:
+                profiler = cProfile.Profile()
+                profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] += elapsed
+            if profiler is not None:
+                profiler.disable()
+                self._write_cpu_report(name, profiler)
+            if tracing:
+                self._write_memory_report(name)
+                tracemalloc.stop()
+            if profiler is not None or tracing:
+                self._profiling = False
+            self.emit("phase_end", phase=name, seconds=elapsed)
+
+    def to_dict(self):
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "timings": {name: round(seconds, 6) for name, seconds in self.timings.items()},
+            "reports": list(self.reports)
+        }
+
+    def summary(self):
+        """Human-readable phase times and counters."""
+        lines = ["--- Solver Statistics ---"]
+        lines += [f"{name:32s} {seconds:10.3f} s" for name, seconds in self.timings.items()]
+        lines += [f"{name:32s} {count:10d}" if isinstance(count, int) else f"{name:32s} {count:10.3f}"
+                  for name, count in sorted(self.counters.items())]
+        return "\n".join(lines)
+
+    # ---------- Profile reports ----------
+
+    def _report_path(self, name, suffix):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{name}{suffix}")
+        self.reports.append(path)
+        return path
+
+    def _write_cpu_report(self, name, profiler):
+        profiler.dump_stats(self._report_path(name, ".prof"))
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(REPORT_LINES)
+        with open(self._report_path(name, ".cpu.txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+
+    def _write_memory_report(self, name):
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:REPORT_LINES]
+        with open(self._report_path(name, ".memory.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Phase {name}: peak {peak / 2 ** 20:.1f} MB, {current / 2 ** 20:.1f} MB still allocated at the end\n")
+            f.write(f"Top {len(top)} allocation sites still alive:\n")
+            f.writelines(f"{stat}\n" for stat in top)
+
+
+def console_progress(every=2000):
+    """A hook printing IterativeSolver progress every `every` iterations (a multiple of its progress_interval)."""
+    def hook(event, data):
+        if event == "progress" and data["iteration"] % every == 0:
+            print(f"Iteration {data['iteration']}: cost {data['cost']} ({data['improvements']} improvements so far)")
+    return hook
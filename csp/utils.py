@@ -0,0 +1,144 @@
+# ===============================
+# csp/utils.py
+# Bipartite matching helpers shared by the solvers
+# ===============================
+
+from collections import deque
+
+
+class CapacitatedMatching:
+    """
+    Maximum bipartite b-matching between left nodes (with a demand) and right nodes
+    (with a capacity). A left node may take several units from the same right node.
+
+    Augmenting paths are found with a BFS, so there is no recursion limit to worry
+    about on large instances. `hall_violators` holds, for every left node whose demand
+    could not be met, the (left_set, right_set) pair that proves it:
+    demand(left_set) > capacity(right_set) and right_set is the whole neighborhood of left_set.
+    """
+
+    def __init__(self, demands, adjacency, capacities):
+        self.demands = demands          # {left: int}
+        self.adjacency = adjacency      # {left: [right, ...]}
+        self.capacities = capacities    # {right: int}
+        self.load = {r: 0 for r in capacities}
+        self.flow = {}                  # {right: {left: units}}
+        self.uses = {}                  # {left: {right: units}}, mirror of flow
+        self.matched = {left: 0 for left in demands}
+        self.hall_violators = []
+
+    def solve(self):
+        for left, demand in self.demands.items():
+            while self.matched[left] < demand:
+                violator = self._augment(left)
+                if violator is not None:
+                    self.hall_violators.append(violator)
+                    break
+        return self
+
+    def add(self, left, demand, adjacency):
+        """
+        Adds a left node to an existing matching. Returns False, leaving the matching
+        exactly as it was, if its demand cannot be met.
+        """
+        self.demands[left], self.adjacency[left], self.matched[left] = demand, adjacency, 0
+        while self.matched[left] < demand:
+            if self._augment(left) is not None:
+                self.remove(left)
+                return False
+        return True
+
+    def remove(self, left):
+        for right, units in list(self.uses.get(left, {}).items()):
+            self._add(left, right, -units)
+        del self.demands[left], self.adjacency[left], self.matched[left]
+
+    def assignment(self, left):
+        """{right: units} currently given to `left`."""
+        return dict(self.uses.get(left, {}))
+
+    @property
+    def deficit(self):
+        return sum(self.demands[left] - self.matched[left] for left in self.demands)
+
+    def _add(self, left, right, units):
+        users = self.flow.setdefault(right, {})
+        users[left] = users.get(left, 0) + units
+        if users[left] == 0: del users[left]
+        used = self.uses.setdefault(left, {})
+        used[right] = used.get(right, 0) + units
+        if used[right] == 0: del used[right]
+        self.load[right] += units
+
+    def _augment(self, source):
+        """Pushes one unit from `source`. Returns None on success, else the Hall violator."""
+        parent_of_right = {}   # right -> left it was reached from
+        parent_of_left = {source: None}  # left -> right it was reached through
+        queue = deque([source])
+        while queue:
+            left = queue.popleft()
+            for right in self.adjacency.get(left, ()):
+                if right in parent_of_right: continue
+                parent_of_right[right] = left
+                if self.load[right] < self.capacities[right]:
+                    self._apply_path(right, parent_of_right, parent_of_left)
+                    return None
+                for user in self.flow.get(right, ()):
+                    if user not in parent_of_left:
+                        parent_of_left[user] = right
+                        queue.append(user)
+        return set(parent_of_left), set(parent_of_right)
+
+    def _apply_path(self, right, parent_of_right, parent_of_left):
+        left = parent_of_right[right]
+        while True:
+            self._add(left, right, 1)
+            previous_right = parent_of_left[left]
+            if previous_right is None:
+                self.matched[left] += 1
+                return
+            self._add(left, previous_right, -1)
+            right, left = previous_right, parent_of_right[previous_right]
+
+
+def hopcroft_karp(adjacency):
+    """
+    Maximum cardinality bipartite matching.
+    adjacency: {left: [right, ...]}. Returns {left: right} for every matched left node.
+    """
+    INF = float('inf')
+    match_left, match_right = {}, {}
+    lefts = list(adjacency)
+
+    while True:
+        # BFS: layer the free left nodes and everything reachable by alternating paths
+        distance, queue, found_free = {}, deque(), False
+        for left in lefts:
+            if left not in match_left:
+                distance[left] = 0
+                queue.append(left)
+        while queue:
+            left = queue.popleft()
+            for right in adjacency[left]:
+                partner = match_right.get(right)
+                if partner is None:
+                    found_free = True
+                elif partner not in distance:
+                    distance[partner] = distance[left] + 1
+                    queue.append(partner)
+        if not found_free:
+            return match_left
+
+        # DFS along the layers, augmenting vertex-disjoint shortest paths
+        def augment(left):
+            for right in adjacency[left]:
+                partner = match_right.get(right)
+                if partner is None or (distance.get(partner) == distance[left] + 1 and augment(partner)):
+                    match_left[left], match_right[right] = right, left
+                    return True
+            distance[left] = INF
+            return False
+
+        for left in lefts:
+            if left not in match_left:
+                augment(left)
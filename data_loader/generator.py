@@ -0,0 +1,275 @@
+# =====================================
+# data_loader/generator.py
+# Seeded synthetic input instances in the schemas DataLoader reads
+# =====================================
+#
+# Usage: python -m data_loader.generator OUT_DIR [--scale 5] [--seed 0] [--days 5] [--slots-per-day 4]
+#            [--qualification-density 2.0] [--lab-scarcity 0.0] [--not-preferred-density 0.3]
+#
+# Every department mirrors the structure of the bundled Data/ instance: Core levels 1-2 with
+# ~9 sections each, levels 3-4 split into specializations, ~48 course offerings, ~3.3 rooms
+# and ~2.5 instructors per section, drawn from the distributions found there. Each department
+# has its own professors and assistants; some general courses are shared between departments.
+
+import argparse
+import math
+import os
+import random
+import pandas as pd
+
+# Output files, named like the bundled instance (keys are DataLoader's path keys)
+FILE_NAMES = {
+    "courses": "Courses.csv",
+    "rooms": "Rooms.csv",
+    "instructors": "Instructors.csv",
+    "timeslots": "TimeSlots.csv",
+    "sections": "sections_data.xlsx",
+    "available_courses": "Avilable_Course.csv"
+}
+
+DAY_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+FIRST_SLOT_MINUTES = 9 * 60
+SLOT_MINUTES, BREAK_MINUTES = 90, 15
+
+SPECIALIZATIONS = ["AID", "CNC", "CSC", "BIF"]
+# (level, specialization or "Core", sections at scale 1, course offerings)
+DEPARTMENT_PLAN = [(1, "Core", 9, 8), (2, "Core", 9, 7), (3, "Core", 0, 4)] + \
+                  [(3, spec, 2, 2) for spec in SPECIALIZATIONS] + [(4, spec, 2, 5) for spec in SPECIALIZATIONS]
+SMALL_SECTION_SHARE = 0.07  # Sections of 15 instead of 25 students
+SHARED_COURSE_SHARE = 0.15  # Offerings taken from the cross-department pool of general courses
+
+# (lecture slots, lab slots) -> (weight, credits), as in Courses.csv
+COURSE_SHAPES = {(1, 1): (117, 3), (1, 0): (31, 2), (2, 0): (4, 4), (0, 1): (4, 1), (0, 2): (1, 5)}
+SPECIALIST_LAB_TYPES = ["Computer Lab", "Drawing Studio"]
+
+# (capacity, type_of_space, room type) -> weight, as in Rooms.csv
+ROOM_KINDS = {
+    (25, "Classroom", "Lab"): 73, (75, "Classroom", "Lecture"): 15, (50, "Classroom", "Lab"): 12,
+    (100, "Theater", "Lecture"): 8, (150, "Hall", "Lecture"): 4, (15, "Classroom", "Lab"): 2,
+}
+ROOMS_PER_SECTION = 120 / 36
+SPECIALIST_ROOM_SHARE = 0.05  # Share of rooms that are computer labs or drawing studios
+INSTRUCTORS_PER_SECTION = 90 / 36
+MAX_GROUP_CAPACITY = 75
+
+
+def format_clock(minutes):
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+class InstanceGenerator:
+    """
+    Builds one synthetic instance. The same parameters and seed always give the same data.
+
+    scale                  sections, courses, rooms and instructors relative to Data/ (departments
+                           are added as the scale grows, so 3.0 is roughly a three-faculty campus)
+    qualification_density  mean number of instructors qualified per course role (lecture or lab);
+                           every course keeps at least one, lower values make the instance tighter
+    lab_scarcity           share of lab courses that need a computer lab or drawing studio,
+                           which stay ~5% of the rooms
+    not_preferred_density  share of the week's slots each professor marks as not preferred
+    """
+
+    def __init__(self, scale=1.0, seed=0, days=5, slots_per_day=4, qualification_density=2.0,
+                 lab_scarcity=0.0, not_preferred_density=0.3):
+        if scale <= 0:
+            raise ValueError("scale must be positive")
+        if not 1 <= days <= len(DAY_NAMES):
+            raise ValueError(f"days must be between 1 and {len(DAY_NAMES)}")
+        if not 1 <= slots_per_day <= 8:
+            raise ValueError("slots_per_day must be between 1 and 8")
+        if qualification_density < 1:
+            raise ValueError("qualification_density must be at least 1")
+        if not (0 <= lab_scarcity <= 1 and 0 <= not_preferred_density <= 1):
+            raise ValueError("lab_scarcity and not_preferred_density are shares between 0 and 1")
+        self.scale, self.seed = scale, seed
+        self.days, self.slots_per_day = days, slots_per_day
+        self.qualification_density = qualification_density
+        self.lab_scarcity = lab_scarcity
+        self.not_preferred_density = not_preferred_density
+        self.rng = random.Random(seed)
+
+    def generate(self):
+        """The six input tables as DataFrames, keyed like DataLoader's paths."""
+        rng = self.rng
+        departments = max(1, math.ceil(self.scale))
+        section_factor = self.scale / departments
+
+        timeslots = self._timeslots()
+        sections, offerings = [], []  # offerings: (department, level, specialization, sections)
+        for d in range(1, departments + 1):
+            department = f"D{d:02d}"
+            for level, spec, base_sections, _ in DEPARTMENT_PLAN:
+                count = self._jitter(base_sections * section_factor) if base_sections else 0
+                group = [{"Department": department, "SectionID": f"{department}-{level}-{spec}-s{i}"
+                          if spec != "Core" else f"{department}-{level}-s{i}", "Level": level,
+                          "Specialization": spec, "StudentCount": 15 if rng.random() < SMALL_SECTION_SHARE else 25}
+                         for i in range(1, count + 1)]
+                sections += group
+                offerings.append((department, level, spec, group))
+
+        courses, shared_pool = {}, []
+        available = []  # (department, level, course id, specialization, students)
+        for department, level, spec, group in offerings:
+            plan_offerings = next(n for lv, sp, _, n in DEPARTMENT_PLAN if lv == level and sp == spec)
+            # Core offerings of a level reach its specialization sections too
+            students = [s["StudentCount"] for s in group] or \
+                       [s["StudentCount"] for dep, lv, _, g in offerings if dep == department and lv == level for s in g]
+            for k in range(1, plan_offerings + 1):
+                if rng.random() < SHARED_COURSE_SHARE:
+                    if len(shared_pool) < 4 * departments:
+                        shared_pool.append(self._course(courses, f"GEN{len(shared_pool) + 1:03d}"))
+                    course_id = rng.choice(shared_pool)
+                else:
+                    course_id = self._course(courses, f"{department}{spec}{level}{k:02d}")
+                available.append((department, level, course_id, spec, students))
+
+        rooms = self._rooms(len(sections))
+        instructors, preferred = self._instructors(sections, courses, available, set(shared_pool), timeslots)
+
+        return {
+            "courses": pd.DataFrame(courses.values(), columns=["CourseID", "CourseName", "Credits", "Lecture", "Lab",
+                                                                "Lab_Type"]),
+            "rooms": pd.DataFrame(rooms, columns=["RoomID", "Capacity", "Type_of_Space", "Type"]),
+            "instructors": pd.DataFrame(instructors, columns=["InstructorID", "Name", "Role", "QualifiedCourses",
+                                                              "Not_PreferredSlots"]),
+            "timeslots": pd.DataFrame(timeslots, columns=["ID", "Day", "StartTime", "EndTime"]),
+            "sections": pd.DataFrame(sections, columns=["Department", "SectionID", "Level", "Specialization",
+                                                        "StudentCount"]),
+            "available_courses": pd.DataFrame(
+                [{"Department": department, "Level": level, "CourseID": course_id, "Specialization": spec,
+                  "preferred_Prof": preferred[i][0], "preferred_Assi": preferred[i][1]}
+                 for i, (department, level, course_id, spec, _) in enumerate(available)],
+                columns=["Department", "Level", "CourseID", "Specialization", "preferred_Prof", "preferred_Assi"]),
+        }
+
+    def write(self, out_dir):
+        """Writes the instance to `out_dir` and returns its file paths in DataLoader's format."""
+        os.makedirs(out_dir, exist_ok=True)
+        paths = {key: os.path.join(out_dir, name) for key, name in FILE_NAMES.items()}
+        for key, table in self.generate().items():
+            if paths[key].endswith(".xlsx"):
+                table.to_excel(paths[key], index=False)
+            else:
+                table.to_csv(paths[key], index=False)
+        return paths
+
+    # ---------- Tables ----------
+
+    def _jitter(self, mean):
+        """A count around `mean` (at least 1): binomial-like spread, like section counts in Data/."""
+        whole = int(mean)
+        return max(1, whole + (self.rng.random() < mean - whole) + self.rng.choice([-1, 0, 0, 0, 1]))
+
+    def _timeslots(self):
+        slots = []
+        for day in DAY_NAMES[:self.days]:
+            for period in range(self.slots_per_day):
+                start = FIRST_SLOT_MINUTES + period * (SLOT_MINUTES + BREAK_MINUTES)
+                slots.append({"ID": len(slots) + 1, "Day": day, "StartTime": format_clock(start),
+                              "EndTime": format_clock(start + SLOT_MINUTES)})
+        return slots
+
+    def _course(self, courses, course_id):
+        lecture, lab = self.rng.choices(list(COURSE_SHAPES), weights=[w for w, _ in COURSE_SHAPES.values()])[0]
+        lab_type = self.rng.choice(SPECIALIST_LAB_TYPES) if lab and self.rng.random() < self.lab_scarcity \
+            else "Classroom"
+        courses[course_id] = {"CourseID": course_id, "CourseName": f"Course {course_id}",
+                              "Credits": COURSE_SHAPES[lecture, lab][1], "Lecture": lecture,
+                              "Lab": lab, "Lab_Type": lab_type}
+        return course_id
+
+    def _rooms(self, section_count):
+        count = max(len(ROOM_KINDS), round(section_count * ROOMS_PER_SECTION))
+        specialist = round(count * SPECIALIST_ROOM_SHARE)
+        kinds = self.rng.choices(list(ROOM_KINDS), weights=list(ROOM_KINDS.values()), k=count - specialist)
+        # Specialist labs (50 seats: any single section fits), alternating so both kinds exist
+        kinds += [(50, SPECIALIST_LAB_TYPES[i % len(SPECIALIST_LAB_TYPES)], "Lab") for i in range(specialist)]
+        # Every lecture group must fit somewhere, so keep one room of each lecture size
+        for kind in [(75, "Classroom", "Lecture"), (100, "Theater", "Lecture")]:
+            if kind not in kinds:
+                kinds[0] = kind
+        return [{"RoomID": f"B{i // 40 + 1:02d} F{i // 10 % 4}.{i % 10 + 1:02d}", "Capacity": capacity,
+                 "Type_of_Space": space, "Type": room_type}
+                for i, (capacity, space, room_type) in enumerate(kinds)]
+
+    def _instructors(self, sections, courses, available, shared_courses, timeslots):
+        """Professors and assistants per department, qualified so every course role is staffed."""
+        rng = self.rng
+        section_counts = {}
+        for section in sections:
+            section_counts[section["Department"]] = section_counts.get(section["Department"], 0) + 1
+        staff = {}  # (department, role) -> [instructor dicts]
+        for department, count in section_counts.items():
+            per_role = max(1, round(count * INSTRUCTORS_PER_SECTION / 2))
+            for role, prefix, title in (("Professor", "P", "Dr."), ("Assistant", "A", "Eng.")):
+                staff[department, role] = [
+                    {"InstructorID": f"{prefix}{department[1:]}{i:02d}", "Name": f"{title} {department} {prefix}{i}",
+                     "qualified": [], "load": 0}
+                    for i in range(1, per_role + 1)]
+        everyone = {role: [i for (_, r), members in staff.items() if r == role for i in members]
+                    for role in ("Professor", "Assistant")}
+
+        slot_ids = [slot["ID"] for slot in timeslots]
+        not_preferred_count = round(len(slot_ids) * self.not_preferred_density)
+        preferred = []
+        for department, level, course_id, spec, students in available:
+            course = courses[course_id]
+            roles = {}
+            lecture_groups = math.ceil(sum(students) / MAX_GROUP_CAPACITY) * course["Lecture"]
+            lab_sessions = len(students) * course["Lab"]
+            for role, sessions in (("Professor", lecture_groups), ("Assistant", lab_sessions)):
+                if not sessions:
+                    roles[role] = []
+                    continue
+                pool = everyone[role] if course_id in shared_courses else staff[department, role]
+                already = [i for i in pool if course_id in i["qualified"]]
+                wanted = max(1, round(rng.gauss(self.qualification_density, self.qualification_density / 3)))
+                # Least loaded of a few random picks: balanced but not uniform, like real staffing
+                while len(already) < min(wanted, len(pool)):
+                    candidates = [i for i in rng.sample(pool, min(3, len(pool))) if i not in already]
+                    if not candidates:
+                        continue
+                    pick = min(candidates, key=lambda i: i["load"])
+                    pick["qualified"].append(course_id)
+                    already.append(pick)
+                already.sort(key=lambda i: i["load"])
+                already[0]["load"] += sessions
+                roles[role] = already
+            professors, assistants = roles["Professor"], roles["Assistant"]
+            preferred.append((professors[0]["InstructorID"] if professors else None,
+                              ",".join(i["InstructorID"] for i in assistants[:3]) or None))
+
+        instructors = []
+        for (department, role), members in staff.items():
+            for member in members:
+                not_preferred = sorted(rng.sample(slot_ids, not_preferred_count)) if role == "Professor" else []
+                instructors.append({"InstructorID": member["InstructorID"], "Name": member["Name"], "Role": role,
+                                    "QualifiedCourses": ", ".join(member["qualified"]),
+                                    "Not_PreferredSlots": str(not_preferred)})
+        return instructors, preferred
+
+
+def generate_instance(out_dir, scale=1.0, seed=0, **options):
+    """Writes a synthetic instance (see InstanceGenerator) to `out_dir`; returns its file paths."""
+    return InstanceGenerator(scale=scale, seed=seed, **options).write(out_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic timetabling instance")
+    parser.add_argument("out_dir")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--slots-per-day", type=int, default=4)
+    parser.add_argument("--qualification-density", type=float, default=2.0)
+    parser.add_argument("--lab-scarcity", type=float, default=0.0)
+    parser.add_argument("--not-preferred-density", type=float, default=0.3)
+    args = parser.parse_args()
+
+    paths = generate_instance(args.out_dir, scale=args.scale, seed=args.seed, days=args.days,
+                              slots_per_day=args.slots_per_day, qualification_density=args.qualification_density,
+                              lab_scarcity=args.lab_scarcity, not_preferred_density=args.not_preferred_density)
+    for key, path in paths.items():
+        print(f"{key:18s} {path}")
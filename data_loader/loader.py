@@ -6,75 +6,98 @@
 import pandas as pd
 import ast
 from models.entities import Course, Room, Instructor, TimeSlot, Section, AvailableCourse
+from data_loader.validator import VALIDATION_ORDER, DataValidator, iter_chunks, parse_int
 
 
 class DataLoader:
-    def __init__(self, paths):
+    """
+    Reads every source once, in chunks of raw string cells (see validator.iter_chunks).
+    With validate=True each chunk is checked by DataValidator before its rows become model
+    objects; after the first error the rest is still checked but no longer built.
+    """
+    def __init__(self, paths, validate=True, chunk_size=1000):
         self.paths = paths
+        self.validate = validate
+        self.chunk_size = chunk_size
         self.model_data = {}
+        self.issues = []
 
     def load_all(self):
         print("Loading all data sources...")
+        self.model_data = {'courses': {}, 'rooms': {}, 'instructors': {}, 'timeslots': {}, 'sections': {},
+                           'available_courses': []}
         try:
-            self.model_data['courses'] = self._load_courses()
-            self.model_data['rooms'] = self._load_rooms()
-            self.model_data['instructors'] = self._load_instructors()
-            slots_dict, slots_df = self._load_timeslots()
-            self.model_data['timeslots'] = slots_dict
-            self.model_data['timeslots_df'] = slots_df
-            self.model_data['sections'] = self._load_sections()
-            self.model_data['available_courses'] = self._load_available_courses()
+            if self.validate:
+                if not self.validate_sources(on_chunk=self._add_records):
+                    return None
+            else:
+                for source in VALIDATION_ORDER:
+                    for _, _, records in iter_chunks(self.paths[source], self.chunk_size):
+                        self._add_records(source, records)
+            slots = sorted(self.model_data['timeslots'].values(), key=lambda slot: slot.slot_id)
+            self.model_data['timeslots'] = {slot.slot_id: slot for slot in slots}
+            self.model_data['timeslots_df'] = pd.DataFrame(
+                [{"ID": slot.slot_id, "Day": slot.day, "StartTime": slot.start_time, "EndTime": slot.end_time}
+                 for slot in slots], columns=["ID", "Day", "StartTime", "EndTime"])
             print("All data loaded and model objects created.")
             return self.model_data
         except Exception as e:
             print(f"Error during data loading: {e}")
             return None
 
-    def _load_courses(self):
-        df = pd.read_csv(self.paths['courses'])
-        courses_dict = {}
-        for row in df.to_dict('records'):
-            course_id_clean = str(row['CourseID']).strip()
-            course = Course(course_id_clean, row['CourseName'], row['Lecture'], row['Lab'], row['Lab_Type'])
-            courses_dict[course.course_id] = course
-        return courses_dict
+    def validate_sources(self, on_chunk=None):
+        """Streams every input file through DataValidator, printing issues as they are found."""
+        validator = DataValidator(self.paths, chunk_size=self.chunk_size)
+        self.issues = validator.validate(on_issue=print, on_chunk=on_chunk)
+        error_count = sum(1 for issue in self.issues if issue.severity == "error")
+        if error_count:
+            print(f"Data validation failed with {error_count} error(s).")
+            return False
+        if self.issues:
+            print(f"Data validation passed with {len(self.issues)} warning(s).")
+        return True
 
-    def _load_rooms(self):
-        df = pd.read_csv(self.paths['rooms'])
-        return {row['RoomID']: Room(row['RoomID'], row['Capacity'], row['Type'], row['Type_of_Space']) for row in df.to_dict('records')}
+    def _add_records(self, source, records):
+        add = getattr(self, f"_add_{source}")
+        for row in records:
+            add(row)
 
-    def _load_instructors(self):
-        df = pd.read_csv(self.paths['instructors'])
-        instructors_dict = {}
-        for row in df.to_dict('records'):
-            qualified = set(c.strip() for c in str(row['QualifiedCourses']).split(','))
-            not_preferred = set()
-            try:
-                not_preferred_list = ast.literal_eval(row['Not_PreferredSlots'])
-                if isinstance(not_preferred_list, list): not_preferred = set(not_preferred_list)
-            except Exception: pass
-            instructors_dict[row['InstructorID']] = Instructor(row['InstructorID'], row['Name'], qualified, not_preferred)
-        return instructors_dict
+    # ---------- One model object per raw row (cells are strings, "" when empty) ----------
 
-    def _load_timeslots(self):
-        df = pd.read_csv(self.paths['timeslots'])
-        df = df.sort_values(by='ID').reset_index(drop=True)
-        timeslots_dict = {row['ID']: TimeSlot(row['ID'], row['Day'], row['StartTime'], row['EndTime']) for row in df.to_dict('records')}
-        return timeslots_dict, df
+    def _add_courses(self, row):
+        course = Course(row['CourseID'].strip(), row['CourseName'], parse_int(row['Lecture']), parse_int(row['Lab']),
+                        _optional(row['Lab_Type']))
+        self.model_data['courses'][course.course_id] = course
 
-    def _load_sections(self):
-        df = pd.read_excel(self.paths['sections'])
-        return {row['SectionID']: Section(row['SectionID'], row['Department'], row['Level'], row['Specialization'], row['StudentCount']) for row in df.to_dict('records')}
+    def _add_rooms(self, row):
+        self.model_data['rooms'][row['RoomID']] = Room(row['RoomID'], parse_int(row['Capacity']), row['Type'],
+                                                       row['Type_of_Space'])
 
-    def _load_available_courses(self):
-        df = pd.read_csv(self.paths['available_courses'])
-        available_list = []
-        for row in df.to_dict('records'):
-            prof = row['preferred_Prof'] if pd.notna(row['preferred_Prof']) else None
-            assi_set = set()
-            assi_str = str(row['preferred_Assi'])
-            if pd.notna(assi_str) and assi_str.lower() != 'nan':
-                 assi_set = set(c.strip() for c in assi_str.split(','))
-            course_id_clean = str(row['CourseID']).strip()
-            available_list.append(AvailableCourse(row['Department'], row['Level'], row['Specialization'], course_id_clean, prof, assi_set))
-        return available_list
+    def _add_instructors(self, row):
+        qualified = set(c.strip() for c in row['QualifiedCourses'].split(',') if c.strip())
+        not_preferred = set()
+        try:
+            not_preferred_list = ast.literal_eval(row['Not_PreferredSlots'])
+            if isinstance(not_preferred_list, list): not_preferred = set(not_preferred_list)
+        except Exception: pass
+        self.model_data['instructors'][row['InstructorID']] = Instructor(row['InstructorID'], row['Name'], qualified,
+                                                                         not_preferred)
+
+    def _add_timeslots(self, row):
+        slot = TimeSlot(parse_int(row['ID']), row['Day'], row['StartTime'], row['EndTime'])
+        self.model_data['timeslots'][slot.slot_id] = slot
+
+    def _add_sections(self, row):
+        self.model_data['sections'][row['SectionID']] = Section(
+            row['SectionID'], row['Department'], parse_int(row['Level']), row['Specialization'],
+            parse_int(row['StudentCount']))
+
+    def _add_available_courses(self, row):
+        assi_set = set(c.strip() for c in row['preferred_Assi'].split(',') if c.strip())
+        self.model_data['available_courses'].append(AvailableCourse(
+            row['Department'], parse_int(row['Level']), row['Specialization'], row['CourseID'].strip(),
+            _optional(row['preferred_Prof']), assi_set))
+
+
+def _optional(value):
+    return value if value.strip() else None
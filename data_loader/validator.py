@@ -0,0 +1,236 @@
+# =====================================
+# data_loader/validator.py
+# Streaming validation of the input data sources
+# =====================================
+
+import ast
+from dataclasses import dataclass
+import pandas as pd
+
+
+REQUIRED_COLUMNS = {
+    "courses": ["CourseID", "CourseName", "Lecture", "Lab", "Lab_Type"],
+    "rooms": ["RoomID", "Capacity", "Type", "Type_of_Space"],
+    "timeslots": ["ID", "Day", "StartTime", "EndTime"],
+    "instructors": ["InstructorID", "Name", "QualifiedCourses", "Not_PreferredSlots"],
+    "sections": ["SectionID", "Department", "Level", "Specialization", "StudentCount"],
+    "available_courses": ["Department", "Level", "CourseID", "Specialization", "preferred_Prof", "preferred_Assi"],
+}
+
+# Files are validated in this order so that referenced IDs are always known first
+VALIDATION_ORDER = ["courses", "rooms", "timeslots", "instructors", "sections", "available_courses"]
+
+
+@dataclass
+class ValidationIssue:
+    source: str
+    row: int
+    column: str
+    message: str
+    severity: str = "error"
+
+    def __str__(self):
+        return f"[{self.severity.upper()}] {self.source} row {self.row}, {self.column}: {self.message}"
+
+
+def parse_int(value):
+    """The integer a raw cell holds ("3", "3.0"), or None."""
+    try:
+        return int(float(value)) if float(value).is_integer() else None
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_chunks(path, chunk_size):
+    """
+    Yields (first_row_number, columns, records) chunks of raw string values.
+    Row numbers are spreadsheet rows, i.e. the header is row 1.
+    """
+    if str(path).lower().endswith((".xlsx", ".xlsm")):
+        yield from _iter_excel_chunks(path, chunk_size)
+        return
+    row_number = 2
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False):
+        records = chunk.to_dict('records')
+        yield row_number, list(chunk.columns), records
+        row_number += len(records)
+
+
+def _iter_excel_chunks(path, chunk_size):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+        row_number, records = 2, []
+        for values in rows:
+            records.append({col: ("" if v is None else str(v)) for col, v in zip(header, values)})
+            if len(records) == chunk_size:
+                yield row_number, header, records
+                row_number, records = row_number + len(records), []
+        if records or row_number == 2:
+            yield row_number, header, records
+    finally:
+        workbook.close()
+
+
+class DataValidator:
+    """
+    Validates the input files row by row, in chunks, without building the model.
+
+    Only the ID sets needed for referential checks are kept in memory, so memory stays
+    bounded by the number of entities rather than the file sizes. Issues are yielded as
+    soon as they are found. Callers that build the model pass `on_chunk`, which receives
+    every checked chunk while no error has been found, so each file is read only once.
+    """
+
+    def __init__(self, paths, chunk_size=1000):
+        self.paths = paths
+        self.chunk_size = chunk_size
+        self.course_ids, self.room_ids, self.slot_ids = set(), set(), set()
+        self.instructor_ids, self.section_ids = set(), set()
+        self.error_count = 0
+
+    def validate(self, max_errors=None, on_issue=None, on_chunk=None):
+        """
+        Collects all issues (stopping after `max_errors` errors). `on_issue` is called for
+        each one; `on_chunk(source, records)` for each checked chunk (see iter_issues).
+        """
+        issues = []
+        for issue in self.iter_issues(on_chunk):
+            issues.append(issue)
+            if on_issue: on_issue(issue)
+            if max_errors is not None and self.error_count >= max_errors: break
+        return issues
+
+    def iter_issues(self, on_chunk=None):
+        """
+        Yields the issues of every file. `on_chunk(source, records)` is called with each
+        chunk of raw string records once its rows are checked, until the first error.
+        """
+        for source in VALIDATION_ORDER:
+            path = self.paths[source]
+            check_row = getattr(self, f"_check_{source}")
+            chunks = iter_chunks(path, self.chunk_size)
+            columns_checked = False
+            while True:
+                try:
+                    chunk = next(chunks, None)
+                except FileNotFoundError:
+                    yield self._count(ValidationIssue(source, 0, "-", f"file not found: {path}"))
+                    break
+                except Exception as e:
+                    yield self._count(ValidationIssue(source, 0, "-", f"could not be read: {e}"))
+                    break
+                if chunk is None:
+                    break
+                first_row, columns, records = chunk
+                if not columns_checked:
+                    columns_checked = True
+                    missing = [c for c in REQUIRED_COLUMNS[source] if c not in columns]
+                    if missing:
+                        yield self._count(ValidationIssue(source, 1, ", ".join(missing), "missing required column(s)"))
+                        break
+                for offset, row in enumerate(records):
+                    for issue in check_row(source, first_row + offset, row):
+                        yield self._count(issue)
+                if on_chunk and not self.error_count:
+                    on_chunk(source, records)
+            chunks.close()
+
+    # ---------- Per-file row checks ----------
+
+    def _check_courses(self, source, row_number, row):
+        course_id = row["CourseID"].strip()
+        if not course_id:
+            yield ValidationIssue(source, row_number, "CourseID", "empty ID")
+        elif course_id in self.course_ids:
+            yield ValidationIssue(source, row_number, "CourseID", f"duplicate ID '{course_id}'", "warning")
+        self.course_ids.add(course_id)
+        for column in ("Lecture", "Lab"):
+            yield from self._check_int(source, row_number, row, column, minimum=0)
+
+    def _check_rooms(self, source, row_number, row):
+        room_id = row["RoomID"]
+        if not room_id.strip():
+            yield ValidationIssue(source, row_number, "RoomID", "empty ID")
+        elif room_id in self.room_ids:
+            yield ValidationIssue(source, row_number, "RoomID", f"duplicate ID '{room_id}'", "warning")
+        self.room_ids.add(room_id)
+        yield from self._check_int(source, row_number, row, "Capacity", minimum=1)
+
+    def _check_timeslots(self, source, row_number, row):
+        slot_id = parse_int(row["ID"])
+        if slot_id is None:
+            yield ValidationIssue(source, row_number, "ID", f"not an integer: '{row['ID']}'")
+        elif slot_id in self.slot_ids:
+            yield ValidationIssue(source, row_number, "ID", f"duplicate ID {slot_id}")
+        else:
+            self.slot_ids.add(slot_id)
+        for column in ("Day", "StartTime", "EndTime"):
+            if not row[column].strip():
+                yield ValidationIssue(source, row_number, column, "empty value")
+
+    def _check_instructors(self, source, row_number, row):
+        instructor_id = row["InstructorID"]
+        if not instructor_id.strip():
+            yield ValidationIssue(source, row_number, "InstructorID", "empty ID")
+        elif instructor_id in self.instructor_ids:
+            yield ValidationIssue(source, row_number, "InstructorID", f"duplicate ID '{instructor_id}'", "warning")
+        self.instructor_ids.add(instructor_id)
+
+        unknown = [c.strip() for c in row["QualifiedCourses"].split(",") if c.strip() and c.strip() not in self.course_ids]
+        if unknown:
+            yield ValidationIssue(source, row_number, "QualifiedCourses",
+                                  f"qualified for unknown course(s) {', '.join(unknown)}", "warning")
+
+        raw_slots = row["Not_PreferredSlots"].strip()
+        if raw_slots:
+            try:
+                slots = ast.literal_eval(raw_slots)
+                if not isinstance(slots, list): raise ValueError
+            except (ValueError, SyntaxError):
+                yield ValidationIssue(source, row_number, "Not_PreferredSlots",
+                                      f"not a list of slot IDs: '{raw_slots}' (ignored)", "warning")
+            else:
+                unknown_slots = [s for s in slots if s not in self.slot_ids]
+                if unknown_slots:
+                    yield ValidationIssue(source, row_number, "Not_PreferredSlots",
+                                          f"unknown slot ID(s) {unknown_slots}", "warning")
+
+    def _check_sections(self, source, row_number, row):
+        section_id = row["SectionID"]
+        if not section_id.strip():
+            yield ValidationIssue(source, row_number, "SectionID", "empty ID")
+        elif section_id in self.section_ids:
+            yield ValidationIssue(source, row_number, "SectionID", f"duplicate ID '{section_id}'", "warning")
+        self.section_ids.add(section_id)
+        yield from self._check_int(source, row_number, row, "Level", minimum=0)
+        yield from self._check_int(source, row_number, row, "StudentCount", minimum=1)
+
+    def _check_available_courses(self, source, row_number, row):
+        course_id = row["CourseID"].strip()
+        if course_id not in self.course_ids:
+            yield ValidationIssue(source, row_number, "CourseID", f"unknown course '{course_id}' (skipped)", "warning")
+        yield from self._check_int(source, row_number, row, "Level", minimum=0)
+        prof = row["preferred_Prof"].strip()
+        if prof and prof not in self.instructor_ids:
+            yield ValidationIssue(source, row_number, "preferred_Prof", f"unknown instructor '{prof}'", "warning")
+        unknown = [a.strip() for a in row["preferred_Assi"].split(",") if a.strip() and a.strip() not in self.instructor_ids]
+        if unknown:
+            yield ValidationIssue(source, row_number, "preferred_Assi",
+                                  f"unknown instructor(s) {', '.join(unknown)}", "warning")
+
+    # ---------- Helpers ----------
+
+    def _count(self, issue):
+        if issue.severity == "error":
+            self.error_count += 1
+        return issue
+
+    def _check_int(self, source, row_number, row, column, minimum):
+        value = parse_int(row[column])
+        if value is None:
+            yield ValidationIssue(source, row_number, column, f"not an integer: '{row[column]}'")
+        elif value < minimum:
+            yield ValidationIssue(source, row_number, column, f"must be >= {minimum}, got {value}")
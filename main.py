@@ -1,9 +1,17 @@
+import argparse
+import json
+import random
+from datetime import date
 from data_loader.loader import DataLoader
 from models.session import VariableGenerator
 from csp.domain import DomainBuilder
+from csp.feasibility import FeasibilityAnalyzer
 from csp.solver_phase1 import BacktrackingSolver
+from csp.solver_two_stage import TwoStageSolver
 from csp.solver_phase2 import CostEvaluator, IterativeSolver
-from output.export import save_solution_to_csv, save_solution_to_json
+from csp.repair import RepairSolver, load_previous_schedule
+from csp.stats import SolverStats, console_progress
+from output.export import SEMESTER_WEEKS, digest_inputs, manifest_filename, save_run_manifest, save_solution
 
 FILE_PATHS = {
     "courses": "Data/Courses.csv",
@@ -16,8 +24,53 @@ FILE_PATHS = {
 
 OUTPUT_FILE = "Data/final_timetable.csv"
 OUTPUT_JSON_FILE = "Data/timetable_data.json"
+OUTPUT_STORE_FILE = "Data/timetable_data.ttstore"  # Binary copy of the JSON that the API loads first
+OUTPUT_ENTITY_DIR = "Data/timetables"  # Personal timetables: sections/<id>.ics|csv and instructors/<id>.ics|csv
+OUTPUT_MANIFEST_FILE = manifest_filename(OUTPUT_JSON_FILE)  # Seed, input hashes and options of the run
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Timetable Scheduler")
+    parser.add_argument("--repair", nargs="?", const=OUTPUT_JSON_FILE, metavar="PREVIOUS_JSON",
+                        help="Repair a previous timetable instead of solving from scratch "
+                             f"(default: {OUTPUT_JSON_FILE}). Phase 2 is skipped to keep the timetable stable.")
+    parser.add_argument("--two-stage", action="store_true",
+                        help="Search times/instructors first, then match rooms per timeslot")
+    parser.add_argument("--grouping", choices=["greedy", "ffd", "optimal"], default="greedy",
+                        help="Lecture grouping: greedy in section order, first-fit-decreasing, or exact bin packing")
+    parser.add_argument("--iterations", type=int, default=20000, help="Phase 2 iterations")
+    parser.add_argument("--seed", type=int,
+                        help="Seed of the Phase 2 search; runs with the same seed, data and options give the "
+                             f"same timetable (default: a random seed, recorded in {OUTPUT_MANIFEST_FILE})")
+    parser.add_argument("--semester-start", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help=f"Also write per-section and per-instructor iCalendar/CSV timetables to "
+                             f"{OUTPUT_ENTITY_DIR}, as weekly events from this date")
+    parser.add_argument("--weeks", type=int, default=SEMESTER_WEEKS, help="Weeks in the semester")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="Write solver counters and per-phase times to this JSON file and print a summary")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Profile every solver phase with cProfile and write the reports to DIR")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="With --profile, also trace allocations per phase (tracemalloc; much slower)")
+    args = parser.parse_args()
+    if args.profile_memory and not args.profile:
+        parser.error("--profile-memory needs --profile DIR to write its report to")
+    return args
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    entity_options = {}
+    if args.semester_start:
+        entity_options = {"entity_dir": OUTPUT_ENTITY_DIR, "semester_start": args.semester_start, "weeks": args.weeks}
+    stats = SolverStats(hooks=[console_progress()], profile_dir=args.profile,
+                        profile=("cpu", "memory") if args.profile_memory else ("cpu",))
+    seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2 ** 32)
+    rng = random.Random(seed)
+    input_paths = dict(FILE_PATHS, **({"previous_timetable": args.repair} if args.repair else {}))
+    inputs = digest_inputs(input_paths)
+    final_solution, final_cost = None, None
+
     print("--- Running Data Loader ---")
     loader = DataLoader(FILE_PATHS)
     model_data = loader.load_all()
@@ -25,27 +78,54 @@ if __name__ == "__main__":
     if model_data:
         print("\n--- Data Loading Successful ---")
 
-        var_generator = VariableGenerator(model_data, max_group_capacity=75)
+        var_generator = VariableGenerator(model_data, max_group_capacity=75, grouping=args.grouping)
         all_variables = var_generator.generate_all_variables()
 
-        domain_builder = DomainBuilder(model_data)
+        domain_builder = DomainBuilder(model_data, stats)
         domain_builder.build_all_domains(all_variables)
 
-        if any(not v.domain.instructors or not v.domain.rooms or not v.domain.timeslot_sequences for v in all_variables):
+        feasibility_report = FeasibilityAnalyzer(all_variables, model_data).analyze()
+        print(feasibility_report)
+
+        if not feasibility_report.is_feasible:
             print("\n--- PROBLEM IS UNSOLVABLE: Cannot start solver. ---")
+        elif args.repair:
+            previous_schedule = load_previous_schedule(args.repair)
+            repair_solver = RepairSolver(all_variables, model_data, previous_schedule, stats=stats)
+            final_solution, repaired_state = repair_solver.solve()
+            if final_solution:
+                final_cost = CostEvaluator(model_data, stats).calculate_total_cost(final_solution, repaired_state)
+                save_solution(final_solution, model_data, OUTPUT_JSON_FILE, OUTPUT_FILE, OUTPUT_STORE_FILE,
+                              **entity_options)
         else:
-            solver = BacktrackingSolver(all_variables, model_data)
+            solver_class = TwoStageSolver if args.two_stage else BacktrackingSolver
+            solver = solver_class(all_variables, model_data, stats)
             phase1_solution, phase1_state = solver.solve()
 
             if phase1_solution:
-                evaluator = CostEvaluator(model_data)
+                evaluator = CostEvaluator(model_data, stats)
                 optimizer = IterativeSolver(
                     phase1_solution,
                     phase1_state,
                     evaluator,
                     model_data,
-                    iterations=20000
+                    iterations=args.iterations,
+                    rng=rng
                 )
                 final_solution = optimizer.optimize()
-                save_solution_to_json(final_solution, model_data, OUTPUT_JSON_FILE)
-                save_solution_to_csv(final_solution, model_data, OUTPUT_FILE)
+                final_cost = optimizer.current_cost
+                save_solution(final_solution, model_data, OUTPUT_JSON_FILE, OUTPUT_FILE, OUTPUT_STORE_FILE,
+                              **entity_options)
+
+        if final_solution:
+            save_run_manifest(OUTPUT_MANIFEST_FILE, seed, inputs, vars(args),
+                              [OUTPUT_JSON_FILE, OUTPUT_FILE, OUTPUT_STORE_FILE, entity_options.get("entity_dir")],
+                              {"sessions": len(final_solution), "final_cost": final_cost, "stats": stats.to_dict()})
+            print(f"Saved run manifest to {OUTPUT_MANIFEST_FILE} (seed {seed})")
+
+        if args.stats:
+            with open(args.stats, "w", encoding="utf-8") as f:
+                json.dump(stats.to_dict(), f, indent=2)
+            print(f"\n{stats.summary()}")
+        if stats.reports:
+            print(f"\nProfile reports: {', '.join(stats.reports)}")
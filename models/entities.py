@@ -8,6 +8,9 @@ class Course:
     def __repr__(self):
         return f"Course(id={self.course_id}, name={self.name})"
 
+# Space types that lectures may never use
+EXCLUDED_LECTURE_SPACES = {'Drawing Studio', 'Computer'}
+
 class Room:
     def __init__(self, room_id, capacity, room_type, type_of_space):
         self.room_id = room_id
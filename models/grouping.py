@@ -0,0 +1,80 @@
+# =====================================
+# models/grouping.py
+# Bin-packing of sections into lecture groups
+# =====================================
+
+import math
+from models.entities import EXCLUDED_LECTURE_SPACES
+
+
+def largest_lecture_room_capacity(rooms):
+    """Capacity of the biggest room a full (non-small) lecture group may use, see Domain._filter_rooms."""
+    capacities = [room.capacity for room in rooms.values()
+                  if room.room_type == 'Lecture' and room.type_of_space not in EXCLUDED_LECTURE_SPACES]
+    return max(capacities, default=0)
+
+
+def first_fit_decreasing(sections, capacity):
+    """Largest sections first, each into the first group with room left."""
+    groups, loads = [], []
+    for section in sorted(sections, key=lambda s: (-s.student_count, s.section_id)):
+        for i, load in enumerate(loads):
+            if load + section.student_count <= capacity:
+                groups[i].append(section)
+                loads[i] += section.student_count
+                break
+        else:
+            groups.append([section])
+            loads.append(section.student_count)
+    return groups
+
+
+def exact_bin_packing(sections, capacity, upper_bound=None):
+    """
+    Minimum number of groups by branch and bound. Only meant for small inputs: tries
+    k = lower bound, lower bound + 1, ... below `upper_bound` and returns the first packing found,
+    or None if none beats `upper_bound`.
+    """
+    items = sorted(sections, key=lambda s: (-s.student_count, s.section_id))
+    if any(s.student_count > capacity for s in items):
+        return None
+    lower_bound = max(1, math.ceil(sum(s.student_count for s in items) / capacity))
+    upper_bound = upper_bound if upper_bound is not None else len(items) + 1
+
+    for k in range(lower_bound, upper_bound):
+        groups, loads = [[] for _ in range(k)], [0] * k
+
+        def place(index):
+            if index == len(items):
+                return True
+            section, tried_loads = items[index], set()
+            for i in range(k):
+                # Symmetry breaking: groups with the same load are interchangeable
+                if loads[i] in tried_loads or loads[i] + section.student_count > capacity:
+                    continue
+                tried_loads.add(loads[i])
+                groups[i].append(section)
+                loads[i] += section.student_count
+                if place(index + 1):
+                    return True
+                groups[i].pop()
+                loads[i] -= section.student_count
+            return False
+
+        if place(0):
+            return [g for g in groups if g]
+    return None
+
+
+def pack_sections(sections, capacity, method="ffd", exact_limit=12):
+    """
+    Groups sections so that each group's student count fits `capacity`, using as few groups as possible.
+    method: "ffd" (first-fit-decreasing) or "optimal" (exact for up to `exact_limit` sections, FFD above).
+    Sections larger than `capacity` get a group of their own, like the greedy grouping.
+    """
+    oversized = [[s] for s in sections if s.student_count > capacity]
+    fitting = [s for s in sections if s.student_count <= capacity]
+    groups = first_fit_decreasing(fitting, capacity)
+    if method == "optimal" and 0 < len(fitting) <= exact_limit:
+        groups = exact_bin_packing(fitting, capacity, upper_bound=len(groups)) or groups
+    return [sorted(group, key=lambda s: s.section_id) for group in oversized + groups]
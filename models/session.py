@@ -1,8 +1,13 @@
+from models.grouping import largest_lecture_room_capacity, pack_sections
+
+def session_key(course_id, session_type, section_ids):
+    """Stable identity of a session across runs: (course, session type, sorted sections)."""
+    return (course_id, session_type, tuple(sorted(section_ids)))
+
 class ClassSession:
-    _session_counter = 0
-    def __init__(self, course, session_type, duration_slots):
-        ClassSession._session_counter += 1
-        self.session_id = f"S{ClassSession._session_counter}"
+    """session_id is assigned by whoever creates the sessions (VariableGenerator numbers them S1, S2, ... per run)."""
+    def __init__(self, session_id, course, session_type, duration_slots):
+        self.session_id = session_id
         self.course, self.session_type, self.duration_slots = course, session_type, duration_slots
         self.sections, self.preferred_instructors = [], set()
         self.total_student_count, self.is_small_group = 0, False
@@ -13,48 +18,82 @@ class ClassSession:
             self.total_student_count += section.student_count
     def set_small_group_flag(self, max_capacity):
         self.is_small_group = (self.total_student_count < max_capacity)
+    def get_key(self):
+        return session_key(self.course.course_id, self.session_type, [s.section_id for s in self.sections])
     def get_group_name(self):
         return self.sections[0].section_id if self.session_type == 'Lab' else f"Group ({','.join([s.section_id for s in self.sections])})"
     def __repr__(self):
         return f"ClassSession(id={self.session_id}, desc='{self.session_type[:3].upper()}-{self.course.course_id}', students={self.total_student_count})"
 
 class VariableGenerator:
-    def __init__(self, model_data, max_group_capacity=75):
+    """
+    grouping: "greedy" (section_id order), "ffd" (first-fit-decreasing) or "optimal" (exact bin packing for small inputs).
+    fixed_lecture_groups: {course_id: [section_id lists]} of an existing timetable; lectures of those sections keep
+    these groups instead of being regrouped, and only the sections they do not cover are grouped as above.
+    """
+    def __init__(self, model_data, max_group_capacity=75, grouping="greedy", fixed_lecture_groups=None):
         self.model_data, self.max_capacity = model_data, max_group_capacity
-        self.all_variables = []
+        self.grouping = grouping
+        self.fixed_lecture_groups = fixed_lecture_groups or {}
+        self.all_variables = []  # In creation order; session IDs follow it
+        self.greedy_lecture_groups = self.lecture_groups = 0
     def generate_all_variables(self):
-        print(f"\n--- Starting Variable Generation (Max Capacity={self.max_capacity}) ---")
-        ClassSession._session_counter = 0
+        print(f"\n--- Starting Variable Generation (Max Capacity={self.max_capacity}, Grouping={self.grouping}) ---")
+        self.all_variables = []
         for req in self.model_data['available_courses']:
             try:
                 course_obj = self.model_data['courses'][req.course_id]
             except KeyError: continue
-            matching_sections = [sec for sec in self.model_data['sections'].values() if
-                                 (sec.department == req.department and sec.level == req.level and
-                                  (req.specialization == 'Core' or req.specialization == sec.specialization))]
+            # Sorted, so sessions (and their IDs) do not depend on the row order of the sections file
+            matching_sections = sorted((sec for sec in self.model_data['sections'].values() if
+                                        (sec.department == req.department and sec.level == req.level and
+                                         (req.specialization == 'Core' or req.specialization == sec.specialization))),
+                                       key=lambda s: s.section_id)
             if not matching_sections: continue
             if course_obj.lecture_duration > 0: self._create_lecture_variables(course_obj, matching_sections, req)
             if course_obj.lab_duration > 0: self._create_lab_variables(course_obj, matching_sections, req)
+        if self.grouping != "greedy":
+            saved = self.greedy_lecture_groups - self.lecture_groups
+            print(f"Lecture grouping: {self.lecture_groups} groups vs {self.greedy_lecture_groups} greedy ({saved} fewer variables).")
         print(f"--- Variable Generation Complete: {len(self.all_variables)} total sessions. ---")
         return self.all_variables
+    def _new_session(self, course_obj, session_type, duration_slots):
+        session = ClassSession(f"S{len(self.all_variables) + 1}", course_obj, session_type, duration_slots)
+        self.all_variables.append(session)
+        return session
     def _create_lecture_variables(self, course_obj, sections, request):
-        sections_sorted = sorted(sections, key=lambda s: s.section_id)
-        current_group = None
-        for section in sections_sorted:
-            if current_group is None or (current_group.total_student_count + section.student_count) > self.max_capacity:
-                if current_group:
-                    current_group.set_small_group_flag(self.max_capacity)
-                    self.all_variables.append(current_group)
-                current_group = ClassSession(course_obj, 'Lecture', course_obj.lecture_duration)
-                if request.preferred_prof: current_group.preferred_instructors.add(request.preferred_prof)
-            current_group.add_section(section)
-        if current_group:
-            current_group.set_small_group_flag(self.max_capacity)
-            self.all_variables.append(current_group)
+        by_id = {s.section_id: s for s in sections}
+        fixed = [[by_id[section_id] for section_id in group]
+                 for group in self.fixed_lecture_groups.get(course_obj.course_id, [])
+                 if group and all(section_id in by_id for section_id in group)]
+        covered = {s.section_id for group in fixed for s in group}
+        sections = [s for s in sections if s.section_id not in covered]
+        greedy_groups = self._greedy_groups(sections)
+        self.greedy_lecture_groups += len(fixed) + len(greedy_groups)
+        if self.grouping == "greedy":
+            groups = greedy_groups
+        else:
+            capacity = min(self.max_capacity, largest_lecture_room_capacity(self.model_data['rooms']) or self.max_capacity)
+            groups = pack_sections(sections, capacity, method=self.grouping)
+        groups = fixed + groups
+        self.lecture_groups += len(groups)
+        for group in groups:
+            session = self._new_session(course_obj, 'Lecture', course_obj.lecture_duration)
+            if request.preferred_prof: session.preferred_instructors.add(request.preferred_prof)
+            for section in group: session.add_section(section)
+            session.set_small_group_flag(self.max_capacity)
+    def _greedy_groups(self, sections):
+        groups, load = [], 0
+        for section in sorted(sections, key=lambda s: s.section_id):
+            if not groups or load + section.student_count > self.max_capacity:
+                groups.append([])
+                load = 0
+            groups[-1].append(section)
+            load += section.student_count
+        return groups
     def _create_lab_variables(self, course_obj, sections, request):
         for section in sections:
-            lab_session = ClassSession(course_obj, 'Lab', course_obj.lab_duration)
+            lab_session = self._new_session(course_obj, 'Lab', course_obj.lab_duration)
             lab_session.add_section(section)
             lab_session.set_small_group_flag(self.max_capacity)
             lab_session.preferred_instructors = request.preferred_assi
-            self.all_variables.append(lab_session)
@@ -1,54 +1,51 @@
-import pandas as pd
+import csv
+import functools
+import hashlib
+import io
 import json
-from datetime import datetime
+import multiprocessing
+import os
+import platform
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from timetable_store import StoreBuilder, temp_path_for
 
-def save_solution_to_csv(solution, model_data, filename):
-    timeslots_map = model_data['timeslots']
-    output_data = []
-    for assignment in solution:
-        session = assignment.session
-        first_slot_id = assignment.timeslot_sequence[0]
-        last_slot_id = assignment.timeslot_sequence[-1]
-        start_time = timeslots_map[first_slot_id].start_time
-        end_time = timeslots_map[last_slot_id].end_time
-        day = timeslots_map[first_slot_id].day
-        section_ids = ", ".join([s.section_id for s in session.sections])
-        output_data.append({
-            "Day": day,
-            "StartTime": start_time,
-            "EndTime": end_time,
-            "CourseID": session.course.course_id,
-            "CourseName": session.course.name,
-            "Type": session.session_type,
-            "Instructor": assignment.instructor.name,
-            "Room": assignment.room.room_id,
-            "Sections": section_ids,
-            "StudentCount": session.total_student_count
-        })
-    pd.DataFrame(output_data).sort_values(by=["Day", "StartTime"]).to_csv(filename, index=False)
-    print(f"Saved timetable to {filename}")
+# Columns of the CSV timetable and the schedule entry field each one comes from
+CSV_COLUMNS = [
+    ("Day", "day"),
+    ("StartTime", "start_time"),
+    ("EndTime", "end_time"),
+    ("CourseID", "course_id"),
+    ("CourseName", "course_name"),
+    ("Type", "session_type"),
+    ("Instructor", "instructor_name"),
+    ("Room", "room_id"),
+    ("Sections", "sections"),
+    ("StudentCount", "student_count"),
+]
 
-def save_solution_to_json(solution, model_data, filename):
+
+def iter_schedule_entries(solution, model_data):
     """
-    Save the timetable solution to a JSON file with complete data structure.
-    Includes courses, instructors, sections, rooms, timeslots, and schedule entries.
+    Projects every assignment to its schedule entry exactly once, in timetable order
+    (day, then start time, then session key, so the same timetable is always written the
+    same way). Only the sort keys are materialized up front; entries are produced one at
+    a time, so writers can stream them to disk.
     """
     timeslots_map = model_data['timeslots']
-
-    # Build schedule entries
-    schedule_entries = []
-    for assignment in solution:
+    order = sorted(range(len(solution)), key=lambda i: (timeslots_map[solution[i].timeslot_sequence[0]].day,
+                                                        timeslots_map[solution[i].timeslot_sequence[0]].start_time,
+                                                        solution[i].session.get_key()))
+    for i in order:
+        assignment = solution[i]
         session = assignment.session
-        first_slot_id = assignment.timeslot_sequence[0]
-        last_slot_id = assignment.timeslot_sequence[-1]
-        start_time = timeslots_map[first_slot_id].start_time
-        end_time = timeslots_map[last_slot_id].end_time
-        day = timeslots_map[first_slot_id].day
-
-        schedule_entries.append({
-            "day": day,
-            "start_time": start_time,
-            "end_time": end_time,
+        first_slot = timeslots_map[assignment.timeslot_sequence[0]]
+        last_slot = timeslots_map[assignment.timeslot_sequence[-1]]
+        yield {
+            "day": first_slot.day,
+            "start_time": first_slot.start_time,
+            "end_time": last_slot.end_time,
             "course_id": session.course.course_id,
             "course_name": session.course.name,
             "session_type": session.session_type,
@@ -60,76 +57,469 @@ def save_solution_to_json(solution, model_data, filename):
             "sections": [s.section_id for s in session.sections],
             "student_count": session.total_student_count,
             "timeslot_ids": assignment.timeslot_sequence
-        })
+        }
+
+
+class _AtomicFile:
+    """Writes to a uniquely named temporary file and renames it on success, so readers (e.g.
+    the API's hot reload) never see a half-written file and concurrent writers never share one."""
+
+    def __init__(self, filename, newline=None):
+        self.filename = filename
+        self.temp_filename = temp_path_for(filename)
+        self.file = open(self.temp_filename, 'x', encoding='utf-8', newline=newline)
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.temp_filename, self.filename)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.temp_filename)
+
+
+class CsvScheduleWriter:
+    """Streams schedule entries as rows of the CSV timetable."""
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def open(self, model_data, metadata):
+        self.output = _AtomicFile(self.filename, newline='')
+        self.writer = csv.writer(self.output.file, lineterminator='\n')
+        self.writer.writerow([column for column, _ in CSV_COLUMNS])
+
+    def write(self, entry):
+        self.writer.writerow([", ".join(entry[field]) if field == "sections" else entry[field]
+                              for _, field in CSV_COLUMNS])
+
+    def close(self):
+        self.output.commit()
+        print(f"Saved timetable to {self.filename}")
+
+    def abort(self):
+        self.output.abort()
+
+
+class JsonScheduleWriter:
+    """
+    Streams the full timetable_data document: metadata and entity tables first, then the
+    schedule entries as they arrive. Every record is written on its own line.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def open(self, model_data, metadata):
+        self.output = _AtomicFile(self.filename)
+        self.count = 0
+        write = self.output.file.write
+        write('{\n  "metadata": ' + json.dumps(metadata, ensure_ascii=False))
+        for key, records in entity_tables(model_data).items():
+            write(f',\n  "{key}": [')
+            self._write_records(records)
+            write(']')
+        write(',\n  "schedule": [')
+
+    def write(self, entry):
+        self.output.file.write(("\n    " if self.count == 0 else ",\n    ") + json.dumps(entry, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        self.output.file.write(('\n  ]' if self.count else ']') + '\n}\n')
+        self.output.commit()
+        print(f"Saved timetable data to {self.filename}")
+
+    def abort(self):
+        self.output.abort()
+
+    def _write_records(self, records):
+        first = True
+        for record in records:
+            self.output.file.write(("\n    " if first else ",\n    ") + json.dumps(record, ensure_ascii=False))
+            first = False
+        if not first:
+            self.output.file.write('\n  ')
+
+
+class StoreScheduleWriter:
+    """
+    Compiles the timetable into the binary store the API maps (see timetable_store.py):
+    a shared string table with entity and schedule rows referencing it by integer.
+    Records are encoded as they arrive, so memory grows with the packed rows rather than
+    with the entry dicts. Must come after the JsonScheduleWriter of `json_filename`, whose
+    version and (mtime, size) the store records so the API can load it without reading the JSON.
+    """
+
+    def __init__(self, filename, json_filename):
+        self.filename = filename
+        self.json_filename = json_filename
+
+    def open(self, model_data, metadata):
+        self.metadata = metadata
+        self.builder = StoreBuilder()
+        for key, records in entity_tables(model_data).items():
+            self.builder.extend(key, records)
+
+    def write(self, entry):
+        self.builder.add("schedule", entry)
+
+    def close(self):
+        stat = os.stat(self.json_filename)
+        digest = hashlib.sha1()
+        with open(self.json_filename, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.builder.write(self.filename, digest.hexdigest()[:16], (stat.st_mtime_ns, stat.st_size), self.metadata)
+        self.builder = None
+        print(f"Saved timetable store to {self.filename}")
+
+    def abort(self):
+        self.builder = None
+
+
+# ---------- Per-entity timetables ----------
+
+SEMESTER_WEEKS = 14
+ENTITY_CHUNK_SIZE = 200  # Entity files rendered per pool task; a single chunk is rendered inline
+WEEKDAYS = {name: index for index, name in enumerate(  # datetime.weekday() numbering
+    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])}
+
+
+def _entity_filename(entity_id):
+    return re.sub(r"[^A-Za-z0-9._-]", "_", entity_id)
+
+
+def _ics_text(value):
+    return str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line):
+    """Folds a content line to 75 octets as RFC 5545 requires (continuations start with a space)."""
+    if len(line) <= 75 and line.isascii():
+        return line
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # Never split a UTF-8 sequence
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+
+@functools.lru_cache(maxsize=None)
+def _ics_time(clock_time):
+    return datetime.strptime(clock_time, "%I:%M %p").strftime("%H%M00")
+
+
+@functools.lru_cache(maxsize=None)
+def _first_date(semester_start, day):
+    """YYYYMMDD of the first `day` on or after the semester start (of the start itself for day=None)."""
+    if day is None:
+        return semester_start.strftime("%Y%m%d")
+    if day not in WEEKDAYS:
+        raise ValueError(f"Unknown day '{day}' in the timetable")
+    return (semester_start + timedelta(days=(WEEKDAYS[day] - semester_start.weekday()) % 7)).strftime("%Y%m%d")
+
+
+def render_event(entry, semester_start, weeks):
+    """
+    The VEVENT of one schedule entry: a weekly recurring event starting on the first
+    matching weekday on or after `semester_start`. Times are floating (local) times, and
+    DTSTAMP is derived from the semester start so unchanged timetables render identically.
+    """
+    first_day = _first_date(semester_start, entry["day"])
+    uid = (f"{_entity_filename('-'.join([entry['course_id'], entry['session_type'], *entry['sections']]))}"
+           f"-{entry['timeslot_ids'][0]}@timetable-scheduler")
+    summary = _ics_text(f"{entry['course_id']} {entry['course_name']} ({entry['session_type']})")
+    description = _ics_text(f"Instructor: {entry['instructor_name']}\nSections: {', '.join(entry['sections'])}\n"
+                            f"Students: {entry['student_count']}")
+    # Only the free-text lines can exceed 75 octets and need folding
+    return (f"BEGIN:VEVENT\r\n{_ics_fold('UID:' + uid)}\r\n"
+            f"DTSTAMP:{_first_date(semester_start, None)}T000000Z\r\n"
+            f"DTSTART:{first_day}T{_ics_time(entry['start_time'])}\r\n"
+            f"DTEND:{first_day}T{_ics_time(entry['end_time'])}\r\n"
+            f"RRULE:FREQ=WEEKLY;COUNT={weeks}\r\n"
+            f"{_ics_fold('SUMMARY:' + summary)}\r\n"
+            f"{_ics_fold('LOCATION:' + _ics_text(entry['room_id']))}\r\n"
+            f"{_ics_fold('DESCRIPTION:' + description)}\r\n"
+            "END:VEVENT\r\n")
+
+
+def render_ics(title, entries, semester_start, weeks, events=None):
+    """
+    An iCalendar file with one event per schedule entry (see render_event). `events` caches
+    rendered VEVENTs by entry identity, since a lecture appears in several sections' calendars.
+    """
+    events = {} if events is None else events
+    parts = ["BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Timetable Scheduler//EN\r\nCALSCALE:GREGORIAN\r\n",
+             _ics_fold(f"X-WR-CALNAME:{_ics_text(title)}") + "\r\n"]
+    for entry in entries:
+        event = events.get(id(entry))
+        if event is None:
+            event = events[id(entry)] = render_event(entry, semester_start, weeks)
+        parts.append(event)
+    parts.append("END:VCALENDAR\r\n")
+    return "".join(parts)
+
 
-    # Build courses data
-    courses_data = []
-    for course_id, course in model_data['courses'].items():
-        courses_data.append({
+def render_csv(entries, rows=None):
+    """The entries as a CSV timetable with the same columns as the full one. `rows` caches lines like `events`."""
+    rows = {} if rows is None else rows
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow([column for column, _ in CSV_COLUMNS])
+    header = output.getvalue()
+    parts = [header]
+    for entry in entries:
+        row = rows.get(id(entry))
+        if row is None:
+            output.seek(0)
+            output.truncate()
+            writer.writerow([", ".join(entry[field]) if field == "sections" else entry[field]
+                             for _, field in CSV_COLUMNS])
+            row = rows[id(entry)] = output.getvalue()
+        parts.append(row)
+    return "".join(parts)
+
+
+def _write_if_changed(path, content):
+    """Writes `content` atomically unless the file already holds exactly it. Returns True if written."""
+    data = content.encode("utf-8")
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    temp_path = temp_path_for(path)
+    try:
+        with open(temp_path, 'xb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return True
+
+
+def _render_entity_chunk(tasks, formats, semester_start, weeks):
+    """Pool task: renders a chunk of (base path, title, entries) in every format. Returns the files written."""
+    written, events, rows = [], {}, {}
+    for base_path, title, entries in tasks:
+        if "ics" in formats and _write_if_changed(f"{base_path}.ics",
+                                                  render_ics(title, entries, semester_start, weeks, events)):
+            written.append(f"{base_path}.ics")
+        if "csv" in formats and _write_if_changed(f"{base_path}.csv", render_csv(entries, rows)):
+            written.append(f"{base_path}.csv")
+    return written
+
+
+class EntityTimetableWriter:
+    """
+    Personal timetables: one iCalendar and/or CSV file per section (`<dir>/sections/<id>`)
+    and per instructor (`<dir>/instructors/<id>`). Entries are grouped by entity as they
+    stream past, so the timetable is walked once instead of once per entity. The files are
+    rendered in a process pool on close; only files whose content changed are rewritten,
+    and files of entities no longer in the timetable are removed.
+    """
+
+    KINDS = ("sections", "instructors")
+
+    def __init__(self, out_dir, semester_start, weeks=SEMESTER_WEEKS, formats=("ics", "csv"), max_workers=None):
+        if weeks < 1:
+            raise ValueError("A semester has at least one week")
+        self.out_dir = out_dir
+        self.semester_start = semester_start
+        self.weeks = weeks
+        self.formats = tuple(formats)
+        self.max_workers = max_workers
+
+    def open(self, model_data, metadata):
+        self.entries = {kind: {} for kind in self.KINDS}
+        self.titles = {"sections": {section_id: f"Section {section_id}" for section_id in model_data['sections']},
+                       "instructors": {inst.instructor_id: inst.name for inst in model_data['instructors'].values()}}
+
+    def write(self, entry):
+        for section_id in entry["sections"]:
+            self.entries["sections"].setdefault(section_id, []).append(entry)
+        self.entries["instructors"].setdefault(entry["instructor_id"], []).append(entry)
+
+    def close(self):
+        tasks = []
+        for kind in self.KINDS:
+            os.makedirs(os.path.join(self.out_dir, kind), exist_ok=True)
+            for entity_id, entries in self.entries[kind].items():
+                base_path = os.path.join(self.out_dir, kind, _entity_filename(entity_id))
+                tasks.append((base_path, self.titles[kind].get(entity_id, entity_id), entries))
+
+        chunks = [tasks[i:i + ENTITY_CHUNK_SIZE] for i in range(0, len(tasks), ENTITY_CHUNK_SIZE)]
+        args = (self.formats, self.semester_start, self.weeks)
+        workers = min(self.max_workers or os.cpu_count() or 1, len(chunks))
+        if workers <= 1:
+            written = [path for chunk in chunks for path in _render_entity_chunk(chunk, *args)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(_render_entity_chunk, chunk, *args) for chunk in chunks]
+                written = [path for future in futures for path in future.result()]
+
+        expected = {f"{base_path}.{extension}" for base_path, _, _ in tasks for extension in self.formats}
+        removed = 0
+        for kind in self.KINDS:
+            directory = os.path.join(self.out_dir, kind)
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if os.path.splitext(name)[1] in (".ics", ".csv") and path not in expected:
+                    os.remove(path)
+                    removed += 1
+        print(f"Saved {len(tasks)} personal timetables to {self.out_dir} "
+              f"({len(written)} files written, {len(expected) - len(written)} unchanged, {removed} removed)")
+
+    def abort(self):
+        self.entries = {kind: {} for kind in self.KINDS}
+
+
+def entity_tables(model_data):
+    """The course, instructor, section, room and timeslot tables of the JSON document, as lazy record streams."""
+    return {
+        "courses": ({
             "course_id": course.course_id,
             "name": course.name,
             "lecture_duration": course.lecture_duration,
             "lab_duration": course.lab_duration,
             "lab_type": course.lab_type
-        })
-
-    # Build instructors data
-    instructors_data = []
-    for instructor_id, instructor in model_data['instructors'].items():
-        instructors_data.append({
+        } for course in model_data['courses'].values()),
+        "instructors": ({
             "instructor_id": instructor.instructor_id,
             "name": instructor.name,
             "qualified_courses": list(instructor.qualified_courses),
             "not_preferred_slots": list(instructor.not_preferred_slots)
-        })
-
-    # Build sections data
-    sections_data = []
-    for section_id, section in model_data['sections'].items():
-        sections_data.append({
+        } for instructor in model_data['instructors'].values()),
+        "sections": ({
             "section_id": section.section_id,
             "department": section.department,
             "level": section.level,
             "specialization": section.specialization,
             "student_count": section.student_count
-        })
-
-    # Build rooms data
-    rooms_data = []
-    for room_id, room in model_data['rooms'].items():
-        rooms_data.append({
+        } for section in model_data['sections'].values()),
+        "rooms": ({
             "room_id": room.room_id,
             "capacity": room.capacity,
             "room_type": room.room_type,
             "type_of_space": room.type_of_space
-        })
-
-    # Build timeslots data
-    timeslots_data = []
-    for slot_id, timeslot in timeslots_map.items():
-        timeslots_data.append({
+        } for room in model_data['rooms'].values()),
+        "timeslots": ({
             "slot_id": timeslot.slot_id,
             "day": timeslot.day,
             "start_time": timeslot.start_time,
             "end_time": timeslot.end_time
-        })
-
-    # Combine all data
-    timetable_data = {
-        "metadata": {
-            "generated_at": datetime.now().isoformat(),
-            "total_sessions": len(schedule_entries)
-        },
-        "courses": courses_data,
-        "instructors": instructors_data,
-        "sections": sections_data,
-        "rooms": rooms_data,
-        "timeslots": timeslots_data,
-        "schedule": sorted(schedule_entries, key=lambda x: (x["day"], x["start_time"]))
+        } for timeslot in model_data['timeslots'].values()),
     }
 
-    # Write to JSON file
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(timetable_data, f, indent=2, ensure_ascii=False)
 
-    print(f"Saved timetable data to {filename}")
+def export_solution(solution, model_data, writers):
+    """
+    Single-pass export: each schedule entry is built once and handed to every writer.
+    If anything fails, all writers are aborted and no output file is replaced.
+    """
+    metadata = {"generated_at": datetime.now().isoformat(), "total_sessions": len(solution)}
+    opened = []
+    try:
+        for writer in writers:
+            writer.open(model_data, metadata)
+            opened.append(writer)
+        for entry in iter_schedule_entries(solution, model_data):
+            for writer in writers:
+                writer.write(entry)
+    except BaseException:
+        for writer in opened:
+            writer.abort()
+        raise
+    for writer in writers:
+        writer.close()
+
+
+def save_solution(solution, model_data, json_filename=None, csv_filename=None, store_filename=None,
+                  entity_dir=None, semester_start=None, weeks=SEMESTER_WEEKS):
+    """
+    Writes the JSON and/or CSV timetable in one pass over the solution, plus the
+    binary store next to the JSON if `store_filename` is given and the personal
+    section/instructor timetables under `entity_dir` (which needs `semester_start`).
+    """
+    writers = []
+    if json_filename:
+        writers.append(JsonScheduleWriter(json_filename))
+    if csv_filename:
+        writers.append(CsvScheduleWriter(csv_filename))
+    if store_filename:
+        if not json_filename:
+            raise ValueError("The timetable store is written alongside the JSON file")
+        writers.append(StoreScheduleWriter(store_filename, json_filename))
+    if entity_dir:
+        if semester_start is None:
+            raise ValueError("Personal timetables need the semester start date")
+        writers.append(EntityTimetableWriter(entity_dir, semester_start, weeks))
+    export_solution(solution, model_data, writers)
+
+
+def manifest_filename(json_filename):
+    """Where the run manifest of a timetable goes: timetable_data.json -> timetable_data.manifest.json"""
+    return f"{os.path.splitext(json_filename)[0]}.manifest.json"
+
+
+def digest_inputs(input_paths):
+    """{name: {"path", "sha256", "bytes"}} of the input files, for save_run_manifest.
+    Taken before solving, since a repair run overwrites the timetable it read."""
+    digests = {}
+    for name, path in input_paths.items():
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digests[name] = {"path": path, "sha256": digest.hexdigest(), "bytes": os.path.getsize(path)}
+    return digests
+
+
+def save_run_manifest(filename, seed, inputs, options, outputs, results=None):
+    """
+    Records what a solver run needs to be repeated and compared: the seed, the input
+    digests (see digest_inputs), the solver options and the files written, plus optional
+    results (cost, solver stats). Two runs with the same seed, inputs and options (and no
+    time budget) produce the same timetable.
+    """
+    manifest = {
+        "generated_at": datetime.now().isoformat(),
+        "seed": seed,
+        "inputs": inputs,
+        "options": options,
+        "outputs": [path for path in outputs if path],
+        "results": results or {},
+        "python": platform.python_version()
+    }
+    target = _AtomicFile(filename)
+    try:
+        json.dump(manifest, target.file, ensure_ascii=False, indent=2, default=str)
+        target.file.write("\n")
+    except BaseException:
+        target.abort()
+        raise
+    target.commit()
+    return manifest
+
+
+def save_solution_to_csv(solution, model_data, filename):
+    export_solution(solution, model_data, [CsvScheduleWriter(filename)])
+
+
+def save_solution_to_json(solution, model_data, filename):
+    """
+    Save the timetable solution to a JSON file with complete data structure.
+    Includes courses, instructors, sections, rooms, timeslots, and schedule entries.
+    """
+    export_solution(solution, model_data, [JsonScheduleWriter(filename)])
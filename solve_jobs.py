@@ -0,0 +1,360 @@
+"""
+Solve Job Manager
+Runs the full scheduling pipeline as background jobs in a bounded pool of worker processes
+"""
+
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+
+
+DEFAULT_OPTIONS = {
+    "iterations": 20000,        # Phase 2 iterations
+    "budget_seconds": None,     # Phase 2 time budget
+    "seed": None,
+    "max_group_capacity": 75,
+    "grouping": "greedy",
+    "two_stage": False,
+    "publish": True,            # Publish the result to the serving layer on success
+}
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+def validate_options(options):
+    """Merges user options over DEFAULT_OPTIONS, raising ValueError on bad values."""
+    if options is not None and not isinstance(options, dict):
+        raise ValueError("'options' must be an object")
+    options = dict(options or {})
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown option(s): {', '.join(sorted(unknown))}")
+    merged = {**DEFAULT_OPTIONS, **options}
+    # bool is a subclass of int, so true/false from JSON must be ruled out explicitly
+    for name in ("iterations", "max_group_capacity"):
+        if not _is_number(merged[name], int) or merged[name] < 0:
+            raise ValueError(f"'{name}' must be a non-negative integer")
+    if merged["budget_seconds"] is not None and (not _is_number(merged["budget_seconds"], (int, float))
+                                                 or merged["budget_seconds"] <= 0):
+        raise ValueError("'budget_seconds' must be a positive number")
+    if merged["seed"] is not None and not _is_number(merged["seed"], int):
+        raise ValueError("'seed' must be an integer")
+    for name in ("two_stage", "publish"):
+        if not isinstance(merged[name], bool):
+            raise ValueError(f"'{name}' must be true or false")
+    if merged["grouping"] not in ("greedy", "ffd", "optimal"):
+        raise ValueError("'grouping' must be one of greedy, ffd, optimal")
+    return merged
+
+
+def _is_number(value, types):
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def run_solve_job(file_paths, options, output_dir, updates):
+    """
+    Worker process entry point: loader -> VariableGenerator -> DomainBuilder ->
+    feasibility -> Phase 1 -> Phase 2 -> export. Progress is sent through the `updates` pipe
+    as dicts with any of: phase, status, best_cost, iteration, sessions, result, error.
+    """
+    # Imported here so the parent (API) process does not pay for the solver imports
+    import random
+    from data_loader.loader import DataLoader
+    from models.session import VariableGenerator
+    from csp.domain import DomainBuilder
+    from csp.feasibility import FeasibilityAnalyzer
+    from csp.solver_phase1 import BacktrackingSolver
+    from csp.solver_two_stage import TwoStageSolver
+    from csp.solver_phase2 import CostEvaluator, IterativeSolver
+    from csp.stats import SolverStats
+    from output.export import digest_inputs, manifest_filename, save_run_manifest, save_solution
+
+    def report(**fields):
+        updates.send(fields)
+
+    def on_event(event, data):
+        if event == "progress":
+            report(iteration=data["iteration"], best_cost=data["cost"])
+
+    stats = SolverStats(hooks=[on_event])
+    try:
+        # Recorded in the run manifest, so an unseeded job can still be repeated exactly
+        seed = options["seed"] if options["seed"] is not None else random.SystemRandom().randrange(2 ** 32)
+        inputs = digest_inputs(file_paths)
+
+        report(phase="loading")
+        model_data = DataLoader(file_paths).load_all()
+        if not model_data:
+            raise RuntimeError("Input data could not be loaded (see validation errors in the worker log)")
+
+        report(phase="generating_variables")
+        variables = VariableGenerator(model_data, max_group_capacity=options["max_group_capacity"],
+                                      grouping=options["grouping"]).generate_all_variables()
+
+        report(phase="building_domains", sessions=len(variables))
+        DomainBuilder(model_data, stats).build_all_domains(variables)
+
+        report(phase="feasibility")
+        feasibility_report = FeasibilityAnalyzer(variables, model_data).analyze()
+        if not feasibility_report.is_feasible:
+            raise RuntimeError(str(feasibility_report))
+
+        report(phase="phase1")
+        solver_class = TwoStageSolver if options["two_stage"] else BacktrackingSolver
+        solution, state = solver_class(variables, model_data, stats).solve()
+        if not solution:
+            raise RuntimeError("Phase 1 could not find a valid timetable")
+
+        evaluator = CostEvaluator(model_data, stats)
+        optimizer = IterativeSolver(
+            solution, state, evaluator, model_data,
+            iterations=options["iterations"],
+            time_limit=options["budget_seconds"],
+            rng=random.Random(seed))
+        report(phase="phase2", best_cost=optimizer.current_cost)
+        final_solution = optimizer.optimize()
+
+        report(phase="exporting", best_cost=optimizer.current_cost)
+        os.makedirs(output_dir, exist_ok=True)
+        json_file = os.path.join(output_dir, "timetable_data.json")
+        csv_file = os.path.join(output_dir, "final_timetable.csv")
+        save_solution(final_solution, model_data, json_file, csv_file)
+        manifest_file = manifest_filename(json_file)
+        save_run_manifest(manifest_file, seed, inputs, options, [json_file, csv_file],
+                          {"sessions": len(final_solution), "final_cost": optimizer.current_cost,
+                           "stats": stats.to_dict()})
+
+        report(phase="done", status="succeeded", best_cost=optimizer.current_cost,
+               result={"json_file": json_file, "csv_file": csv_file, "manifest_file": manifest_file,
+                       "seed": seed, "sessions": len(final_solution), "final_cost": optimizer.current_cost,
+                       "stats": stats.to_dict()})
+    except Exception as e:
+        traceback.print_exc()
+        report(status="failed", error=str(e))
+    finally:
+        updates.close()
+
+
+class SolveJobManager:
+    """
+    Queues solve jobs and runs at most `max_workers` of them at a time, each in its own
+    process, so request threads are never blocked and a running job can be cancelled
+    by terminating its process. Every job reports through its own pipe, so killing a
+    worker cannot corrupt the channel of another. A supervisor thread collects updates.
+
+    Output directories (output_root/<job_id>) are only kept for succeeded jobs: those of
+    failed and cancelled jobs are deleted once their worker has exited. Beyond
+    `max_finished_jobs` finished jobs, the oldest are dropped together with their outputs.
+    """
+
+    def __init__(self, default_file_paths, output_root, max_workers=1, allowed_root=None, on_success=None,
+                 max_finished_jobs=50):
+        self.default_file_paths = dict(default_file_paths)
+        self.output_root = output_root
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+        # Input overrides must resolve inside this directory
+        self.allowed_root = os.path.realpath(allowed_root or os.path.dirname(next(iter(default_file_paths.values()))))
+        self.on_success = on_success  # on_success(job) runs in the supervisor thread
+        self._context = multiprocessing.get_context("spawn")
+        self._jobs = {}
+        self._pending = []
+        self._processes = {}    # job_id -> (process, reader connection)
+        self._terminated = []   # (job_id, process) of cancelled workers that may not have exited yet
+        self._lock = threading.Lock()
+        self._supervisor = None
+
+    # ---------- Public API ----------
+
+    def submit(self, inputs=None, options=None):
+        file_paths = self._resolve_inputs(inputs or {})
+        options = validate_options(options)
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "phase": "queued",
+            "options": options,
+            "inputs": file_paths,
+            "best_cost": None,
+            "iteration": None,
+            "sessions": None,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "result": None,
+            "published": False,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._pending.append(job_id)
+            self._ensure_supervisor()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public_view(job) if job else None
+
+    def list(self):
+        with self._lock:
+            return [self._public_view(job) for job in self._jobs.values()]
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job. Returns the job, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == "queued":
+                self._pending.remove(job_id)
+            elif job["status"] == "running":
+                process, reader = self._processes.pop(job_id)
+                process.terminate()
+                reader.close()
+                self._terminated.append((job_id, process))
+            else:
+                return self._public_view(job)
+            job["status"] = "cancelled"
+            job["finished_at"] = datetime.now().isoformat()
+            return self._public_view(job)
+
+    # ---------- Supervisor ----------
+
+    def _ensure_supervisor(self):
+        if self._supervisor is None:
+            self._supervisor = threading.Thread(target=self._supervise, name="solve-job-supervisor", daemon=True)
+            self._supervisor.start()
+
+    def _supervise(self):
+        while True:
+            with self._lock:
+                readers = {reader: job_id for job_id, (_, reader) in self._processes.items()}
+            if not readers:
+                time.sleep(0.2)
+            else:
+                try:
+                    for reader in wait(list(readers), timeout=0.2):
+                        while reader.poll():
+                            self._apply_update(readers[reader], reader.recv())
+                except (EOFError, OSError):
+                    pass  # Worker finished or was cancelled; reaped below
+            self._reap_processes()
+            self._discard_outputs()
+            self._start_pending()
+
+    def _start_pending(self):
+        with self._lock:
+            while self._pending and len(self._processes) < self.max_workers:
+                job_id = self._pending.pop(0)
+                job = self._jobs[job_id]
+                reader, writer = self._context.Pipe(duplex=False)
+                process = self._context.Process(
+                    target=run_solve_job, name=f"solve-{job_id}", daemon=True,
+                    args=(job["inputs"], job["options"], os.path.join(self.output_root, job_id), writer))
+                process.start()
+                writer.close()  # The worker holds the only write end now
+                self._processes[job_id] = (process, reader)
+                job["status"], job["started_at"] = "running", datetime.now().isoformat()
+                job["_started"] = time.time()
+
+    def _reap_processes(self):
+        with self._lock:
+            finished = [(job_id, process, reader) for job_id, (process, reader) in self._processes.items()
+                        if not process.is_alive()]
+            for job_id, _, _ in finished:
+                del self._processes[job_id]
+        for job_id, process, reader in finished:
+            # A worker may send its final update and exit between two polls: apply what is left
+            try:
+                while reader.poll():
+                    self._apply_update(job_id, reader.recv())
+            except (EOFError, OSError):
+                pass
+            reader.close()
+            with self._lock:
+                job = self._jobs[job_id]
+                if job["status"] == "running":
+                    # Died without reporting a result (e.g. killed or crashed)
+                    job["status"], job["error"] = "failed", f"Worker exited with code {process.exitcode}"
+                    job["finished_at"] = datetime.now().isoformat()
+                failed = job["status"] != "succeeded"
+            if failed:
+                self._remove_output(job_id)
+
+    def _discard_outputs(self):
+        """Removes the outputs of cancelled workers that have exited, and drops the oldest finished jobs."""
+        with self._lock:
+            exited = [(job_id, process) for job_id, process in self._terminated if not process.is_alive()]
+            self._terminated = [(job_id, process) for job_id, process in self._terminated if process.is_alive()]
+            busy = set(self._processes) | {job_id for job_id, _ in self._terminated}
+            finished = [job_id for job_id, job in self._jobs.items()
+                        if job["status"] in FINISHED_STATUSES and job_id not in busy]
+            dropped = finished[:max(0, len(finished) - self.max_finished_jobs)]
+            for job_id in dropped:
+                del self._jobs[job_id]
+        for job_id, process in exited:
+            process.join()
+            self._remove_output(job_id)
+        for job_id in dropped:
+            self._remove_output(job_id)
+
+    def _apply_update(self, job_id, update):
+        publish = None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "running":
+                return  # Late update from a cancelled job
+            job.update(update)
+            if job["status"] in ("succeeded", "failed"):
+                job["finished_at"] = datetime.now().isoformat()
+                if job["status"] == "succeeded" and job["options"]["publish"] and self.on_success:
+                    publish = dict(job)
+        if publish is not None:
+            try:
+                self.on_success(publish)
+                with self._lock:
+                    job["published"] = True
+            except Exception as e:
+                with self._lock:
+                    job["error"] = f"Publishing failed: {e}"
+
+    # ---------- Helpers ----------
+
+    def _remove_output(self, job_id):
+        shutil.rmtree(os.path.join(self.output_root, job_id), ignore_errors=True)
+
+    def _resolve_inputs(self, inputs):
+        if not isinstance(inputs, dict):
+            raise ValueError("'inputs' must be an object mapping input names to file paths")
+        unknown = set(inputs) - set(self.default_file_paths)
+        if unknown:
+            raise ValueError(f"Unknown input(s): {', '.join(sorted(unknown))}")
+        file_paths = {**self.default_file_paths, **inputs}
+        for name, path in inputs.items():
+            if not isinstance(path, str):
+                raise ValueError(f"Input '{name}' must be a file path string")
+            real_path = os.path.realpath(path)
+            if os.path.commonpath([real_path, self.allowed_root]) != self.allowed_root:
+                raise ValueError(f"Input '{name}' must be inside {self.allowed_root}")
+            if not os.path.isfile(real_path):
+                raise ValueError(f"Input '{name}' not found: {path}")
+        return file_paths
+
+    @staticmethod
+    def _public_view(job):
+        view = {k: v for k, v in job.items() if not k.startswith("_")}
+        started = job.get("_started")
+        if started is not None:
+            if job["finished_at"] is None:
+                view["elapsed_seconds"] = round(time.time() - started, 2)
+            else:
+                finished = datetime.fromisoformat(job["finished_at"]).timestamp()
+                view["elapsed_seconds"] = round(finished - started, 2)
+        return view
@@ -0,0 +1,24 @@
+"""
+Response cache key regression tests
+Run from the repository root with: python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.datastructures import MultiDict
+from api_cache import ResponseCache
+
+
+def key(*pairs):
+    return ResponseCache.make_key("/api/timetable", MultiDict(pairs), "v1")
+
+
+def test_parameter_order_does_not_matter():
+    assert key(("day", "Monday"), ("level", "1")) == key(("level", "1"), ("day", "Monday"))
+
+
+def test_repeated_parameters_keep_their_order():
+    assert key(("day", "Monday"), ("day", "Tuesday")) != key(("day", "Tuesday"), ("day", "Monday"))
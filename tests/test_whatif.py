@@ -0,0 +1,64 @@
+"""
+What-if endpoint regression tests
+Run from the repository root with: python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def client():
+    os.chdir(ROOT)  # The API reads Data/ relative to the working directory
+    sys.path.insert(0, ROOT)
+    import api
+    return api.app.test_client()
+
+
+@pytest.fixture(scope="module")
+def scheduled(client):
+    """A move that keeps a served lecture where it is."""
+    entry = next(e for e in client.get("/api/timetable?limit=1000").get_json()["data"]["schedule"]
+                 if e["session_type"] == "Lecture")
+    return {field: entry[field] for field in
+            ("course_id", "session_type", "sections", "timeslot_ids", "room_id", "instructor_id")}
+
+
+def whatif(client, moves):
+    return client.post("/api/whatif", json={"moves": moves, "commit": False})
+
+
+def test_repeated_slots_are_rejected_without_corrupting_the_state(client, scheduled):
+    repeated = dict(scheduled, timeslot_ids=[scheduled["timeslot_ids"][0]] * 2)
+    for _ in range(2):
+        assert whatif(client, [repeated]).status_code == 400
+    response = whatif(client, [scheduled])
+    assert response.status_code == 200
+    assert response.get_json()["data"]["feasible"]
+
+
+@pytest.mark.parametrize("change", [
+    {"timeslot_ids": []},
+    {"timeslot_ids": [True]},
+    {"timeslot_ids": [10 ** 6]},
+    {"room_id": ["x"]},
+    {"instructor_id": 7},
+    {"sections": [1, 2]},
+    {"course_id": None},
+])
+def test_malformed_moves_are_bad_requests(client, scheduled, change):
+    assert whatif(client, [dict(scheduled, **change)]).status_code == 400
+
+
+def test_infeasible_moves_are_rolled_back(client, scheduled):
+    unsuitable = dict(scheduled, room_id=min(
+        client.get("/api/rooms").get_json()["data"], key=lambda room: room["capacity"])["room_id"])
+    for _ in range(2):
+        response = whatif(client, [unsuitable])
+        assert response.status_code == 200
+        assert not response.get_json()["data"]["feasible"]
+    assert whatif(client, [scheduled]).get_json()["data"]["feasible"]
@@ -0,0 +1,198 @@
+"""
+Timetable diff between two runs
+
+Sessions are matched by their stable key (course, session type, sorted sections), so
+the diff is one hashing pass over each timetable instead of nested loops. Either side
+can be a timetable_data.json or .ttstore path, a loaded document, a plain list of
+schedule entries, or an index (TimetableIndex / MappedTimetableIndex), whose columns
+are read without decoding whole records.
+
+Usage: python timetable_diff.py BEFORE AFTER [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+from models.session import session_key
+
+# Read for every entry; the other fields are only fetched for entries that changed
+MATCH_FIELDS = ("course_id", "session_type", "sections", "timeslot_ids", "room_id", "instructor_id")
+SESSION_FIELDS = ("course_id", "course_name", "session_type", "sections")
+PLACEMENT_FIELDS = ("day", "start_time", "end_time", "timeslot_ids", "room_id", "instructor_id", "instructor_name")
+# What a move changed, per element of a placement (timeslot_ids, room_id, instructor_id)
+CHANGE_NAMES = ("time", "room", "instructor")
+ENTITY_KINDS = ("sections", "instructors", "rooms")
+
+
+def load_schedule(source):
+    """The schedule entries of `source` as a sequence of dicts, or an index when it has one."""
+    if isinstance(source, (str, os.PathLike)):
+        if os.fspath(source).endswith(".ttstore"):
+            from timetable_store import TimetableStore
+            return TimetableStore(source).index
+        with open(source, 'r', encoding='utf-8') as f:
+            source = json.load(f)
+    if isinstance(source, dict):
+        return source.get("schedule", [])
+    return source
+
+
+def _match_rows(schedule):
+    """(session key, placement) per entry, in schedule order; indexes only decode these columns."""
+    if hasattr(schedule, "iter_columns"):
+        rows = schedule.iter_columns(MATCH_FIELDS)
+    else:
+        rows = (tuple(entry[field] for field in MATCH_FIELDS) for entry in schedule)
+    return [(session_key(course_id, session_type, sections), (tuple(slots), room_id, instructor_id))
+            for course_id, session_type, sections, slots, room_id, instructor_id in rows]
+
+
+def _entries(schedule):
+    return schedule.schedule if hasattr(schedule, "iter_columns") else schedule
+
+
+def _session(entry):
+    return {field: entry.get(field) for field in SESSION_FIELDS}
+
+
+def _where(entry):
+    return {field: entry.get(field) for field in PLACEMENT_FIELDS}
+
+
+class _EntitySummary:
+    """Per-entity counts of sessions gained, lost and moved."""
+
+    def __init__(self):
+        self.counts = {kind: defaultdict(lambda: {"added": 0, "removed": 0, "moved": 0}) for kind in ENTITY_KINDS}
+
+    @staticmethod
+    def _entities(row):
+        return {"sections": row["sections"], "instructors": [row["instructor_id"]], "rooms": [row["room_id"]]}
+
+    def count(self, before=None, after=None):
+        """An entity on both sides saw the session move; on one side only, it lost or gained it."""
+        old = self._entities(before) if before else {kind: [] for kind in ENTITY_KINDS}
+        new = self._entities(after) if after else {kind: [] for kind in ENTITY_KINDS}
+        for kind in ENTITY_KINDS:
+            for entity_id in set(old[kind]) | set(new[kind]):
+                in_old, in_new = entity_id in old[kind], entity_id in new[kind]
+                self.counts[kind][entity_id]["moved" if in_old and in_new else "added" if in_new else "removed"] += 1
+
+    def to_dict(self):
+        return {kind: {entity_id: counts[entity_id] for entity_id in sorted(counts)}
+                for kind, counts in self.counts.items()}
+
+
+def diff_timetables(before, after):
+    """
+    Compares two timetables (see load_schedule for the accepted forms). Returns
+    {"summary", "added", "removed", "moved", "entities"}: added and removed sessions
+    with their placement, moved sessions with "from", "to" and the aspects that changed
+    (time, room, instructor), and per section/instructor/room counts of sessions added,
+    removed and moved. A key scheduled several times is paired unchanged entries first,
+    then in schedule order.
+    """
+    before_schedule, after_schedule = load_schedule(before), load_schedule(after)
+    before_rows, after_rows = _match_rows(before_schedule), _match_rows(after_schedule)
+    before_entries, after_entries = _entries(before_schedule), _entries(after_schedule)
+
+    remaining = defaultdict(list)  # key -> before positions not yet paired
+    for position, (key, _) in enumerate(before_rows):
+        remaining[key].append(position)
+
+    # Pair identical placements first, so a key with several sessions only reports real moves
+    unpaired_after, unchanged = [], 0
+    for position, (key, placement) in enumerate(after_rows):
+        candidates = remaining.get(key, ())
+        match = next((i for i, old in enumerate(candidates) if before_rows[old][1] == placement), None)
+        if match is None:
+            unpaired_after.append(position)
+        else:
+            candidates.pop(match)
+            unchanged += 1
+
+    entities = _EntitySummary()
+    added, moved = [], []
+    for position in unpaired_after:
+        entry = after_entries[position]
+        key, placement = after_rows[position]
+        candidates = remaining.get(key)
+        if candidates:
+            old_position = candidates.pop(0)
+            old = before_entries[old_position]
+            moved.append({
+                "session": _session(entry),
+                "from": _where(old),
+                "to": _where(entry),
+                "changes": [name for name, was, now in zip(CHANGE_NAMES, before_rows[old_position][1], placement)
+                            if was != now]
+            })
+            entities.count(old, entry)
+        else:
+            added.append({"session": _session(entry), "to": _where(entry)})
+            entities.count(after=entry)
+
+    removed = []
+    for position in sorted(p for positions in remaining.values() for p in positions):
+        entry = before_entries[position]
+        removed.append({"session": _session(entry), "from": _where(entry)})
+        entities.count(before=entry)
+
+    return {
+        "summary": {
+            "before": len(before_rows),
+            "after": len(after_rows),
+            "unchanged": unchanged,
+            "moved": len(moved),
+            "added": len(added),
+            "removed": len(removed)
+        },
+        "added": added,
+        "removed": removed,
+        "moved": moved,
+        "entities": entities.to_dict()
+    }
+
+
+def format_report(diff):
+    """The diff as human-readable text."""
+    summary = diff["summary"]
+
+    def session(s):
+        return f"{s['course_id']} {s['session_type']} [{', '.join(s['sections'])}]"
+
+    def where(p):
+        return f"{p['day']} {p['start_time']}-{p['end_time']}, room {p['room_id']}, {p['instructor_name']}"
+
+    lines = [f"{summary['before']} -> {summary['after']} sessions: {summary['unchanged']} unchanged, "
+             f"{summary['moved']} moved, {summary['added']} added, {summary['removed']} removed"]
+    for change in diff["moved"]:
+        lines.append(f"  ~ {session(change['session'])} ({', '.join(change['changes'])}): "
+                     f"{where(change['from'])} -> {where(change['to'])}")
+    for change in diff["added"]:
+        lines.append(f"  + {session(change['session'])}: {where(change['to'])}")
+    for change in diff["removed"]:
+        lines.append(f"  - {session(change['session'])}: {where(change['from'])}")
+    for kind, counts in diff["entities"].items():
+        if counts:
+            lines.append(f"{kind.capitalize()} affected: " + ", ".join(
+                f"{entity_id} ({'/'.join(f'{n} {what}' for what, n in c.items() if n)})"
+                for entity_id, c in counts.items()))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show which sessions moved between two timetables")
+    parser.add_argument("before", help="Previous timetable_data.json or .ttstore")
+    parser.add_argument("after", help="New timetable_data.json or .ttstore")
+    parser.add_argument("--json", action="store_true", help="Print the structured change report as JSON")
+    args = parser.parse_args()
+
+    result = diff_timetables(args.before, args.after)
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(format_report(result))
@@ -0,0 +1,91 @@
+"""
+Timetable Index
+Position indexes over a timetable_data document, shared by the API service and the
+timetable store compiler
+"""
+
+from collections import defaultdict
+
+POSITION_INDEXES = ("by_instructor", "by_course", "by_section", "by_day", "by_level")
+
+
+def section_level(section_id, section):
+    """Level key of a section: from its record, else parsed from the ID; None if unknown."""
+    if section is not None:
+        return str(section["level"])
+    # Section IDs look like "CSIT-<level>-..."
+    parts = section_id.split("-")
+    return parts[1] if len(parts) > 2 else None
+
+
+def index_keys(entry, level_of):
+    """
+    (index name, key) pairs a schedule entry is listed under, each pair once.
+    `level_of(section_id)` gives the level key of a section (see section_level).
+    """
+    yield "by_instructor", entry["instructor_id"]
+    yield "by_course", entry["course_id"]
+    yield "by_day", entry["day"].lower()
+    levels = set()
+    for section_id in entry["sections"]:
+        yield "by_section", section_id
+        levels.add(level_of(section_id))
+    for level in levels:
+        if level is not None:
+            yield "by_level", level
+
+
+class IndexQueries:
+    """
+    Queries shared by TimetableIndex and the store's MappedTimetableIndex, written
+    against `schedule` and the position indexes only.
+    """
+
+    def entries(self, positions):
+        return [self.schedule[p] for p in positions]
+
+    def filter_positions(self, day=None, level=None, section=None):
+        """Schedule positions matching all given filters, in schedule order (None = no filters)."""
+        candidates = []
+        if day: candidates.append(self.by_day.get(day.lower(), []))
+        if level: candidates.append(self.by_level.get(str(level), []))
+        if section: candidates.append(self.by_section.get(section, []))
+        if not candidates:
+            return None
+        candidates.sort(key=len)
+        others = [set(c) for c in candidates[1:]]
+        return [p for p in candidates[0] if all(p in other for other in others)]
+
+
+class TimetableIndex(IndexQueries):
+    """
+    Lookup indexes over a loaded timetable_data document.
+
+    Schedule entries are indexed by instructor, course, section, day and level as
+    position lists in schedule order, so every lookup costs O(result size).
+    The indexed dicts are shared and must be treated as read-only.
+    """
+
+    def __init__(self, timetable_data):
+        self.data = timetable_data
+        self.schedule = timetable_data.get("schedule", [])
+        self.courses = timetable_data.get("courses", [])
+        self.instructors = timetable_data.get("instructors", [])
+        self.sections = timetable_data.get("sections", [])
+
+        self.course_by_id = {c["course_id"]: c for c in self.courses}
+        self.section_by_id = {s["section_id"]: s for s in self.sections}
+        self.instructor_by_id = {i["instructor_id"]: i for i in self.instructors}
+
+        for name in POSITION_INDEXES:
+            setattr(self, name, defaultdict(list))
+        for position, entry in enumerate(self.schedule):
+            for name, key in index_keys(entry, self._level_of):
+                getattr(self, name)[key].append(position)
+
+    def _level_of(self, section_id):
+        return section_level(section_id, self.section_by_id.get(section_id))
+
+    def iter_columns(self, fields):
+        """Yields a tuple of the given fields per schedule entry, in schedule order."""
+        return (tuple(entry[field] for field in fields) for entry in self.schedule)
@@ -0,0 +1,516 @@
+"""
+Timetable Store
+Compiles timetable_data into a compact binary file that API workers memory-map read-only
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+from collections.abc import Mapping, Sequence
+from timetable_index import POSITION_INDEXES, IndexQueries, index_keys, section_level
+
+# File layout (little-endian, sections 8-byte aligned):
+#   header   MAGIC, u32 section count, then per section: name (32 bytes), u64 offset, u64 size
+#   meta     JSON: version, source_stat of the JSON it was built from, per-collection schema, metadata
+#   strings  u32 offsets[n + 1] ("str_offsets") and the UTF-8 bytes ("str_data"); every string once
+#   pool     u32 values of all list fields, referenced as (start, count)
+#   rec.*    one fixed-width row per record, one 4-byte word per scalar field, two per list field
+#   keys.*   (string id, record number) pairs sorted by key, for lookups by id
+#   idx.*    (string id, start, count) triples sorted by key into "positions", for position lists
+MAGIC = b"TTSTORE\x01"
+SECTION_ENTRY = struct.Struct("<32sQQ")
+COLLECTIONS = ("courses", "instructors", "sections", "rooms", "timeslots", "schedule")
+KEY_FIELDS = {"courses": "course_id", "sections": "section_id", "instructors": "instructor_id"}
+NONE = 0xFFFFFFFF
+INT_NONE = -2 ** 31
+
+# Field kinds: 's' string, 'i' 32-bit int, 'S' list of strings, 'I' list of ints,
+# 'j' anything else, kept as JSON text in the string table
+ROW_CODES = {"s": "I", "i": "i", "S": "II", "I": "II", "j": "I"}
+NONE_WORDS = {"s": (NONE,), "i": (INT_NONE & NONE,), "S": (NONE, 0), "I": (NONE, 0), "L": (NONE, 0), "j": (NONE,)}
+
+
+def _kind_of(value):
+    """Narrowest kind of a non-None value; "L" is an empty list, which fits both list kinds."""
+    if isinstance(value, str):
+        return "s"
+    if _fits("i", value):
+        return "i"
+    if isinstance(value, list):
+        if not value:
+            return "L"
+        for kind in ("S", "I"):
+            if _fits(kind, value):
+                return kind
+    return "j"
+
+
+def _fits(kind, value):
+    if kind == "s":
+        return isinstance(value, str)
+    if kind == "i":
+        return type(value) is int and INT_NONE < value < 2 ** 31
+    if kind == "j":
+        return True
+    if not isinstance(value, list):
+        return False
+    if kind == "S":
+        return all(isinstance(item, str) for item in value)
+    if kind == "I":
+        return all(type(item) is int and 0 <= item < NONE for item in value)
+    return not value
+
+
+class _Column:
+    """
+    The row words of one field, in the narrowest kind that fits every value seen so far.
+    A value that does not fit turns the column into JSON ('j'), re-encoding only this
+    column from its own words.
+    """
+
+    def __init__(self, builder, preceding):
+        self.builder = builder
+        self.kind = None  # Until the first non-None value
+        self.nones = preceding
+        self.words = array("I")
+
+    def append(self, value):
+        if value is None:
+            if self.kind is None:
+                self.nones += 1
+            else:
+                self.words.extend(NONE_WORDS[self.kind])
+            return
+        if self.kind is None:
+            self.kind = _kind_of(value)
+            self.words.extend(NONE_WORDS[self.kind] * self.nones)
+        elif self.kind == "L" and _kind_of(value) in ("S", "I"):
+            self.kind = _kind_of(value)  # Earlier empty lists and Nones are encoded alike
+        if not _fits(self.kind, value):
+            self._to_json()
+        self.words.extend(self.builder.encode_field(self.kind, value))
+
+    def final_kind(self):
+        return {None: "s", "L": "S"}.get(self.kind, self.kind)
+
+    def final_words(self):
+        if self.kind is None:
+            return array("I", [NONE]) * self.nones
+        return self.words
+
+    def _to_json(self):
+        values = list(self._decode())
+        self.kind = "j"
+        self.words = array("I")
+        for value in values:
+            self.words.extend(self.builder.encode_field("j", value))
+
+    def _decode(self):
+        strings = list(self.builder.string_ids)
+        pool = self.builder.pool
+        width = len(NONE_WORDS[self.kind])
+        for i in range(0, len(self.words), width):
+            word = self.words[i]
+            if self.kind == "i":
+                yield None if word == INT_NONE & NONE else word - (word >> 31 << 32)
+            elif word == NONE:
+                yield None
+            elif self.kind == "s":
+                yield strings[word]
+            elif self.kind == "j":
+                yield json.loads(strings[word])
+            else:
+                items = pool[word:word + self.words[i + 1]].tolist()
+                yield [strings[item] for item in items] if self.kind == "S" else items
+
+
+class StoreBuilder:
+    """
+    Builds a store one record at a time. Only the encoded columns, the string table, the
+    list pool and the position lists are kept, never the records themselves. Field kinds
+    are inferred from the values (see _kind_of). Schedule entries are indexed as they are
+    added, so sections (whose levels the by_level index uses) must be added before them.
+    """
+
+    def __init__(self):
+        self.string_ids = {}
+        self.pool = array("I")
+        self.columns = {name: {} for name in COLLECTIONS}
+        self.counts = dict.fromkeys(COLLECTIONS, 0)
+        self.number_of = {name: {} for name in KEY_FIELDS}
+        self.section_levels = {}
+        self.positions = {name: {} for name in POSITION_INDEXES}
+
+    def string(self, value):
+        if value is None:
+            return NONE
+        if value not in self.string_ids:
+            self.string_ids[value] = len(self.string_ids)
+        return self.string_ids[value]
+
+    def encode_field(self, kind, value):
+        if kind == "s":
+            return (self.string(value),)
+        if kind == "i":
+            return ((INT_NONE if value is None else value) & NONE,)
+        if kind == "j":
+            return (NONE if value is None else self.string(json.dumps(value)),)
+        if value is None:
+            return NONE, 0
+        start = len(self.pool)
+        if kind == "S":
+            self.pool.extend(self.string(item) for item in value)
+        else:
+            self.pool.extend(value)
+        return start, len(value)
+
+    def add(self, name, record):
+        """Appends a record to collection `name`."""
+        number = self.counts[name]
+        columns = self.columns[name]
+        for field in record:
+            if field not in columns:
+                columns[field] = _Column(self, number)
+        for field, column in columns.items():
+            column.append(record.get(field))
+        self.counts[name] = number + 1
+
+        if name in KEY_FIELDS:
+            self.number_of[name][record[KEY_FIELDS[name]]] = number
+        if name == "sections":
+            if self.counts["schedule"]:
+                raise ValueError("Sections must be added before the schedule")
+            self.section_levels[record["section_id"]] = section_level(record["section_id"], record)
+        elif name == "schedule":
+            for index, key in index_keys(record, self._level_of):
+                self.positions[index].setdefault(key, array("I")).append(number)
+
+    def extend(self, name, records):
+        for record in records:
+            self.add(name, record)
+
+    def write(self, path, version, source_stat=None, metadata=None):
+        """
+        Writes the store to `path` for TimetableStore to map. `source_stat` is the
+        (mtime_ns, size) of the JSON file the records were read from; readers use it to
+        trust the store without re-reading that file.
+        The file is written to a temporary name and renamed, so readers never see it half written.
+        """
+        sections = {}
+        schema = {}
+        for name in COLLECTIONS:
+            columns = self.columns[name]
+            schema[name] = [[field, column.final_kind()] for field, column in columns.items()]
+            width = sum(len(ROW_CODES[kind]) for _, kind in schema[name])
+            rows = array("I", bytes(4 * width * self.counts[name]))
+            word = 0
+            for column in columns.values():
+                words = column.final_words()
+                step = len(ROW_CODES[column.final_kind()])
+                for i in range(step):
+                    rows[word + i::width] = words[i::step]
+                word += step
+            sections[f"rec.{name}"] = _little_endian(rows)
+
+        for name, number_of in self.number_of.items():
+            sections[f"keys.{name}"] = _little_endian(array("I", [
+                word for key in sorted(number_of) for word in (self.string(key), number_of[key])]))
+
+        positions = array("I")
+        for name in POSITION_INDEXES:
+            position_lists = self.positions[name]
+            words = array("I")
+            for key in sorted(position_lists):
+                words.extend((self.string(key), len(positions), len(position_lists[key])))
+                positions.extend(position_lists[key])
+            sections[f"idx.{name}"] = _little_endian(words)
+        sections["positions"] = _little_endian(positions)
+        sections["pool"] = _little_endian(self.pool)
+
+        encoded = [s.encode("utf-8") for s in self.string_ids]
+        offsets = array("I", [0])
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        sections["str_offsets"] = _little_endian(offsets)
+        sections["str_data"] = b"".join(encoded)
+        sections["meta"] = json.dumps({"version": version, "source_stat": source_stat, "schema": schema,
+                                       "metadata": metadata or {}}).encode("utf-8")
+
+        header_size = len(MAGIC) + 4 + len(sections) * SECTION_ENTRY.size
+        toc, body, offset = [], [], _align(header_size)
+        for name, data in sections.items():
+            toc.append(SECTION_ENTRY.pack(name.encode("ascii"), offset, len(data)))
+            body.append(data + b"\0" * (_align(len(data)) - len(data)))
+            offset += _align(len(data))
+        header = MAGIC + struct.pack("<I", len(sections)) + b"".join(toc)
+
+        temp_path = temp_path_for(path)
+        try:
+            with open(temp_path, "xb") as f:
+                f.write(header + b"\0" * (_align(header_size) - header_size))
+                f.writelines(body)
+            os.replace(temp_path, path)
+        except BaseException:
+            _remove_quietly(temp_path)
+            raise
+
+    def _level_of(self, section_id):
+        level = self.section_levels.get(section_id)
+        return level if level is not None else section_level(section_id, None)
+
+
+def compile_document(timetable_data, path, version, source_stat=None):
+    """Writes a loaded timetable_data document to `path` (see StoreBuilder.write)."""
+    builder = StoreBuilder()
+    for name in COLLECTIONS:
+        builder.extend(name, timetable_data.get(name, []))
+    builder.write(path, version, source_stat, timetable_data.get("metadata", {}))
+
+
+def temp_path_for(path):
+    """
+    A temporary file name next to `path` (same filesystem, so os.replace onto `path` is
+    atomic) that no other process or thread writing `path` at the same time will pick.
+    Open it with mode "x" so that a collision fails instead of sharing the file.
+    """
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def _little_endian(words):
+    if sys.byteorder != "little":
+        words = array(words.typecode, words)
+        words.byteswap()
+    return words.tobytes()
+
+
+class _Strings:
+    """String table; each string is decoded once per process, on first use (unique strings only)."""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+        self._decoded = [None] * (len(offsets) - 1)
+
+    def __getitem__(self, string_id):
+        value = self._decoded[string_id]
+        if value is None:
+            value = str(self.data[self.offsets[string_id]:self.offsets[string_id + 1]], "utf-8")
+            self._decoded[string_id] = value
+        return value
+
+
+class RecordArray(Sequence):
+    """Read-only list of the records of one collection, decoded to dicts on access."""
+
+    def __init__(self, store, name):
+        self._store = store
+        kinds = [kind for _, kind in store.schema[name]]
+        self._row = struct.Struct("<" + "".join(ROW_CODES[kind] for kind in kinds))
+        self._rows = store.section(f"rec.{name}")
+        self._length = len(self._rows) // self._row.size if self._row.size else 0
+        # (field, kind, position of its first word in the unpacked row)
+        self._layout, word = [], 0
+        for field, kind in store.schema[name]:
+            self._layout.append((field, kind, word))
+            word += len(ROW_CODES[kind])
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._length))]
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("record index out of range")
+        words = self._row.unpack_from(self._rows, i * self._row.size)
+        return {field: self._decode(kind, words, w) for field, kind, w in self._layout}
+
+    def iter_columns(self, fields):
+        """Yields a tuple of the given fields per record, decoding nothing else."""
+        layout = {field: (kind, w) for field, kind, w in self._layout}
+        columns = [layout[field] for field in fields]
+        for words in self._row.iter_unpack(self._rows):
+            yield tuple(self._decode(kind, words, w) for kind, w in columns)
+
+    def _decode(self, kind, words, w):
+        word = words[w]
+        if kind == "s":
+            return None if word == NONE else self._store.strings[word]
+        if kind == "i":
+            return None if word == INT_NONE else word
+        if word == NONE:
+            return None
+        if kind == "j":
+            return json.loads(self._store.strings[word])
+        items = self._store.pool[word:word + words[w + 1]].tolist()
+        return [self._store.strings[item] for item in items] if kind == "S" else items
+
+
+class _SortedKeys(Mapping):
+    """Mapping over fixed-width rows whose first word is a string id, sorted by that string."""
+
+    def __init__(self, store, section, width):
+        self._strings = store.strings
+        self._rows = store.section(section).cast("I")
+        self._width = width
+        self._keys = _KeyColumn(self)
+
+    def _row(self, key):
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._rows[i * self._width:(i + 1) * self._width]
+        return None
+
+    def __len__(self):
+        return len(self._rows) // self._width
+
+    def __iter__(self):
+        return iter(self._keys)
+
+
+class _KeyColumn(Sequence):
+    def __init__(self, keys):
+        self._owner = keys
+
+    def __len__(self):
+        return len(self._owner)
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._owner._strings[self._owner._rows[i * self._owner._width]]
+
+
+class RecordLookup(_SortedKeys):
+    """{key: record} for one collection, found by binary search in the mapped file."""
+
+    def __init__(self, store, name):
+        super().__init__(store, f"keys.{name}", 2)
+        self._records = store.records[name]
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        return self._records[row[1]]
+
+
+class PositionLookup(_SortedKeys):
+    """{key: schedule positions}; the positions are zero-copy views of the mapped file."""
+
+    def __init__(self, store, name):
+        super().__init__(store, f"idx.{name}", 3)
+        self._positions = store.section("positions").cast("I")
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row is None:
+            raise KeyError(key)
+        return self._positions[row[1]:row[1] + row[2]]
+
+
+class StoreDocument(Mapping):
+    """The timetable_data document as served from a store: metadata plus record arrays."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, key):
+        if key == "metadata":
+            return self._store.metadata
+        return self._store.records[key]
+
+    def __len__(self):
+        return len(COLLECTIONS) + 1
+
+    def __iter__(self):
+        return iter(("metadata",) + COLLECTIONS)
+
+
+class TimetableStore:
+    """
+    A compiled timetable mapped read-only into memory. Every process mapping the same
+    file shares its pages, and records are only decoded when a request touches them.
+    `index` has the same attributes and methods as TimetableIndex.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("Timetable stores can only be mapped on little-endian machines")
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a timetable store")
+        (count,) = struct.unpack_from("<I", view, len(MAGIC))
+        self._sections = {}
+        for i in range(count):
+            name, offset, size = SECTION_ENTRY.unpack_from(view, len(MAGIC) + 4 + i * SECTION_ENTRY.size)
+            self._sections[name.rstrip(b"\0").decode("ascii")] = view[offset:offset + size]
+
+        meta = json.loads(bytes(self.section("meta")))
+        self.path = path
+        self.version = meta["version"]
+        self.source_stat = tuple(meta["source_stat"]) if meta.get("source_stat") else None
+        self.schema = meta["schema"]
+        self.metadata = meta["metadata"]
+        self.strings = _Strings(self.section("str_offsets").cast("I"), self.section("str_data"))
+        self.pool = self.section("pool").cast("I")
+        self.records = {name: RecordArray(self, name) for name in COLLECTIONS}
+        self.data = StoreDocument(self)
+        self.index = MappedTimetableIndex(self)
+
+    def section(self, name):
+        return self._sections[name]
+
+
+class MappedTimetableIndex(IndexQueries):
+    """TimetableIndex interface over a TimetableStore."""
+
+    def __init__(self, store):
+        self.data = store.data
+        self.schedule = store.records["schedule"]
+        self.courses = store.records["courses"]
+        self.instructors = store.records["instructors"]
+        self.sections = store.records["sections"]
+
+        self.course_by_id = RecordLookup(store, "courses")
+        self.section_by_id = RecordLookup(store, "sections")
+        self.instructor_by_id = RecordLookup(store, "instructors")
+
+        for name in POSITION_INDEXES:
+            setattr(self, name, PositionLookup(store, name))
+
+    def iter_columns(self, fields):
+        return self.schedule.iter_columns(fields)
+
+
+if __name__ == "__main__":
+    # Usage: python timetable_store.py Data/timetable_data.json [Data/timetable_data.ttstore]
+    import hashlib
+
+    json_path = sys.argv[1]
+    store_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(json_path)[0] + ".ttstore"
+    stat = os.stat(json_path)
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    compile_document(json.loads(raw), store_path, hashlib.sha1(raw).hexdigest()[:16], (stat.st_mtime_ns, stat.st_size))
+    print(f"Compiled {json_path} -> {store_path} ({os.path.getsize(store_path)} bytes)")